@@ -0,0 +1,85 @@
+from asyncio import Event
+from base64 import b64decode, b64encode
+from collections import deque
+from typing import Self
+
+from loguru import logger as log
+
+from callbot.backends import Backend
+from callbot.exceptions import CallManagerException, EndCall
+from callbot.settings import Settings
+
+
+class AudioPump:
+    """
+    Forwards inbound audio from Twilio to the backend from its own task.
+
+    Frames are put into a ring buffer without ever blocking the Twilio
+    listener. If the backend cannot keep up and the buffer is full, the oldest
+    frames are dropped. Frames are only forwarded once at least
+    `merge_frames` of them are waiting; all waiting frames are then merged and
+    sent to the backend as a single chunk of audio.
+    """
+    _frames: deque[str]
+    _ready: Event
+
+    def __init__(
+        self,
+        backend: Backend,
+        capacity: int = 250,
+        merge_frames: int = 1,
+    ) -> None:
+        self.backend = backend
+        self.merge_frames = merge_frames
+        self.frames_received = 0
+        self.frames_merged = 0
+        self.frames_dropped = 0
+        self._frames = deque(maxlen=max(capacity, merge_frames))
+        self._ready = Event()
+
+    @classmethod
+    def from_settings(cls, backend: Backend) -> Self:
+        settings = Settings()
+        return cls(
+            backend,
+            capacity=settings.stream.inbound_buffer_frames,
+            merge_frames=settings.stream.inbound_merge_frames,
+        )
+
+    @property
+    def buffered_frames(self) -> int:
+        return len(self._frames)
+
+    def put_nowait(self, payload: str) -> None:
+        self.frames_received += 1
+        if len(self._frames) == self._frames.maxlen:
+            self.frames_dropped += 1
+        self._frames.append(payload)
+        if len(self._frames) >= self.merge_frames:
+            self._ready.set()
+
+    async def run(self) -> None:
+        """Forwards buffered frames to the backend until cancelled."""
+        try:
+            while True:
+                await self._ready.wait()
+                frames = list(self._frames)
+                self._frames.clear()
+                self._ready.clear()
+                await self.backend.send_audio(self._merge(frames))
+        except EndCall as e:
+            raise e
+        except Exception as e:
+            raise CallManagerException("AudioPump.run", e) from e
+
+    def log_stats(self) -> None:
+        log.debug(
+            f"Audio pump received {self.frames_received} frames "
+            f"({self.frames_merged} merged, {self.frames_dropped} dropped)"
+        )
+
+    def _merge(self, frames: list[str]) -> str:
+        if len(frames) == 1:
+            return frames[0]
+        self.frames_merged += len(frames)
+        return b64encode(b"".join(b64decode(frame) for frame in frames)).decode()
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import sqlite3
+from abc import ABC, abstractmethod
+from collections import deque
+from threading import Lock
+from time import time
+from typing import ClassVar, TYPE_CHECKING
+
+from loguru import logger as log
+
+from callbot.metrics import MetricsRegistry
+from callbot.settings import Settings
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+_evictions = MetricsRegistry().counter(
+    "callbot_jti_store_evictions_total",
+    "JTIs removed from the replay store by reason.",
+    label_names=("reason", ),
+)
+MetricsRegistry().gauge(
+    "callbot_jti_store_entries",
+    "Number of JTIs in the replay store, as of the last time one was used.",
+    # Neither creates a store nor queries it on the event loop.
+    function=lambda: JTIStore._shared.entries if JTIStore._shared else 0,
+)
+
+
+class JTIStore(ABC):
+    """
+    Remembers the JTIs of used tokens, until the tokens expire.
+
+    A token presented after its expiration is rejected anyway, so its JTI
+    does not need to be kept any longer. If the store exceeds its maximum
+    size nonetheless, the JTIs expiring first are dropped early.
+
+    Claiming a JTI may block (e.g. on the SQLite file), so it must not be done
+    on the event loop. Tokens are checked by sync dependencies, i.e. from
+    FastAPI's thread pool, or via `to_thread`, so JTIs are claimed under a
+    lock. For the same reason, the number of `entries` is only updated, when
+    a JTI is claimed, while `len` counts them anew.
+    """
+    _shared: ClassVar[JTIStore | None] = None
+
+    entries: int
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.entries = 0
+        self._lock = Lock()
+        self._expired = _evictions.labels("expired")
+        self._capacity = _evictions.labels("capacity")
+
+    @classmethod
+    def shared(cls) -> JTIStore:
+        """Returns the store configured for this process."""
+        if cls._shared is None:
+            settings = Settings().server.auth
+            store: JTIStore
+            if settings.jti_store_path is None:
+                store = MemoryJTIStore(settings.jti_store_max_size)
+            else:
+                store = SQLiteJTIStore(
+                    settings.jti_store_path,
+                    settings.jti_store_max_size,
+                )
+            cls._shared = store
+        return cls._shared
+
+    @classmethod
+    def close_shared(cls) -> None:
+        if (store := cls._shared) is not None:
+            cls._shared = None
+            store.log_stats()
+            store.close()
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def use(self, jti: str, expires: float) -> bool:
+        """
+        Marks the JTI as used until `expires` (a Unix timestamp).
+
+        Returns `False`, if the JTI had already been used.
+        """
+        with self._lock:
+            return self._use(jti, expires)
+
+    @abstractmethod
+    def _use(self, jti: str, expires: float) -> bool:
+        ...
+
+    @abstractmethod
+    def close(self) -> None:
+        ...
+
+    def log_stats(self) -> None:
+        log.debug(
+            f"JTI store: {len(self)} entries, {self._expired.value:.0f} "
+            f"expired, {self._capacity.value:.0f} dropped early"
+        )
+
+
+class MemoryJTIStore(JTIStore):
+    """
+    Keeps the JTIs of a single process in memory.
+
+    JTIs are queued in the order they were used. Since tokens are typically
+    issued with the same lifetime, this is also the order they expire in, and
+    expired JTIs are removed from the front of the queue in O(1). A JTI with
+    an unusually long lifetime merely delays the removal of those behind it.
+    """
+    _expires: dict[str, float]
+    _queue: deque[tuple[float, str]]
+
+    def __init__(self, max_size: int) -> None:
+        super().__init__(max_size)
+        self._expires = {}
+        self._queue = deque()
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+    def _use(self, jti: str, expires: float) -> bool:
+        now = time()
+        self._remove_expired(now)
+        if self._expires.get(jti, 0.) > now:
+            return False
+        self._expires[jti] = expires
+        self._queue.append((expires, jti))
+        while len(self._expires) > self.max_size:
+            if self._remove_first():
+                self._capacity.inc()
+        self.entries = len(self._expires)
+        return True
+
+    def close(self) -> None:
+        self._expires.clear()
+        self._queue.clear()
+        self.entries = 0
+
+    def _remove_expired(self, now: float) -> None:
+        while self._queue and self._queue[0][0] <= now:
+            if self._remove_first():
+                self._expired.inc()
+
+    def _remove_first(self) -> bool:
+        expires, jti = self._queue.popleft()
+        # The JTI may have been used again after it expired.
+        if self._expires.get(jti) != expires:
+            return False
+        del self._expires[jti]
+        return True
+
+
+class SQLiteJTIStore(JTIStore):
+    """
+    Keeps JTIs in a SQLite file, shared by all workers and across restarts.
+
+    A JTI is claimed by a single statement, so two workers presented with the
+    same token cannot both accept it. Expired JTIs are deleted at most once
+    every `PURGE_INTERVAL` seconds, which is also when the size is enforced
+    and the `entries` of all workers are counted. In between, a worker only
+    counts the JTIs it claimed itself.
+    """
+    PURGE_INTERVAL = 10.
+
+    def __init__(self, path: Path, max_size: int) -> None:
+        super().__init__(max_size)
+        self.path = path
+        self._db = sqlite3.connect(
+            path,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jti ("
+            "  jti TEXT PRIMARY KEY, expires REAL NOT NULL"
+            ")"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS jti_expires ON jti (expires)"
+        )
+        self._next_purge = 0.
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count()
+
+    def _use(self, jti: str, expires: float) -> bool:
+        now = time()
+        if now >= self._next_purge:
+            self._purge(now)
+        # Either inserts the JTI or takes over an expired entry.
+        cursor = self._db.execute(
+            "INSERT INTO jti (jti, expires) VALUES (?, ?) "
+            "ON CONFLICT (jti) DO UPDATE SET expires = excluded.expires "
+            "WHERE jti.expires <= ?",
+            (jti, expires, now),
+        )
+        if cursor.rowcount != 1:
+            return False
+        self.entries += 1
+        return True
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _count(self) -> int:
+        return int(self._db.execute("SELECT count(*) FROM jti").fetchone()[0])
+
+    def _purge(self, now: float) -> None:
+        self._next_purge = now + self.PURGE_INTERVAL
+        cursor = self._db.execute("DELETE FROM jti WHERE expires <= ?", (now, ))
+        self._expired.inc(cursor.rowcount)
+        self.entries = self._count()
+        excess = self.entries - self.max_size
+        if excess > 0:
+            cursor = self._db.execute(
+                "DELETE FROM jti WHERE jti IN "
+                "(SELECT jti FROM jti ORDER BY expires LIMIT ?)",
+                (excess, ),
+            )
+            self._capacity.inc(cursor.rowcount)
+            self.entries -= cursor.rowcount
@@ -1,4 +1,5 @@
-from typing import ClassVar, Self
+from time import time
+from typing import Self
 
 from jwt.exceptions import DecodeError
 from loguru import logger as log
@@ -7,12 +8,11 @@ from pydantic import ValidationError
 from callbot.exceptions import JTIMissing, JTIReused, JWTInvalid
 from callbot.settings import Settings
 from .base_jwt import BaseJWT
+from .jti_store import JTIStore
 from .payload import Payload
 
 
 class JWT(BaseJWT[Payload]):
-    used_jti: ClassVar[set[str]] = set()
-
     @classmethod
     def generate(cls) -> str:
         settings = Settings()
@@ -33,9 +33,14 @@ class JWT(BaseJWT[Payload]):
             )
         except (DecodeError, ValidationError):
             raise JWTInvalid(token) from None
-        if jwt.payload.registered_claims.jti is None:
+        claims = jwt.payload.registered_claims
+        if claims.jti is None:
             raise JTIMissing()
-        if jwt.payload.registered_claims.jti in cls.used_jti:
+        expires: float
+        if claims.exp is None:
+            expires = time() + settings.server.auth.expiration_seconds
+        else:
+            expires = claims.exp
+        if not JTIStore.shared().use(claims.jti, expires):
             raise JTIReused()
-        cls.used_jti.add(jwt.payload.registered_claims.jti)
         return jwt
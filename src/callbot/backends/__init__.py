@@ -1,3 +1,12 @@
 from .backend import Backend
 from .openai import OpenAIBackend
 from .openai_elevenlabs import OpenAIElevenLabsBackend
+from .pool import BackendPool
+
+
+__all__ = [
+    "Backend",
+    "BackendPool",
+    "OpenAIBackend",
+    "OpenAIElevenLabsBackend",
+]
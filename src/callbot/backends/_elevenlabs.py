@@ -5,39 +5,66 @@ from typing import Self
 
 from loguru import logger as log
 from pydantic import ValidationError
+from pydantic_core import to_json
 # TODO: Migrate to httpx-ws
 from websockets.asyncio.client import ClientConnection, connect
 from websockets.exceptions import ConnectionClosed
+from websockets.protocol import State
 
+from callbot.metrics import websocket_messages
+from callbot.runtime import RuntimeSnapshot
 from callbot.schemas.elevenlabs.send import (
     AnySendMessage,
     CloseContextClient,
     CloseSocketClient,
     FlushContextClient,
     InitializeContext,
+    KeepContextAlive,
     SendTextMulti,
 )
 from callbot.schemas.elevenlabs.receive import (
     AnyReceiveMessage,
+    AudioOutputMulti,
+    FinalOutputMulti,
+    ReceiveEnvelope,
     ReceiveMessage,
 )
-from callbot.settings import Settings
+
+
+_messages = websocket_messages()
 
 
 class Elevenlabs:
+    """
+    Client for the Elevenlabs multi-context websocket.
+
+    Text messages are serialized from cached JSON envelopes and inbound audio
+    is extracted without validating the entire message. The output of both is
+    equivalent to that of the models in `callbot.schemas.elevenlabs`, which
+    are still used for all other messages.
+    """
     _websocket: connect
     _connection: ClientConnection
     _contexts: set[str | None]
+    _init_context_suffix: str
+    _send_text_suffixes: dict[str | None, str]
 
     def __init__(self):
         super().__init__()
-        settings = Settings()
-        log.debug(f"Connecting to Elevenlabs Websocket: {settings.elevenlabs.stream_url}")
+        snapshot = RuntimeSnapshot.current()
+        log.debug(
+            f"Connecting to Elevenlabs Websocket: "
+            f"{snapshot.elevenlabs_stream_url}"
+        )
         self._websocket = connect(
-            uri=settings.elevenlabs.stream_url,
-            additional_headers=settings.elevenlabs.get_auth_headers(),
+            uri=snapshot.elevenlabs_stream_url,
+            additional_headers=snapshot.elevenlabs_auth_headers,
         )
         self._contexts = set()
+        # Everything after the `text` and `context_id` fields is the same for
+        # every context, so it is only serialized once per snapshot.
+        self._init_context_suffix = snapshot.elevenlabs_init_context_suffix
+        self._send_text_suffixes = {}
 
     async def __aenter__(self) -> Self:
         self._connection = await self._websocket.__aenter__()
@@ -51,35 +78,61 @@ class Elevenlabs:
     ) -> None:
         await self._connection.__aexit__(exc_type, exc_val, exc_tb)
 
+    def is_alive(self) -> bool:
+        return self._connection.state is State.OPEN
+
     async def _send(self, message: AnySendMessage) -> None:
         serialized = message.model_dump_json(exclude_none=True)
+        await self._send_serialized(serialized, message.__class__.__name__)
+
+    async def _send_serialized(self, serialized: str, message_type: str) -> None:
         log.debug(f"Sending message to Elevenlabs: {serialized}")
+        _messages.labels("elevenlabs", "out", message_type).inc()
         await self._connection.send(serialized)
 
     async def send_text(self, text: str, context_id: str | None = None) -> None:
-        message: InitializeContext | SendTextMulti
         if context_id not in self._contexts:
             self._contexts.add(context_id)
-            settings = Settings()
-            message = InitializeContext(
-                text=text,
-                context_id=context_id,
-                voice_settings=settings.elevenlabs.voice_settings,
-                generation_config=settings.elevenlabs.generation_config,
+            await self._send_serialized(
+                self._encode_init_context(text, context_id),
+                InitializeContext.__name__,
             )
         else:
-            message = SendTextMulti(
-                text=text,
-                context_id=context_id,
+            await self._send_serialized(
+                self._encode_send_text(text, context_id),
+                SendTextMulti.__name__,
             )
-        await self._send(message)
+
+    def _encode_init_context(self, text: str, context_id: str | None) -> str:
+        """Equivalent to serializing an `InitializeContext` message."""
+        serialized = f'{{"text":{to_json(text).decode()}'
+        if context_id is not None:
+            serialized += f',"context_id":{to_json(context_id).decode()}'
+        return serialized + self._init_context_suffix
+
+    def _encode_send_text(self, text: str, context_id: str | None) -> str:
+        """Equivalent to serializing a `SendTextMulti` message."""
+        if (suffix := self._send_text_suffixes.get(context_id)) is None:
+            template = SendTextMulti(text="", context_id=context_id)
+            serialized = template.model_dump_json(exclude_none=True)
+            suffix = serialized.removeprefix('{"text":""')
+            self._send_text_suffixes[context_id] = suffix
+        return f'{{"text":{to_json(text).decode()}{suffix}'
 
     async def flush_context(self, context_id: str) -> None:
         """Force generation of any buffered audio in the context."""
         await self._send(FlushContextClient(context_id=context_id))
 
+    def has_context(self, context_id: str | None) -> bool:
+        return context_id in self._contexts
+
+    async def keep_context_alive(self, context_id: str) -> None:
+        """Resets the inactivity timeout of the context."""
+        await self._send(KeepContextAlive(context_id=context_id))
+
     async def close_context(self, context_id: str) -> None:
         self._contexts.remove(context_id)
+        self._send_text_suffixes.pop(context_id, None)
         await self._send(CloseContextClient(context_id=context_id))
 
     async def end_conversation(self) -> None:
@@ -89,13 +142,42 @@ class Elevenlabs:
         try:
             async for text in self._connection:
                 assert isinstance(text, str)
-                try:
-                    yield ReceiveMessage.validate_json(text)
-                except ValidationError as exc:
-                    log.error(f"Elevenlabs message unknown: {text}")
-                    log.debug(f"Elevenlabs validation error: {exc.json()}")
-                    yield None
+                if (message := self._decode_fast(text)) is None:
+                    try:
+                        message = ReceiveMessage.validate_json(text)
+                    except ValidationError as exc:
+                        log.error(f"Elevenlabs message unknown: {text}")
+                        log.debug(f"Elevenlabs validation error: {exc.json()}")
+                        yield None
+                        continue
+                _messages.labels(
+                    "elevenlabs", "in", message.__class__.__name__
+                ).inc()
+                yield message
         except (ConnectionClosed, CancelledError):
             log.info(f"Elevenlabs websocket connection closed.")
         finally:
             log.debug("Elevelabs.listen end")
+
+    @staticmethod
+    def _decode_fast(text: str) -> AnyReceiveMessage | None:
+        """
+        Extracts audio and final messages without validating the entire text.
+
+        Alignment data is not parsed, since it is not used. Returns `None`, if
+        the message does not have the expected shape; the caller should then
+        fall back to validating it via the `ReceiveMessage` union.
+        """
+        try:
+            data = ReceiveEnvelope.validate_json(text)
+        except ValidationError:
+            return None
+        context_id = data.get("contextId", data.get("context_id"))
+        if (audio := data.get("audio")) is not None:
+            return AudioOutputMulti.model_construct(
+                audio=audio,
+                context_id=context_id,
+            )
+        if data.get("isFinal"):
+            return FinalOutputMulti.model_construct(context_id=context_id)
+        return None
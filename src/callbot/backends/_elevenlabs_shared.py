@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+from asyncio import (
+    Event,
+    Queue,
+    Task,
+    TaskGroup,
+    create_task,
+    sleep,
+    timeout,
+)
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import suppress
+from itertools import count
+from time import monotonic
+
+from loguru import logger as log
+from websockets.exceptions import ConnectionClosed
+
+from callbot.backends._elevenlabs import Elevenlabs
+from callbot.exceptions import ElevenlabsUnavailable
+from callbot.misc.singleton import Singleton
+from callbot.runtime import RuntimeSnapshot
+from callbot.schemas.elevenlabs.receive import AnyReceiveMessage
+from callbot.settings import Settings
+
+
+CONTEXT_SEPARATOR = ":"
+
+
+class ElevenlabsConnections(metaclass=Singleton):
+    """
+    Process-wide manager of the Elevenlabs multi-context websocket connections.
+
+    Calls share a small number of long-lived connections instead of opening
+    their own. Each call gets an `ElevenlabsSession` on the least busy
+    connection; a new connection is only added, once all existing ones serve
+    the configured maximum number of calls. Connections are dropped, once
+    their last call has ended.
+    """
+    _connections: list[SharedConnection]
+
+    def __init__(self) -> None:
+        settings = Settings()
+        self.calls_per_connection = settings.elevenlabs.calls_per_connection
+        self._connections = []
+        self._session_ids = count()
+
+    def session(self) -> ElevenlabsSession:
+        snapshot = RuntimeSnapshot.current()
+        # Fail early, rather than retrying to connect in the background.
+        _ = snapshot.elevenlabs_stream_url, snapshot.elevenlabs_auth_headers
+        # Connections without sessions have been closed.
+        self._connections = [c for c in self._connections if c.sessions]
+        available = [
+            connection for connection in self._connections
+            if len(connection.sessions) < self.calls_per_connection
+        ]
+        if available:
+            connection = min(available, key=lambda c: len(c.sessions))
+        else:
+            connection = SharedConnection()
+            self._connections.append(connection)
+            log.debug(
+                f"Added shared Elevenlabs connection "
+                f"#{len(self._connections)}"
+            )
+        return connection.add_session(f"{next(self._session_ids)}")
+
+
+class SharedConnection:
+    """
+    A single Elevenlabs websocket connection shared by multiple calls.
+
+    Context IDs are namespaced with the ID of the session they belong to, so
+    that incoming messages can be routed to the right call. The connection is
+    opened lazily and re-opened transparently, as long as any session is
+    using it, and closed as soon as the last session is removed. Contexts
+    without any activity for the configured number of seconds are kept
+    alive. Callers waiting longer than the connect timeout for the
+    connection to be (re-)established get `ElevenlabsUnavailable`.
+    """
+    sessions: dict[str, ElevenlabsSession]
+    _elevenlabs: Elevenlabs | None
+    _connected: Event
+    _task: Task[None] | None
+    _context_activity: dict[str, float]
+
+    def __init__(self) -> None:
+        settings = Settings()
+        self.keep_alive_seconds = settings.elevenlabs.keep_alive_seconds
+        self.reconnect_delay_seconds = settings.elevenlabs.reconnect_delay_seconds
+        self.connect_timeout_seconds = settings.elevenlabs.connect_timeout_seconds
+        self.sessions = {}
+        self.reconnects = 0
+        self._elevenlabs = None
+        self._connected = Event()
+        self._task = None
+        self._context_activity = {}
+
+    def add_session(self, session_id: str) -> ElevenlabsSession:
+        session = ElevenlabsSession(self, session_id)
+        self.sessions[session_id] = session
+        if self._task is None:
+            self._task = create_task(self._run())
+        return session
+
+    def remove_session(self, session_id: str) -> None:
+        self.sessions.pop(session_id, None)
+        prefix = f"{session_id}{CONTEXT_SEPARATOR}"
+        for context_id in list(self._context_activity):
+            if context_id.startswith(prefix):
+                del self._context_activity[context_id]
+        if not self.sessions and self._task is not None:
+            log.debug("Closing shared Elevenlabs connection without sessions")
+            self._task.cancel()
+
+    async def send_text(self, text: str, context_id: str) -> None:
+        self._context_activity[context_id] = monotonic()
+        await self._call(lambda e: e.send_text(text, context_id=context_id))
+
+    async def flush_context(self, context_id: str) -> None:
+        self._context_activity[context_id] = monotonic()
+        await self._call(lambda e: e.flush_context(context_id))
+
+    async def close_context(self, context_id: str) -> None:
+        self._context_activity.pop(context_id, None)
+        # Contexts do not survive a reconnect, so while the connection is
+        # down, there is nothing to close (and no reason to wait for it).
+        if not self._connected.is_set() or self._elevenlabs is None:
+            return
+        if self._elevenlabs.has_context(context_id):
+            await self._elevenlabs.close_context(context_id)
+
+    async def _get(self) -> Elevenlabs:
+        try:
+            async with timeout(self.connect_timeout_seconds):
+                await self._connected.wait()
+        except TimeoutError:
+            raise ElevenlabsUnavailable(self.connect_timeout_seconds) from None
+        if self._elevenlabs is None:
+            raise RuntimeError("Shared Elevenlabs connection not open")
+        return self._elevenlabs
+
+    async def _call(self, method: Callable[[Elevenlabs], Awaitable[None]]) -> None:
+        elevenlabs = await self._get()
+        try:
+            await method(elevenlabs)
+        except ConnectionClosed:
+            # The listener notices this as well and reconnects.
+            self._connected.clear()
+            await method(await self._get())
+
+    async def _run(self) -> None:
+        try:
+            while self.sessions:
+                try:
+                    async with Elevenlabs() as elevenlabs:
+                        self._elevenlabs = elevenlabs
+                        self._connected.set()
+                        async with TaskGroup() as task_group:
+                            listener = task_group.create_task(
+                                self._listen(elevenlabs)
+                            )
+                            keep_alive = task_group.create_task(
+                                self._keep_alive(elevenlabs)
+                            )
+                            await listener
+                            keep_alive.cancel()
+                except Exception as e:
+                    log.warning(f"Shared Elevenlabs connection failed: {e}")
+                self._connected.clear()
+                if not self.sessions:
+                    break
+                self.reconnects += 1
+                log.info("Reconnecting shared Elevenlabs connection")
+                await sleep(self.reconnect_delay_seconds)
+        finally:
+            self._connected.clear()
+            self._elevenlabs = None
+            self._task = None
+
+    async def _listen(self, elevenlabs: Elevenlabs) -> None:
+        async for message in elevenlabs.listen():
+            if message is None:
+                continue
+            context_id = message.context_id or ""
+            session_id, _, context_id = context_id.partition(CONTEXT_SEPARATOR)
+            if (session := self.sessions.get(session_id)) is None:
+                log.debug(f"No Elevenlabs session for message: {message}")
+                continue
+            session.deliver(message.model_copy(update={"context_id": context_id}))
+
+    async def _keep_alive(self, elevenlabs: Elevenlabs) -> None:
+        while True:
+            await sleep(self.keep_alive_seconds / 2)
+            now = monotonic()
+            for context_id, last_activity in list(self._context_activity.items()):
+                if now - last_activity < self.keep_alive_seconds:
+                    continue
+                if not elevenlabs.has_context(context_id):
+                    continue
+                self._context_activity[context_id] = now
+                await elevenlabs.keep_context_alive(context_id)
+
+
+class ElevenlabsSession:
+    """
+    A single call's handle on a `SharedConnection`.
+
+    Offers the same interface as `Elevenlabs`, but context IDs passed to or
+    received from it are not namespaced.
+    """
+    _messages: Queue[AnyReceiveMessage | None]
+
+    def __init__(self, connection: SharedConnection, session_id: str) -> None:
+        self.session_id = session_id
+        self._connection = connection
+        self._messages = Queue()
+        self._contexts: set[str] = set()
+        self._closed = False
+
+    def is_alive(self) -> bool:
+        return not self._closed
+
+    def deliver(self, message: AnyReceiveMessage) -> None:
+        self._messages.put_nowait(message)
+
+    async def send_text(self, text: str, context_id: str) -> None:
+        self._contexts.add(context_id)
+        await self._connection.send_text(text, self._namespaced(context_id))
+
+    async def flush_context(self, context_id: str) -> None:
+        await self._connection.flush_context(self._namespaced(context_id))
+
+    async def close_context(self, context_id: str) -> None:
+        if context_id not in self._contexts:
+            return
+        self._contexts.remove(context_id)
+        await self._connection.close_context(self._namespaced(context_id))
+
+    async def close(self) -> None:
+        """Closes all open contexts and releases the shared connection."""
+        if self._closed:
+            return
+        try:
+            for context_id in list(self._contexts):
+                with suppress(ConnectionClosed):
+                    await self.close_context(context_id)
+        finally:
+            self._closed = True
+            self._connection.remove_session(self.session_id)
+            self._messages.put_nowait(None)
+
+    async def listen(self) -> AsyncIterator[AnyReceiveMessage]:
+        while (message := await self._messages.get()) is not None:
+            yield message
+        log.debug("ElevenlabsSession.listen end")
+
+    def _namespaced(self, context_id: str) -> str:
+        return f"{self.session_id}{CONTEXT_SEPARATOR}{context_id}"
@@ -0,0 +1,102 @@
+import re
+from time import perf_counter
+from typing import Literal, Self, TypeAlias
+
+from loguru import logger as log
+
+from callbot.settings import Settings
+
+
+ChunkBoundary: TypeAlias = Literal["none", "word", "clause", "sentence"]
+
+_BOUNDARY_PATTERNS: dict[ChunkBoundary, re.Pattern[str]] = {
+    "word": re.compile(r"\s+"),
+    "clause": re.compile(r"[.!?…,;:\u2013—]+[\"'\u201d\u2019)\]]*\s+"),
+    "sentence": re.compile(r"[.!?…]+[\"'\u201d\u2019)\]]*\s+"),
+}
+
+
+class TextChunker:
+    """
+    Buffers the text deltas of a single response up to a chunk boundary.
+
+    Text is only released once it ends at a `boundary`, i.e. after whitespace
+    (`word`), clause punctuation (`clause`) or sentence punctuation
+    (`sentence`), each followed by whitespace. With `none`, every delta is
+    released as is. The first chunk of a response is released at the
+    `first_boundary` instead, so that audio generation can start as early as
+    possible. Forcing out buffered text after a timeout is up to the caller
+    (see `pending_since`).
+    """
+
+    def __init__(
+        self,
+        boundary: ChunkBoundary = "sentence",
+        first_boundary: ChunkBoundary | None = "clause",
+        max_delay_ms: int | None = 250,
+    ) -> None:
+        self.boundary = boundary
+        self.first_boundary = first_boundary or boundary
+        self.max_delay_ms = max_delay_ms
+        self.deltas = 0
+        self.chunks = 0
+        self.timeout_flushes = 0
+        self.started = perf_counter()
+        self.first_audio_latency: float | None = None
+        self.pending_since: float | None = None
+        self._buffer = ""
+
+    @classmethod
+    def from_settings(cls) -> Self:
+        settings = Settings()
+        return cls(
+            boundary=settings.elevenlabs.chunking.boundary,
+            first_boundary=settings.elevenlabs.chunking.first_boundary,
+            max_delay_ms=settings.elevenlabs.chunking.max_delay_ms,
+        )
+
+    @property
+    def is_first_chunk(self) -> bool:
+        return self.chunks == 0
+
+    def feed(self, delta: str) -> str | None:
+        """Adds a delta and returns the text up to the last boundary, if any."""
+        self.deltas += 1
+        self._buffer += delta
+        boundary = self.first_boundary if self.is_first_chunk else self.boundary
+        if boundary == "none":
+            return self.flush()
+        end = None
+        for match in _BOUNDARY_PATTERNS[boundary].finditer(self._buffer):
+            end = match.end()
+        if end is None:
+            if self._buffer and self.pending_since is None:
+                self.pending_since = perf_counter()
+            return None
+        chunk, self._buffer = self._buffer[:end], self._buffer[end:]
+        self.pending_since = perf_counter() if self._buffer else None
+        self.chunks += 1
+        return chunk
+
+    def flush(self) -> str | None:
+        """Returns all buffered text, regardless of any boundary."""
+        chunk, self._buffer = self._buffer, ""
+        self.pending_since = None
+        if not chunk:
+            return None
+        self.chunks += 1
+        return chunk
+
+    def audio_received(self) -> None:
+        if self.first_audio_latency is None:
+            self.first_audio_latency = perf_counter() - self.started
+
+    def log_stats(self, context_id: str) -> None:
+        first_audio = "no audio"
+        if self.first_audio_latency is not None:
+            first_audio = f"first audio after {self.first_audio_latency * 1000:.0f} ms"
+        log.debug(
+            f"Elevenlabs context {context_id}: {self.deltas} text deltas sent "
+            f"as {self.chunks} messages ({self.timeout_flushes} after timeout), "
+            f"{first_audio}"
+        )
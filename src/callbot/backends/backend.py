@@ -24,6 +24,7 @@ class Backend(ABC):
 
     _contact_info: Contact | None
     _contact_info_ready: Event
+    _session_initialized: bool
 
     @classmethod
     def load_backends(cls):
@@ -55,6 +56,7 @@ class Backend(ABC):
     def __init__(self):
         self._contact_info = None
         self._contact_info_ready = Event()
+        self._session_initialized = False
 
     @property
     def contact_info(self) -> Contact | None:
@@ -90,11 +92,28 @@ class Backend(ABC):
         This method exists due to the assumption that this step needs to be done
         with a coroutine and thus the `__init__` method will not suffice.
 
-        The very first thing the `CallManager.run` method does, is await this.
+        Should not be called directly; use `start_session` instead.
         """
         # TODO: Maybe we can just use `__aenter__` instead?
         pass
 
+    async def start_session(self) -> None:
+        """
+        Calls `init_session`, unless that has already been done.
+
+        The very first thing the `CallManager.run` method does, is await this.
+        Backends taken from the `BackendPool` already have their session
+        initialized, so that step is skipped for them.
+        """
+        if self._session_initialized:
+            return
+        await self.init_session()
+        self._session_initialized = True
+
+    def is_alive(self) -> bool:
+        """Returns `False`, if the backend can no longer be used for a call."""
+        return True
+
     @abstractmethod
     async def listen(self, call_manager: CallManager) -> None:
         ...
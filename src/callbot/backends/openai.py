@@ -1,19 +1,23 @@
 from __future__ import annotations
 
 from asyncio import create_task, gather, CancelledError
-from string import Template
+from time import perf_counter
 from types import TracebackType
-from typing import Self, TYPE_CHECKING
+from typing import Any, ClassVar, Self, TYPE_CHECKING
 
 from loguru import logger as log
 from pydantic import ValidationError
+from pydantic_core import from_json
 # TODO: Migrate to httpx-ws
 from websockets.asyncio.client import ClientConnection, connect
+from websockets.protocol import State
 
 from callbot.backends import Backend
 from callbot.exceptions import EndCall, CallManagerException, FunctionEndCall
 from callbot.functions import Function
 from callbot.hooks import BeforeFunctionCallHook, AfterFunctionCallHook
+from callbot.metrics import MetricsRegistry, websocket_messages
+from callbot.runtime import RuntimeSnapshot
 from callbot.schemas.openai_rt.client_events import (  # type: ignore[attr-defined]
     ConversationItemCreateEvent,
     ConversationItemTruncateEvent,
@@ -27,25 +31,59 @@ from callbot.schemas.openai_rt.server_events import (  # type: ignore[attr-defin
     ErrorEvent,
     InputAudioBufferCommittedEvent,
     InputAudioBufferSpeechStartedEvent,
+    InputAudioBufferSpeechStoppedEvent,
     ResponseAudioDeltaEvent,
     ResponseAudioDoneEvent,
     ResponseContentPartAddedEvent,
     ResponseContentPartDoneEvent,
+    ResponseCreatedEvent,
     ResponseDoneEvent,
+    SERVER_EVENT_TYPES,
     ServerEvent,
+    get_event_type,
 )
-from callbot.settings import Settings
 
 if TYPE_CHECKING:
     from callbot.call_manager import CallManager
 
 
+_messages = websocket_messages()
+_audio_appended = _messages.labels(
+    "openai", "out", get_event_type(InputAudioBufferAppendEvent)
+)
+_audio_delta_received = _messages.labels(
+    "openai", "in", get_event_type(ResponseAudioDeltaEvent)
+)
+_function_call_seconds = MetricsRegistry().histogram(
+    "callbot_function_call_duration_seconds",
+    "Duration of function calls requested by the model.",
+    label_names=("function", ),
+)
+
+
 class OpenAIBackend(Backend):
     """
     Reference implementation of a conversation backend powered by OpenAI.
 
     Uses the OpenAI Realtime API for direct speech-to-speech conversation.
     """
+    # Known event types, which are neither handled in `_handle_event` nor
+    # configured to be logged, are skipped without validation.
+    handled_event_types: ClassVar[frozenset[str]] = frozenset(
+        get_event_type(event_cls) for event_cls in (
+            ConversationItemInputAudioTranscriptionCompletedEvent,
+            ErrorEvent,
+            InputAudioBufferCommittedEvent,
+            InputAudioBufferSpeechStartedEvent,
+            InputAudioBufferSpeechStoppedEvent,
+            ResponseAudioDeltaEvent,
+            ResponseAudioDoneEvent,
+            ResponseContentPartAddedEvent,
+            ResponseContentPartDoneEvent,
+            ResponseCreatedEvent,
+            ResponseDoneEvent,
+        )
+    )
 
     _openai_websocket: connect
     _openai_connection: ClientConnection
@@ -55,10 +93,10 @@ class OpenAIBackend(Backend):
 
     def __init__(self):
         super().__init__()
-        settings = Settings()
+        snapshot = RuntimeSnapshot.current()
         self._openai_websocket = connect(
-            uri=settings.openai.realtime_stream_url,
-            additional_headers=settings.openai.get_realtime_auth_headers(),
+            uri=snapshot.openai_stream_url,
+            additional_headers=snapshot.openai_auth_headers,
         )
         self._last_response_item = None
         self._response_start_timestamp = None
@@ -76,41 +114,68 @@ class OpenAIBackend(Backend):
     ) -> None:
         await self._openai_connection.__aexit__(exc_type, exc_val, exc_tb)
 
+    def is_alive(self) -> bool:
+        return self._openai_connection.state is State.OPEN
+
     async def init_session(self) -> None:
         """
         Sends a `SessionUpdateEvent` message to the OpenAI websocket.
 
         The session instructions, temperature, voice, etc. are taken from the
-        global settings object.
+        global settings object, serialized once by the `RuntimeSnapshot`.
         """
-        session_update = SessionUpdateEvent(
-            session=Settings().openai.session
-        )
         log.debug("Updating OpenAI session")
-        await self._openai_connection.send(
-            session_update.model_dump_json(exclude_none=True)
+        await self._send_event(
+            RuntimeSnapshot.current().session_update_json,
+            get_event_type(SessionUpdateEvent),
         )
 
     async def listen(self, call_manager: CallManager) -> None:
         """
         Handles messages sent over the OpenAI websocket from their Realtime API.
 
-        Each message is parsed via the Pydantic `ServerEvent` model union. See
-        `handle_openai_event` for details on how each type of message is
-        handled.
+        The `type` of each message is read first. Audio deltas are handled
+        directly, known event types that are neither handled nor logged are
+        skipped, and everything else is parsed via the Pydantic `ServerEvent`
+        model union. See `_handle_event` for details on how each type of
+        message is handled.
         """
-        settings = Settings()
+        snapshot = RuntimeSnapshot.current()
+        log_event_types = snapshot.log_event_types
+        skipped_event_types = snapshot.skipped_event_types(
+            self.handled_event_types,
+            SERVER_EVENT_TYPES,
+        )
+        audio_delta_type = get_event_type(ResponseAudioDeltaEvent)
+        fast_audio_delta = audio_delta_type not in log_event_types
         start_conversation_task = create_task(self._start_conversation())
         try:
             async for text in self._openai_connection:
                 assert isinstance(text, str)
+                data = self._peek_event(text)
+                event_type = data.get("type")
+                if event_type == audio_delta_type:
+                    _audio_delta_received.inc()
+                else:
+                    _messages.labels("openai", "in", str(event_type)).inc()
+                if event_type == audio_delta_type and fast_audio_delta:
+                    delta, item_id = data.get("delta"), data.get("item_id")
+                    if isinstance(delta, str) and isinstance(item_id, str):
+                        await self._handle_audio_delta(
+                            delta,
+                            item_id,
+                            call_manager,
+                        )
+                        continue
+                elif event_type in skipped_event_types:
+                    continue
                 try:
                     event = ServerEvent.validate_json(text)
                 except ValidationError as exc:
                     log.error(f"OpenAI event unknown: {text}")
                     log.debug(f"OpenAI validation error: {exc.json()}")
                     return
-                if event.type in settings.openai.log_event_types:
+                if event.type in log_event_types:
                     serialized = event.model_dump_json(exclude_defaults=True)
                     log.debug(f"OpenAI event: {serialized}")
                 await self._handle_event(event, call_manager)
@@ -124,6 +189,15 @@ class OpenAIBackend(Backend):
             await start_conversation_task
             log.debug("OpenAIBackend.listen end")
 
+    @staticmethod
+    def _peek_event(text: str) -> dict[str, Any]:
+        """Parses the raw JSON of an event without any validation."""
+        try:
+            data = from_json(text)
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
     async def _start_conversation(self) -> None:
         """
         Prompts the model to start the conversation.
@@ -132,10 +206,9 @@ class OpenAIBackend(Backend):
         `ConversationItemCreateEvent` containing that user prompt, followed by
         a `ResponseCreateEvent`.
         """
-        settings = Settings()
-        if not (init_prompt := settings.openai.get_init_conversation_prompt()):
+        template = RuntimeSnapshot.current().init_conversation_template
+        if template is None:
             return
-        template = Template(init_prompt)
         contact = await self.get_contact_info_when_ready()
         prompt = template.safe_substitute(contact.model_dump())
         event = ConversationItemCreateEvent.with_user_prompt(prompt)
@@ -149,9 +222,10 @@ class OpenAIBackend(Backend):
         """Sends the specified `event` followed by a `ResponseCreateEvent`."""
         serialized = event.model_dump_json(exclude_none=True)
         log.debug(f"Creating OpenAI conversation item: {serialized}")
-        await self._openai_connection.send(serialized)
-        await self._openai_connection.send(
-            ResponseCreateEvent().default_json()
+        await self._send_event(serialized, event.type)
+        await self._send_event(
+            ResponseCreateEvent().default_json(),
+            get_event_type(ResponseCreateEvent),
         )
 
     async def _handle_event(
@@ -159,7 +233,7 @@ class OpenAIBackend(Backend):
         event: AnyServerEvent,
         call_manager: CallManager,
     ) -> None:
-        settings = Settings()
+        transcript_enabled = RuntimeSnapshot.current().transcript
         match event:
             case ErrorEvent():
                 error = event.error.model_dump_json(exclude_none=True)
@@ -176,7 +250,7 @@ class OpenAIBackend(Backend):
                 else:
                     transcript = f'Callbot: "{event.part.text}"'
                 self._transcript[event.item_id] = transcript
-                if settings.logging.transcript:
+                if transcript_enabled:
                     log.info(transcript)
             case InputAudioBufferCommittedEvent():
                 # Reserve a spot in the transcript log.
@@ -187,14 +261,14 @@ class OpenAIBackend(Backend):
                 else:
                     transcript = f'Contact: "{event.transcript}"'
                     self._transcript[event.item_id] = transcript
-                    if settings.logging.transcript:
+                    if transcript_enabled:
                         log.info(transcript)
             case ResponseAudioDeltaEvent():
-                await call_manager.send_media(event.delta)
-                if self._response_start_timestamp is None:
-                    self._response_start_timestamp = call_manager.latest_media_timestamp
-                self._last_response_item = event.item_id
-                await call_manager.send_response_part_mark()
+                await self._handle_audio_delta(
+                    event.delta,
+                    event.item_id,
+                    call_manager,
+                )
             case ResponseAudioDoneEvent():
                 # We want to be notified by Twilio, when the last part of the
                 # bot's audio response has been played.
@@ -206,11 +280,27 @@ class OpenAIBackend(Backend):
                 # side is speaking.
                 call_manager.conversation_ongoing.set()
                 await self._handle_speech_started(call_manager)
+            case InputAudioBufferSpeechStoppedEvent():
+                call_manager.latency.record("speech_stopped")
+            case ResponseCreatedEvent():
+                call_manager.latency.record("response_created")
             case ResponseDoneEvent():
                 if not (function := Function.from_response(event.response)):
                     return
                 await self._handle_function_call(function, call_manager)
 
+    async def _handle_audio_delta(
+        self,
+        delta: str,
+        item_id: str,
+        call_manager: CallManager,
+    ) -> None:
+        await call_manager.send_media(delta)
+        if self._response_start_timestamp is None:
+            self._response_start_timestamp = call_manager.latest_media_timestamp
+        self._last_response_item = item_id
+        await call_manager.send_response_part_mark()
+
     async def _handle_speech_started(self, call_manager: CallManager) -> None:
         if not call_manager.mark_queue or self._response_start_timestamp is None:
             return
@@ -224,22 +314,28 @@ class OpenAIBackend(Backend):
                 item_id=self._last_response_item,
                 content_index=0,
                 audio_end_ms=elapsed_time,
-            ).model_dump_json(exclude_none=True)
-            await self._openai_connection.send(conversation_item_trunc)
+            )
+            await self._send_event(
+                conversation_item_trunc.model_dump_json(exclude_none=True),
+                conversation_item_trunc.type,
+            )
         await call_manager.clear_marks()
         self._last_response_item = None
         self._response_start_timestamp = None
 
     async def _handle_function_call(
         self,
-        function: Function,
+        function: Function[Any],
         call_manager: CallManager,
     ) -> None:
         await BeforeFunctionCallHook(function, call_manager).dispatch()
         response_create = ResponseCreateEvent().default_json()
         exc, _ = await gather(
-            function(call_manager),
-            self._openai_connection.send(response_create),
+            self._timed_function_call(function, call_manager),
+            self._send_event(
+                response_create,
+                get_event_type(ResponseCreateEvent),
+            ),
             return_exceptions=True,
         )
         await AfterFunctionCallHook(function, call_manager, exc).dispatch()
@@ -251,10 +347,28 @@ class OpenAIBackend(Backend):
             case Exception():
                 log.warning(f"Error in '{function.get_name()}': {exc}")
 
+    @staticmethod
+    async def _timed_function_call(
+        function: Function[Any],
+        call_manager: CallManager,
+    ) -> None:
+        start = perf_counter()
+        try:
+            await function(call_manager)
+        finally:
+            _function_call_seconds.labels(function.get_name()).observe(
+                perf_counter() - start
+            )
+
+    async def _send_event(self, serialized: str, event_type: str) -> None:
+        _messages.labels("openai", "out", event_type).inc()
+        await self._openai_connection.send(serialized)
+
     async def send_audio(self, payload: str) -> None:
         audio_append = InputAudioBufferAppendEvent(
             audio=payload,
         ).model_dump_json(exclude_none=True)
+        _audio_appended.inc()
         await self._openai_connection.send(audio_append)
 
     async def send_text(self, payload: str) -> None:
@@ -2,14 +2,20 @@
 
 from __future__ import annotations
 
-from asyncio import TaskGroup
+from asyncio import Task, TaskGroup, create_task, current_task, sleep
+from time import perf_counter
 from types import TracebackType
-from typing import Self, TYPE_CHECKING
+from typing import ClassVar, Self, TYPE_CHECKING
 
 from loguru import logger as log
 
-from callbot.backends._elevenlabs import Elevenlabs
+from callbot.backends._elevenlabs_shared import (
+    ElevenlabsConnections,
+    ElevenlabsSession,
+)
+from callbot.backends._text_chunker import TextChunker
 from callbot.backends.openai import OpenAIBackend
+from callbot.runtime import RuntimeSnapshot
 from callbot.schemas.elevenlabs.receive import (
     AnyReceiveMessage,
     AudioOutputMulti,
@@ -19,19 +25,35 @@ from callbot.schemas.openai_rt.server_events import (
     AnyServerEvent,
     ResponseTextDeltaEvent,
     ResponseTextDoneEvent,
+    get_event_type,
 )
-from callbot.settings import Settings
 
 if TYPE_CHECKING:
     from callbot.call_manager import CallManager
 
 
 class OpenAIElevenLabsBackend(OpenAIBackend):
-    _elevenlabs: Elevenlabs
+    handled_event_types: ClassVar[frozenset[str]] = (
+        OpenAIBackend.handled_event_types | frozenset(
+            get_event_type(event_cls) for event_cls in (
+                ResponseTextDeltaEvent,
+                ResponseTextDoneEvent,
+            )
+        )
+    )
+
+    _elevenlabs: ElevenlabsSession
+    _chunkers: dict[str, TextChunker]
+    _flush_timers: dict[str, Task[None]]
+    # Flush timers, which are sending a chunk they have taken from a chunker.
+    _sending_timers: set[Task[None]]
 
     async def __aenter__(self) -> Self:
         await super().__aenter__()
-        self._elevenlabs = await Elevenlabs().__aenter__()
+        self._elevenlabs = ElevenlabsConnections().session()
+        self._chunkers = {}
+        self._flush_timers = {}
+        self._sending_timers = set()
         return self
 
     async def __aexit__[E: BaseException](
@@ -40,9 +62,14 @@ class OpenAIElevenLabsBackend(OpenAIBackend):
         exc_val: E | None,
         exc_tb: TracebackType | None,
     ) -> None:
-        await self._elevenlabs.__aexit__(exc_type, exc_val, exc_tb)
+        for timer in self._flush_timers.values():
+            timer.cancel()
+        await self._elevenlabs.close()
         await super().__aexit__(exc_type, exc_val, exc_tb)
 
+    def is_alive(self) -> bool:
+        return super().is_alive() and self._elevenlabs.is_alive()
+
     async def listen(self, call_manager: CallManager) -> None:
         try:
             async with TaskGroup() as task_group:
@@ -66,6 +93,8 @@ class OpenAIElevenLabsBackend(OpenAIBackend):
                     f"Received Elevenlabs audio for context: "
                     f"{message.context_id}"
                 )
+                if chunker := self._chunkers.get(message.context_id or ""):
+                    chunker.audio_received()
                 await call_manager.send_media(message.audio)
                 if self._response_start_timestamp is None:
                     self._response_start_timestamp = call_manager.latest_media_timestamp
@@ -78,22 +107,20 @@ class OpenAIElevenLabsBackend(OpenAIBackend):
                 # We want to be notified by Twilio, when the last part of the
                 # bot's audio response has been played.
                 await call_manager.send_response_done_mark()
+                self._discard_chunker(message.context_id or "")
 
     async def _handle_event(
         self,
         event: AnyServerEvent,
         call_manager: CallManager,
     ) -> None:
-        settings = Settings()
-        assert settings.openai.session.modalities == ("text", )
+        assert RuntimeSnapshot.current().modalities == ("text", )
         match event:
             case ResponseTextDeltaEvent():
                 self._last_response_item = event.item_id
-                await self._elevenlabs.send_text(
-                    event.delta,
-                    context_id=event.item_id,
-                )
+                await self._send_text_delta(event.delta, event.item_id)
             case ResponseTextDoneEvent():
+                await self._flush_chunker(event.item_id)
                 await self._elevenlabs.flush_context(event.item_id)
                 await self._elevenlabs.close_context(event.item_id)
             case _:
@@ -106,6 +133,95 @@ class OpenAIElevenLabsBackend(OpenAIBackend):
         if self._last_response_item:
             log.debug(f"Interrupting response: {self._last_response_item}")
             await self._elevenlabs.close_context(self._last_response_item)
+            self._discard_chunker(self._last_response_item)
         await call_manager.clear_marks()
         self._last_response_item = None
         self._response_start_timestamp = None
+
+    async def _send_text_delta(self, delta: str, context_id: str) -> None:
+        if (chunker := self._chunkers.get(context_id)) is None:
+            chunker = self._chunkers[context_id] = TextChunker.from_settings()
+        if (chunk := chunker.feed(delta)) is not None:
+            await self._send_text_chunk(chunk, context_id, chunker)
+        if (
+            chunker.pending_since is not None
+            and chunker.max_delay_ms is not None
+            and context_id not in self._flush_timers
+        ):
+            timer = create_task(self._flush_after_delay(context_id, chunker))
+            self._flush_timers[context_id] = timer
+            timer.add_done_callback(
+                lambda task: self._forget_flush_timer(context_id, task)
+            )
+
+    async def _send_text_chunk(
+        self,
+        chunk: str,
+        context_id: str,
+        chunker: TextChunker,
+    ) -> None:
+        await self._elevenlabs.send_text(chunk, context_id=context_id)
+        # Don't wait for Elevenlabs to buffer enough text for the first chunk.
+        if chunker.chunks == 1 and chunker.first_boundary != "none":
+            await self._elevenlabs.flush_context(context_id)
+
+    async def _flush_after_delay(
+        self,
+        context_id: str,
+        chunker: TextChunker,
+    ) -> None:
+        assert chunker.max_delay_ms is not None
+        timer = current_task()
+        assert timer is not None
+        delay = chunker.max_delay_ms / 1000
+        try:
+            while chunker.pending_since is not None:
+                remaining = chunker.pending_since + delay - perf_counter()
+                if remaining > 0:
+                    await sleep(remaining)
+                    continue
+                if (chunk := chunker.flush()) is not None:
+                    chunker.timeout_flushes += 1
+                    self._sending_timers.add(timer)
+                    try:
+                        await self._send_text_chunk(chunk, context_id, chunker)
+                    finally:
+                        self._sending_timers.discard(timer)
+                # Stopped while sending, see `_stop_flush_timer`.
+                if self._flush_timers.get(context_id) is not timer:
+                    return
+        except Exception as e:
+            log.warning(f"Failed to flush text for context {context_id}: {e}")
+
+    def _forget_flush_timer(self, context_id: str, timer: Task[None]) -> None:
+        # A cancelled timer may finish after a newer one has been started.
+        if self._flush_timers.get(context_id) is timer:
+            del self._flush_timers[context_id]
+
+    def _stop_flush_timer(self, context_id: str) -> Task[None] | None:
+        """
+        Stops the flush timer of the context.
+
+        A timer, which is sending a chunk, is not cancelled, since the chunk
+        would be lost; it stops by itself after the chunk has been sent and
+        is returned, so that the caller may wait for it.
+        """
+        if (timer := self._flush_timers.pop(context_id, None)) is None:
+            return None
+        if timer in self._sending_timers:
+            return timer
+        timer.cancel()
+        return None
+
+    async def _flush_chunker(self, context_id: str) -> None:
+        if (timer := self._stop_flush_timer(context_id)) is not None:
+            # The remaining text must not overtake the chunk being sent.
+            await timer
+        chunker = self._chunkers.get(context_id)
+        if chunker is not None and (chunk := chunker.flush()) is not None:
+            await self._send_text_chunk(chunk, context_id, chunker)
+
+    def _discard_chunker(self, context_id: str) -> None:
+        self._stop_flush_timer(context_id)
+        if (chunker := self._chunkers.pop(context_id, None)) is not None:
+            chunker.log_stats(context_id)
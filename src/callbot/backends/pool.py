@@ -0,0 +1,205 @@
+from asyncio import (
+    CancelledError,
+    Event,
+    Task,
+    create_task,
+    current_task,
+    gather,
+    sleep,
+    timeout,
+)
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack, asynccontextmanager, suppress
+from time import monotonic, perf_counter
+
+from loguru import logger as log
+
+from callbot.backends.backend import Backend
+from callbot.metrics import MetricsRegistry
+from callbot.misc.singleton import Singleton
+from callbot.settings import Settings
+
+
+_registry = MetricsRegistry()
+_checkouts = _registry.counter(
+    "callbot_backend_pool_checkouts_total",
+    "Backends checked out for calls by whether one was ready in the pool.",
+    label_names=("result", ),
+)
+_checkout_seconds = _registry.histogram(
+    "callbot_backend_pool_checkout_duration_seconds",
+    "Time taken to provide a backend for a call, including opening it.",
+).labels()
+_registry.gauge(
+    "callbot_backend_pool_ready",
+    "Number of backends ready in the pool.",
+    function=lambda: BackendPool().ready,
+)
+
+
+class BackendPool(metaclass=Singleton):
+    """
+    Keeps a number of connected backends with initialized sessions ready.
+
+    Calls check out a backend via `checkout`. If none is ready, a new one is
+    opened on the spot (a pool miss), just like without the pool. While the
+    pool is running, a background task replaces checked out backends and
+    recycles those that have waited for too long or are no longer alive.
+    """
+    _idle: deque[tuple[float, Backend]]
+    _refill: Event
+    _task: Task[None] | None
+    _closing: set[Task[None]]
+
+    def __init__(self) -> None:
+        settings = Settings()
+        self.size = settings.backend_pool.size
+        self.max_idle_seconds = settings.backend_pool.max_idle_seconds
+        self.retry_delay_seconds = settings.backend_pool.retry_delay_seconds
+        self.hits = 0
+        self.misses = 0
+        self.checkout_seconds_total = 0.
+        self.checkout_seconds_max = 0.
+        self._idle = deque()
+        self._refill = Event()
+        self._task = None
+        self._closing = set()
+
+    @property
+    def ready(self) -> int:
+        return len(self._idle)
+
+    def start(self) -> None:
+        if self.size and self._task is None:
+            log.info(f"Starting backend pool of size {self.size}")
+            self._task = create_task(self._maintain())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except CancelledError:
+                # Only the cancellation of the maintenance task is expected.
+                if (task := current_task()) and task.cancelling():
+                    raise
+            except Exception as e:
+                log.warning(f"Backend pool maintenance failed: {e}")
+            self._task = None
+        while self._idle:
+            _, backend = self._idle.popleft()
+            await self._close(backend)
+
+    @asynccontextmanager
+    async def checkout(self) -> AsyncIterator[Backend]:
+        """Provides a backend for a single call and closes it afterwards."""
+        start = perf_counter()
+        backend = self._pop_idle()
+        if backend is None:
+            self.misses += 1
+            _checkouts.labels("miss").inc()
+            backend = await self._open()
+        else:
+            self.hits += 1
+            _checkouts.labels("hit").inc()
+            self._refill.set()
+        elapsed = perf_counter() - start
+        _checkout_seconds.observe(elapsed)
+        self.checkout_seconds_total += elapsed
+        self.checkout_seconds_max = max(self.checkout_seconds_max, elapsed)
+        async with AsyncExitStack() as stack:
+            stack.push_async_exit(backend)
+            yield backend
+
+    def recycle(self) -> None:
+        """Replaces all ready backends, e.g. after the session has changed."""
+        while self._idle:
+            _, backend = self._idle.popleft()
+            self._close_in_background(backend)
+        self._refill.set()
+
+    def log_stats(self) -> None:
+        checkouts = self.hits + self.misses
+        if not checkouts:
+            return
+        avg_ms = self.checkout_seconds_total / checkouts * 1000
+        log.debug(
+            f"Backend pool: {self.hits} hits, {self.misses} misses, "
+            f"{avg_ms:.1f} ms average checkout time, "
+            f"{self.checkout_seconds_max * 1000:.1f} ms maximum"
+        )
+
+    def _pop_idle(self) -> Backend | None:
+        while self._idle:
+            created, backend = self._idle.popleft()
+            if self._is_stale(created, backend):
+                self._close_in_background(backend)
+                continue
+            return backend
+        return None
+
+    def _is_stale(self, created: float, backend: Backend) -> bool:
+        if monotonic() - created > self.max_idle_seconds:
+            return True
+        return not backend.is_alive()
+
+    async def _maintain(self) -> None:
+        while True:
+            self._recycle_stale()
+            missing = self.size - len(self._idle)
+            if missing > 0:
+                results = await gather(
+                    *(self._open() for _ in range(missing)),
+                    return_exceptions=True,
+                )
+                for result in results:
+                    if isinstance(result, Backend):
+                        self._idle.append((monotonic(), result))
+                    else:
+                        log.warning(f"Failed to open pooled backend: {result}")
+                if len(self._idle) < self.size:
+                    await sleep(self.retry_delay_seconds)
+                    continue
+            self._refill.clear()
+            # Wake up at least often enough to notice stale sessions in time.
+            with suppress(TimeoutError):
+                async with timeout(self.max_idle_seconds / 2):
+                    await self._refill.wait()
+
+    def _recycle_stale(self) -> None:
+        fresh: deque[tuple[float, Backend]] = deque()
+        for created, backend in self._idle:
+            if self._is_stale(created, backend):
+                log.debug("Recycling stale pooled backend")
+                self._close_in_background(backend)
+            else:
+                fresh.append((created, backend))
+        self._idle = fresh
+
+    @staticmethod
+    async def _open() -> Backend:
+        settings = Settings()
+        backend_cls = Backend.get(settings.backend)
+        if backend_cls is None:
+            raise RuntimeError(f"Backend '{settings.backend}' not available!")
+        log.debug(f"Using '{settings.backend}' backend")
+        backend = await backend_cls().__aenter__()
+        try:
+            await backend.start_session()
+        except BaseException:
+            await BackendPool._close(backend)
+            raise
+        return backend
+
+    def _close_in_background(self, backend: Backend) -> None:
+        task = create_task(self._close(backend))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close(backend: Backend) -> None:
+        try:
+            await backend.__aexit__(None, None, None)
+        except Exception as e:
+            log.debug(f"Error closing pooled backend: {e}")
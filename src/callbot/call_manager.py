@@ -1,13 +1,18 @@
-from asyncio import Event, Queue, TaskGroup, gather, sleep, timeout
+from asyncio import Queue, TaskGroup, to_thread
+from collections.abc import Callable
 from dataclasses import dataclass, field
-from typing import ClassVar, Self, cast
+from time import monotonic
+from typing import ClassVar, Self
 
 from fastapi import WebSocket, WebSocketDisconnect, WebSocketException, status
 from loguru import logger as log
 from pydantic import ValidationError
 
+from callbot.audio_pump import AudioPump
 from callbot.auth.jwt import JWT
 from callbot.backends import Backend
+from callbot.call_registry import CallRegistry
+from callbot.deadlines import Deadline, DeadlineScheduler
 from callbot.exceptions import (
     AnsweringMachineDetected,
     AuthException,
@@ -16,7 +21,9 @@ from callbot.exceptions import (
     EndCall,
     EndCallError,
     EndCallInfo,
+    MaxCallDurationReached,
     SpeechStartTimeout,
+    TwilioIdleTimeout,
     TwilioStop,
     TwilioWebsocketDisconnect,
 )
@@ -24,9 +31,14 @@ from callbot.hooks import (
     AfterCallEndHook,
     AfterCallStartHook,
 )
+from callbot.latency import LatencyTimeline
+from callbot.loop_monitor import current_call
+from callbot.metrics import MetricsRegistry, websocket_messages
+from callbot.misc.observed_event import ObservedEvent
 from callbot.schemas.amd_status import AMDStatus
 from callbot.schemas.contact import Contact
-from callbot.schemas.twilio_websocket_messages.inbound import (  # type: ignore[attr-defined]
+from callbot.schemas.twilio_websocket_messages.inbound import (
+    AnyInboundConversationRelayMessage,
     Connected as TwilioInboundConnected,
     Error as TwilioInboundError,
     Interrupt as TwilioInboundInterrupt,
@@ -37,14 +49,109 @@ from callbot.schemas.twilio_websocket_messages.inbound import (  # type: ignore[
     Setup as TwilioInboundSetup,
     Start as TwilioInboundStart,
     Stop as TwilioInboundStop,
+    parse_media_frame,
 )
-from callbot.schemas.twilio_websocket_messages.outbound import (  # type: ignore[attr-defined]
-    Clear as TwilioOutboundClear,
-    Mark as TwilioOutboundMark,
-    Media as TwilioOutboundMedia,
+from callbot.schemas.twilio_websocket_messages.outbound import (
     TextTokens as TwilioOutboundTextTokens,
 )
 from callbot.settings import Settings
+from callbot.twilio_writer import TwilioWriter
+
+
+_twilio_received = websocket_messages()
+_twilio_media_received = _twilio_received.labels("twilio", "in", "media")
+_calls_started = MetricsRegistry().counter(
+    "callbot_calls_started_total",
+    "Number of calls, whose stream has been connected.",
+).labels()
+_calls_ended = MetricsRegistry().counter(
+    "callbot_calls_ended_total",
+    "Number of ended calls by the exception that ended them.",
+    label_names=("reason", ),
+)
+MetricsRegistry().gauge(
+    "callbot_active_calls",
+    "Number of calls currently in progress.",
+    function=lambda: len(CallManager._active_instances),
+)
+MetricsRegistry().gauge(
+    "callbot_queued_messages",
+    "Messages waiting in the queues of all active calls.",
+    label_names=("queue", ),
+    function=lambda: {
+        ("twilio_outbound", ): sum(
+            call.twilio_writer.queue_depth
+            for call in CallManager._active_instances.values()
+        ),
+        ("backend_inbound_audio", ): sum(
+            call.audio_pump.buffered_frames
+            for call in CallManager._active_instances.values()
+        ),
+    },
+)
+
+# Number of seconds before the Twilio idle deadline, within which a check
+# ends the call, rather than re-arming the deadline for the remainder.
+TWILIO_IDLE_TOLERANCE = .001
+
+
+def ulaw_duration_ms(payload: str) -> float:
+    """Returns the duration of base64 encoded 8 kHz µ-law audio."""
+    num_bytes = len(payload) * 3 // 4 - payload.count("=", -2)
+    return num_bytes / 8
+
+
+@dataclass
+class ResponsePartMarks:
+    """
+    Decides after which audio chunks a `responsePart` mark is sent to Twilio.
+
+    The first chunk of every response is always followed by a mark. After that,
+    a mark is only due once the configured number of chunks or milliseconds of
+    audio have been sent since the previous mark.
+    """
+    interval_deltas: int | None = None
+    interval_ms: int | None = None
+    deltas_total: int = 0
+    marks_total: int = 0
+    _deltas: int = 0
+    _audio_ms: float = 0.
+    _response_marked: bool = False
+
+    @classmethod
+    def from_settings(cls) -> Self:
+        settings = Settings()
+        return cls(
+            interval_deltas=settings.stream.mark_interval_deltas,
+            interval_ms=settings.stream.mark_interval_ms,
+        )
+
+    def audio_sent(self, payload: str) -> None:
+        self.deltas_total += 1
+        self._deltas += 1
+        if self.interval_ms is not None:
+            self._audio_ms += ulaw_duration_ms(payload)
+
+    def mark_due(self) -> bool:
+        if self._response_marked and not self._interval_reached():
+            return False
+        self.marks_total += 1
+        self._deltas, self._audio_ms = 0, 0.
+        self._response_marked = True
+        return True
+
+    def _interval_reached(self) -> bool:
+        if self.interval_deltas is not None:
+            if self._deltas >= self.interval_deltas:
+                return True
+        if self.interval_ms is not None:
+            return self._audio_ms >= self.interval_ms
+        return False
+
+    def reset(self) -> None:
+        """Should be called, whenever a response is done or interrupted."""
+        self._deltas, self._audio_ms = 0, 0.
+        self._response_marked = False
 
 
 @dataclass
@@ -55,15 +162,35 @@ class CallManager:
     twilio_websocket: WebSocket
     stream_sid: str = ""
     call_sid: str = ""
-    conversation_ongoing: Event = field(default_factory=Event, init=False)
+    conversation_ongoing: ObservedEvent = field(
+        default_factory=ObservedEvent,
+        init=False,
+    )
     latest_media_timestamp: int = 0
     mark_queue: list[str] = field(default_factory=list)
     transcript: dict[str, str] = field(default_factory=dict)
+    latency: LatencyTimeline = field(default_factory=LatencyTimeline, init=False)
 
     _abort_exception: Queue[CallbotException] = field(
         default_factory=lambda: Queue(maxsize=1),
         init=False,
     )
+    audio_pump: AudioPump = field(init=False)
+    twilio_writer: TwilioWriter = field(init=False)
+    _response_part_marks: ResponsePartMarks = field(
+        default_factory=ResponsePartMarks.from_settings,
+        init=False,
+    )
+    _deadlines: dict[str, Deadline] | None = field(default=None, init=False)
+    _speech_start_timeout: float | None = field(default=None, init=False)
+    _twilio_idle_timeout: float | None = field(default=None, init=False)
+    _last_twilio_message: float = field(default_factory=monotonic, init=False)
+
+    def __post_init__(self) -> None:
+        self.audio_pump = AudioPump.from_settings(self.backend)
+        self.twilio_writer = TwilioWriter.from_settings(self.twilio_websocket)
+        self.twilio_writer.set_stream_sid(self.stream_sid)
+        self.conversation_ongoing.observe(self._conversation_ongoing_changed)
 
     @classmethod
     def get(cls, call_sid: str) -> Self | None:
@@ -76,21 +203,62 @@ class CallManager:
         If an initial conversation prompt is configured, the model is prompted
         to start the conversation.
         """
-        await self.backend.init_session()
+        current_call.set(self)
+        await self.backend.start_session()
+        _calls_started.inc()
         exceptions: ExceptionGroup | None = None
+        self._start_deadlines()
         try:
             async with TaskGroup() as task_group:
-                task_group.create_task(self.twilio_listen())
-                task_group.create_task(self.backend.listen(self))
-                task_group.create_task(self._timeout_loop())
-                task_group.create_task(self._abort_wait())
+                # Names identify the tasks in the loop monitor's warnings.
+                task_group.create_task(
+                    self.twilio_listen(),
+                    name="twilio_listen",
+                )
+                task_group.create_task(
+                    self.twilio_writer.run(),
+                    name="twilio_writer",
+                )
+                task_group.create_task(
+                    self.audio_pump.run(),
+                    name="audio_pump",
+                )
+                task_group.create_task(
+                    self.backend.listen(self),
+                    name="backend_listen",
+                )
+                task_group.create_task(
+                    self._abort_wait(),
+                    name="abort_wait",
+                )
         except* Exception as exc:
             exceptions = exc
             self._handle_run_exception(exc)
         finally:
-            await self.twilio_websocket.close()
-            await AfterCallEndHook(self, exceptions).dispatch()
-            self._active_instances.pop(self.call_sid, None)
+            try:
+                self._cancel_deadlines()
+                await self.twilio_websocket.close()
+                if self._active_instances.pop(self.call_sid, None) is not None:
+                    await CallRegistry.shared().unregister(self.call_sid)
+                _calls_ended.labels(self._end_reason(exceptions)).inc()
+                self._log_mark_stats()
+                self.latency.log()
+                self.twilio_writer.log_stats()
+                self.audio_pump.log_stats()
+            finally:
+                # Runs in the background by default, see `settings.hooks`.
+                await AfterCallEndHook(self, exceptions).dispatch()
+
+    @staticmethod
+    def _end_reason(exceptions: ExceptionGroup | None) -> str:
+        """Returns the name of the (first) exception, that ended the call."""
+        if exceptions is None:
+            return "none"
+        end_call_group, rest = exceptions.split(EndCall)
+        exception: BaseException | None = end_call_group or rest
+        while isinstance(exception, BaseExceptionGroup):
+            exception = exception.exceptions[0]
+        return exception.__class__.__name__
 
     @classmethod
     def _handle_run_exception(cls, exc: ExceptionGroup) -> None:
@@ -145,37 +313,57 @@ class CallManager:
             raise CallManagerException("twilio_listen", e) from e
 
     async def handle_twilio_message(self, text: str) -> None:
+        self._last_twilio_message = monotonic()
+        # Media messages make up the vast majority of the traffic, so we bypass
+        # the model validation for them. Everything else is fully validated.
+        if (media_frame := parse_media_frame(text)) is not None:
+            self.latest_media_timestamp, payload = media_frame
+            _twilio_media_received.inc()
+            self.audio_pump.put_nowait(payload)
+            return
         try:
             message = TwilioInboundMessage.validate_json(text)
         except ValidationError as validation_error:
             log.error(f"Twilio message type unknown: {text}")
             log.debug(f"Twilio validation error: {validation_error.json()}")
             return
+        # Media stream messages have an `event`, relay messages a `type`.
+        message_type: str
+        if isinstance(message, AnyInboundConversationRelayMessage):
+            message_type = message.type
+        else:
+            message_type = message.event
+        _twilio_received.labels("twilio", "in", message_type).inc()
         match message:
             case TwilioInboundConnected():
                 log.info(f"🔌 Connected to Twilio - {message}")
             case TwilioInboundStart():
                 # TODO: Validate account and maybe stream SID!
                 token = message.start.customParameters.get("token", "")
-                _jwt = JWT.decode_and_invalidate(token)
+                # Claiming the JTI may block, e.g. on a shared SQLite store.
+                _jwt = await to_thread(JWT.decode_and_invalidate, token)
                 log.info(f"🔐 Connection secure")
                 self.stream_sid = message.start.streamSid
+                self.twilio_writer.set_stream_sid(self.stream_sid)
                 self.call_sid = message.start.callSid
-                self._active_instances[self.call_sid] = self
+                await self._register()
                 self.backend.contact_info = Contact.model_validate(
                     message.start.customParameters
                 )
+                # Runs in the background by default, see `settings.hooks`.
                 await AfterCallStartHook(self).dispatch()
                 log.debug(f"Incoming stream has started {self.stream_sid}")
             case TwilioInboundMedia():
                 self.latest_media_timestamp = message.media.timestamp
-                await self.backend.send_audio(message.media.payload)
+                self.audio_pump.put_nowait(message.media.payload)
             case TwilioInboundMark():
+                self.latency.record("first_mark_ack")
                 # If the last part an audio response by the bot has been played,
                 # we clear the `conversation_ongoing` event. This means, the
                 # `speech_start_timeout` clock will start ticking.
                 if message.mark.name == "done":
                     log.debug("Bot has finished speaking")
+                    self.latency.record("done_mark_ack")
                     self.conversation_ongoing.clear()
                 # Conversely, if just a part of a response has been played,
                 # we keep the event set to ensure no timeout occurs, while the
@@ -192,13 +380,15 @@ class CallManager:
                 log.info(f"🔌 Connected to Twilio - {message}")
                 # TODO: Validate account and maybe stream SID!
                 token = message.custom_parameters.get("token", "")
-                _jwt = JWT.decode_and_invalidate(token)
+                # Claiming the JTI may block, e.g. on a shared SQLite store.
+                _jwt = await to_thread(JWT.decode_and_invalidate, token)
                 log.info(f"🔐 Connection secure")
                 self.call_sid = message.call_sid
-                self._active_instances[self.call_sid] = self
+                await self._register()
                 self.backend.contact_info = Contact.model_validate(
                     message.custom_parameters
                 )
+                # Runs in the background by default, see `settings.hooks`.
                 await AfterCallStartHook(self).dispatch()
                 log.debug(f"Call has started {self.call_sid}")
             case TwilioInboundError():
@@ -217,52 +407,148 @@ class CallManager:
     async def send_text(self, text_tokens: TwilioOutboundTextTokens) -> None:
         serialized = text_tokens.model_dump_json(exclude_none=True)
         log.debug(f"Sending text tokens to Twilio: {serialized}")
-        await self.twilio_websocket.send_text(serialized)
+        await self.twilio_writer.put("text", serialized)
 
     async def send_media(self, payload: str) -> None:
-        twilio_media = TwilioOutboundMedia.with_payload(
-            payload=payload,
-            sid=self.stream_sid,
-        ).model_dump_json()
-        await self.twilio_websocket.send_text(twilio_media)
+        self.latency.record("first_audio")
+        await self.twilio_writer.put("media", payload)
+        self._response_part_marks.audio_sent(payload)
 
     async def send_response_done_mark(self) -> None:
-        message = TwilioOutboundMark.with_name("done", self.stream_sid)
-        await self.twilio_websocket.send_text(message.model_dump_json())
+        mark = "done"
+        await self.twilio_writer.put("mark", mark)
+        # Keeping track of this one as well ensures the queue is not empty, as
+        # long as any part of the response has not been played yet.
+        self.mark_queue.append(mark)
+        self._response_part_marks.reset()
 
     async def send_response_part_mark(self) -> None:
-        if not self.stream_sid:
+        """
+        Sends a `responsePart` mark, if it is due according to the settings.
+
+        Should be called after every chunk of audio sent via `send_media`.
+        """
+        if not self.stream_sid or not self._response_part_marks.mark_due():
             return
         mark = "responsePart"
-        message = TwilioOutboundMark.with_name(mark, self.stream_sid)
-        await self.twilio_websocket.send_text(message.model_dump_json())
+        await self.twilio_writer.put("mark", mark)
         self.mark_queue.append(mark)
 
     async def clear_marks(self) -> None:
-        await self.twilio_websocket.send_text(
-            TwilioOutboundClear(streamSid=self.stream_sid).model_dump_json()
-        )
+        await self.twilio_writer.put("clear")
         self.mark_queue.clear()
+        self._response_part_marks.reset()
 
-    async def _timeout_loop(self) -> None:
-        settings = Settings()
-        while True:
-            seconds = settings.misc.speech_start_timeout
-            try:
-                async with timeout(seconds):
-                    await gather(
-                        sleep(1),  # Wait at least a second in each iteration.
-                        self.conversation_ongoing.wait(),
-                    )
-            except TimeoutError as e:
-                raise SpeechStartTimeout(cast(float, seconds)) from e
+    def _log_mark_stats(self) -> None:
+        marks = self._response_part_marks
+        if not marks.deltas_total:
+            return
+        saved = marks.deltas_total - marks.marks_total
+        log.info(
+            f"Sent {marks.marks_total} response part marks for "
+            f"{marks.deltas_total} audio chunks ({saved} Twilio messages saved)"
+        )
+
+    def _start_deadlines(self) -> None:
+        """
+        Arms the deadlines, after which the call is ended.
+
+        The maximum call duration and Twilio idle timeout are armed right away.
+        The speech start timeout is (re-)armed whenever `conversation_ongoing`
+        is cleared, and disarmed whenever it is set. The timeouts are read
+        once here, so that re-arming them does not access the settings.
+        """
+        settings = Settings().misc
+        self._speech_start_timeout = settings.speech_start_timeout
+        self._twilio_idle_timeout = settings.twilio_idle_timeout
+        self._deadlines = {}
+        if (max_duration := settings.max_call_duration) is not None:
+            self._set_deadline(
+                "max_call_duration",
+                max_duration,
+                lambda: self._abort(MaxCallDurationReached(max_duration)),
+            )
+        if (idle_timeout := self._twilio_idle_timeout) is not None:
+            self._set_deadline(
+                "twilio_idle",
+                idle_timeout,
+                self._check_twilio_idle,
+            )
+        self._conversation_ongoing_changed(self.conversation_ongoing.is_set())
+
+    def _cancel_deadlines(self) -> None:
+        if self._deadlines is None:
+            return
+        for deadline in self._deadlines.values():
+            deadline.cancel()
+        self._deadlines = None
+
+    def _set_deadline(
+        self,
+        name: str,
+        delay: float,
+        callback: Callable[[], None],
+    ) -> None:
+        if self._deadlines is None:
+            return
+        if (deadline := self._deadlines.pop(name, None)) is not None:
+            deadline.cancel()
+        self._deadlines[name] = DeadlineScheduler().call_later(delay, callback)
+
+    def _conversation_ongoing_changed(self, ongoing: bool) -> None:
+        if self._deadlines is None:
+            return
+        if ongoing:
+            if deadline := self._deadlines.pop("speech_start", None):
+                deadline.cancel()
+            return
+        if (seconds := self._speech_start_timeout) is not None:
+            self._set_deadline(
+                "speech_start",
+                seconds,
+                lambda: self._abort(SpeechStartTimeout(seconds)),
+            )
+
+    def _check_twilio_idle(self) -> None:
+        if (seconds := self._twilio_idle_timeout) is None:
+            return
+        remaining = self._last_twilio_message + seconds - monotonic()
+        # Re-arming on every message would be too expensive, so the deadline
+        # is only pushed back, once it is reached.
+        if remaining > TWILIO_IDLE_TOLERANCE:
+            self._set_deadline(
+                "twilio_idle",
+                remaining,
+                self._check_twilio_idle,
+            )
+        else:
+            self._abort(TwilioIdleTimeout(seconds))
 
     async def _abort_wait(self) -> None:
         exception = await self._abort_exception.get()
         raise exception
 
     def _abort(self, exception: CallbotException) -> None:
-        self._abort_exception.put_nowait(exception)
+        # Only the first reason to abort the call is relevant.
+        if not self._abort_exception.full():
+            self._abort_exception.put_nowait(exception)
+
+    async def _register(self) -> None:
+        self._active_instances[self.call_sid] = self
+        await CallRegistry.shared().register(
+            self.call_sid,
+            self.handle_amd_status,
+        )
+
+    def handle_amd_status(self, amd_status: AMDStatus) -> None:
+        call_sid = self.call_sid
+        match amd_status.answered_by:
+            case "human":
+                log.info(f"Twilio AMD detected human in call {call_sid}")
+            case "unknown":
+                log.warning(f"Twilio AMD status unknown for call {call_sid}")
+            case _:
+                self.answering_machine_detected(amd_status)
 
     def answering_machine_detected(self, amd_status: AMDStatus) -> None:
         self._abort(AnsweringMachineDetected(
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from asyncio import Task, create_task, sleep
+from collections.abc import Callable
+from contextlib import suppress
+from importlib.metadata import entry_points
+from os import getpid
+from pathlib import Path
+from socket import gethostname
+from time import time
+from typing import ClassVar
+
+import aiosqlite
+from loguru import logger as log
+
+from callbot.metrics import MetricsRegistry
+from callbot.schemas.amd_status import AMDStatus
+from callbot.settings import Settings
+
+
+AMDHandler = Callable[[AMDStatus], None]
+
+_amd_statuses = MetricsRegistry().counter(
+    "callbot_amd_statuses_total",
+    "AMD status callbacks by how they reached the call they belong to.",
+    label_names=("route", ),
+)
+
+
+class CallRegistry(ABC):
+    """
+    Knows which process handles which call.
+
+    Twilio sends the AMD status callback of a call to any of the server's
+    worker processes, not necessarily the one handling the call's stream.
+    Calls are therefore registered with their AMD handler, and status
+    callbacks are forwarded to the process that registered the call. How
+    other processes are found and reached is up to the backend; the `memory`
+    backend knows only the calls of its own process.
+
+    Additional backends can be installed via the `callbot.call_registries`
+    entry point group and selected via the `call_registry.backend` setting.
+    """
+    _available: ClassVar[dict[str, type[CallRegistry]]] = {}
+    _shared: ClassVar[CallRegistry | None] = None
+
+    _handlers: dict[str, AMDHandler]
+
+    def __init__(self) -> None:
+        self._handlers = {}
+
+    @classmethod
+    def load_backends(cls) -> None:
+        cls._available["memory"] = MemoryCallRegistry
+        cls._available["sqlite"] = SQLiteCallRegistry
+        for plugin in entry_points(group="callbot.call_registries"):
+            registry_cls = plugin.load()
+            if not issubclass(registry_cls, CallRegistry):
+                log.error(f"Not a call registry class: '{plugin.value}'")
+                continue
+            cls._available.setdefault(plugin.name, registry_cls)
+
+    @classmethod
+    def shared(cls) -> CallRegistry:
+        """Returns the registry of this process, creating it on first use."""
+        if cls._shared is None:
+            if not cls._available:
+                cls.load_backends()
+            name = Settings().call_registry.backend
+            if (registry_cls := cls._available.get(name)) is None:
+                raise RuntimeError(f"Unknown call registry backend: {name}")
+            cls._shared = registry_cls.from_settings()
+        return cls._shared
+
+    @classmethod
+    @abstractmethod
+    def from_settings(cls) -> CallRegistry:
+        ...
+
+    @abstractmethod
+    async def start(self) -> None:
+        """Called once at server startup, before any call is registered."""
+
+    @abstractmethod
+    async def stop(self) -> None:
+        """Called once at server shutdown."""
+
+    async def register(self, call_sid: str, on_amd_status: AMDHandler) -> None:
+        self._handlers[call_sid] = on_amd_status
+
+    async def unregister(self, call_sid: str) -> None:
+        self._handlers.pop(call_sid, None)
+
+    async def forward_amd_status(self, amd_status: AMDStatus) -> bool:
+        """
+        Passes the status to the handler of its call, wherever it is.
+
+        Returns `False`, if no process has registered the call.
+        """
+        if self._deliver(amd_status):
+            _amd_statuses.labels("local").inc()
+            return True
+        if await self._forward_remote(amd_status):
+            _amd_statuses.labels("forwarded").inc()
+            return True
+        _amd_statuses.labels("not_found").inc()
+        return False
+
+    @abstractmethod
+    async def _forward_remote(self, amd_status: AMDStatus) -> bool:
+        ...
+
+    def _deliver(self, amd_status: AMDStatus) -> bool:
+        if (handler := self._handlers.get(amd_status.call_sid)) is None:
+            return False
+        handler(amd_status)
+        return True
+
+
+class MemoryCallRegistry(CallRegistry):
+    """Registry of a single process; suitable for a single server worker."""
+
+    @classmethod
+    def from_settings(cls) -> MemoryCallRegistry:
+        return cls()
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def _forward_remote(self, _amd_status: AMDStatus) -> bool:
+        return False
+
+
+class SQLiteCallRegistry(CallRegistry):
+    """
+    Registry shared by the worker processes of a host via a SQLite file.
+
+    Each worker records the calls it handles in the file. A status for a call
+    of another worker is added to that worker's inbox table, which every
+    worker polls. Statuses for workers that died without cleaning up are
+    discarded, once they are `MAX_STATUS_AGE` seconds old.
+    """
+    # Number of seconds after which undelivered statuses are discarded.
+    MAX_STATUS_AGE = 60.
+
+    _db: aiosqlite.Connection | None
+    _task: Task[None] | None
+
+    def __init__(self, path: Path, poll_interval: float) -> None:
+        super().__init__()
+        self.path = path
+        self.poll_interval = poll_interval
+        self.worker = f"{gethostname()}:{getpid()}"
+        self._db = None
+        self._task = None
+
+    @classmethod
+    def from_settings(cls) -> SQLiteCallRegistry:
+        settings = Settings().call_registry
+        return cls(settings.sqlite_path, settings.poll_interval_ms / 1000)
+
+    @property
+    def db(self) -> aiosqlite.Connection:
+        if self._db is None:
+            raise RuntimeError("Call registry is not started")
+        return self._db
+
+    async def start(self) -> None:
+        if self._db is not None:
+            return
+        self._db = await aiosqlite.connect(self.path, isolation_level=None)
+        await self._db.execute("PRAGMA journal_mode=WAL")
+        await self._db.execute("PRAGMA busy_timeout=5000")
+        await self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS call ("
+            "  call_sid TEXT PRIMARY KEY, worker TEXT NOT NULL"
+            ");"
+            "CREATE TABLE IF NOT EXISTS amd_status ("
+            "  id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            "  worker TEXT NOT NULL,"
+            "  payload TEXT NOT NULL,"
+            "  created REAL NOT NULL"
+            ");"
+            "CREATE INDEX IF NOT EXISTS amd_status_worker"
+            "  ON amd_status (worker);"
+        )
+        log.info(f"Call registry {self.path} started for worker {self.worker}")
+        self._task = create_task(self._poll(), name="call_registry")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(BaseException):
+                await self._task
+            self._task = None
+        if self._db is not None:
+            await self._db.execute(
+                "DELETE FROM call WHERE worker = ?", (self.worker, )
+            )
+            await self._db.execute(
+                "DELETE FROM amd_status WHERE worker = ?", (self.worker, )
+            )
+            await self._db.close()
+            self._db = None
+
+    async def register(self, call_sid: str, on_amd_status: AMDHandler) -> None:
+        await super().register(call_sid, on_amd_status)
+        await self.db.execute(
+            "INSERT OR REPLACE INTO call (call_sid, worker) VALUES (?, ?)",
+            (call_sid, self.worker),
+        )
+
+    async def unregister(self, call_sid: str) -> None:
+        await super().unregister(call_sid)
+        await self.db.execute(
+            "DELETE FROM call WHERE call_sid = ? AND worker = ?",
+            (call_sid, self.worker),
+        )
+
+    async def _forward_remote(self, amd_status: AMDStatus) -> bool:
+        async with self.db.execute(
+            "SELECT worker FROM call WHERE call_sid = ?",
+            (amd_status.call_sid, ),
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            return False
+        now = time()
+        await self.db.execute(
+            "DELETE FROM amd_status WHERE created < ?",
+            (now - self.MAX_STATUS_AGE, ),
+        )
+        await self.db.execute(
+            "INSERT INTO amd_status (worker, payload, created) "
+            "VALUES (?, ?, ?)",
+            (row[0], amd_status.model_dump_json(), now),
+        )
+        log.debug(f"Forwarded AMD status of {amd_status.call_sid} to {row[0]}")
+        return True
+
+    async def _poll(self) -> None:
+        while True:
+            await sleep(self.poll_interval)
+            try:
+                await self._receive()
+            except Exception as e:
+                log.exception(f"Error polling the call registry: {e}")
+
+    async def _receive(self) -> None:
+        async with self.db.execute(
+            "SELECT id, payload FROM amd_status WHERE worker = ? ORDER BY id",
+            (self.worker, ),
+        ) as cursor:
+            rows = list(await cursor.fetchall())
+        if rows:
+            await self.db.execute(
+                "DELETE FROM amd_status WHERE worker = ? AND id <= ?",
+                (self.worker, rows[-1][0]),
+            )
+        for _, payload in rows:
+            amd_status = AMDStatus.model_validate_json(payload)
+            if not self._deliver(amd_status):
+                log.warning(
+                    f"Forwarded AMD status for call {amd_status.call_sid}, "
+                    f"which has already ended"
+                )
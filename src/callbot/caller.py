@@ -1,25 +1,84 @@
 from types import TracebackType
-from typing import Self, TypeVar
+from typing import Any, ClassVar, Self, TypeVar
 
+from aiohttp import ClientSession, TraceConfig
 from fastapi.datastructures import URL
 from loguru import logger as log
+from twilio.base.exceptions import TwilioRestException  # type: ignore[import-untyped]
 from twilio.rest import Client  # type: ignore[import-untyped]
 from twilio.http.async_http_client import AsyncTwilioHttpClient  # type: ignore[import-untyped]
+from twilio.http.response import Response  # type: ignore[import-untyped]
 from twilio.twiml.voice_response import Connect, ConversationRelay, Stream, VoiceResponse  # type: ignore[import-untyped]
 
 from callbot.auth.jwt import JWT
-from callbot.db import EngineWrapper as DBEngine, Session
+from callbot.contact_cache import ContactCache
+from callbot.db import Session
+from callbot.metrics import MetricsRegistry
+from callbot.misc.token_bucket import TokenBucket
 from callbot.schemas.contact import Contact
 from callbot.settings import Settings
 
 
 E = TypeVar("E", bound=BaseException)
 
+# Used if a response with status 429 lacks a `Retry-After` header.
+DEFAULT_RETRY_AFTER_SECONDS = 1.
+
+_registry = MetricsRegistry()
+_connections = _registry.counter(
+    "callbot_twilio_connections_total",
+    "Connections used for Twilio REST requests by whether they were reused.",
+    label_names=("connection", ),
+)
+_rate_limit_wait = _registry.histogram(
+    "callbot_twilio_rate_limit_wait_seconds",
+    "Time calls waited for the Twilio rate limit before being placed.",
+).labels()
+_throttled = _registry.counter(
+    "callbot_twilio_throttled_total",
+    "Twilio REST responses with status 429 (too many requests).",
+).labels()
+
+
+class TwilioHttpClient(AsyncTwilioHttpClient):  # type: ignore[misc]
+    """
+    Twilio HTTP client, which pauses a rate limit on `429` responses.
+
+    With pooled connections, the connections opened and reused by the session
+    are counted.
+    """
+
+    def __init__(self, rate_limit: TokenBucket, pool: bool = True) -> None:
+        super().__init__(pool_connections=False)
+        self.rate_limit = rate_limit
+        if pool:
+            self.session = ClientSession(trace_configs=[_trace_config()])
+
+    async def request(self, *args: Any, **kwargs: Any) -> Response:
+        response = await super().request(*args, **kwargs)
+        if response.status_code == 429:
+            _throttled.inc()
+            retry_after = _retry_after(response.headers)
+            log.warning(f"Twilio rate limit exceeded, pausing {retry_after} s")
+            self.rate_limit.pause(retry_after)
+        return response
+
 
 class Caller:
+    """
+    Places calls via the Twilio REST API.
+
+    Calls are placed at no more than the configured `calls_per_second`; if
+    Twilio responds with `429` anyway, placing calls is paused as requested and
+    the call is tried again. The `shared` instance keeps its connections open
+    and is meant to be used by all parts of a process.
+    """
     twilio_client: Client
     amd_status_url: URL
     stream_url: URL
+    rate_limit: TokenBucket
+
+    _shared: ClassVar["Caller | None"] = None
 
     def __init__(self, *, pool: bool = True) -> None:
         settings = Settings()
@@ -28,10 +87,36 @@ class Caller:
         public_base_url = URL(str(settings.server.public_base_url))
         self.stream_url = public_base_url.replace(scheme="wss", path="/stream")
         self.amd_status_url = public_base_url.replace(path="/amdstatus")
+        self.rate_limit = TokenBucket(settings.twilio.calls_per_second)
         self.twilio_client = Client(
             settings.twilio.account_sid,
             settings.twilio.auth_token.get_secret_value(),
-            http_client=AsyncTwilioHttpClient(pool_connections=pool),
+            http_client=TwilioHttpClient(self.rate_limit, pool=pool),
+        )
+        if settings.twilio.api_base_url is not None:
+            api_base_url = str(settings.twilio.api_base_url)
+            self.twilio_client.api.base_url = api_base_url.rstrip("/")
+
+    @classmethod
+    def shared(cls) -> "Caller":
+        """Returns the caller of this process, creating it on first use."""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    @classmethod
+    async def close_shared(cls) -> None:
+        if (caller := cls._shared) is not None:
+            cls._shared = None
+            await caller.close()
+            caller.log_stats()
+
+    async def close(self) -> None:
+        await self.twilio_client.http_client.close()
+
+    def log_stats(self) -> None:
+        log.debug(
+            f"Caller: {self.rate_limit.waited:.1f} s waited for the rate limit"
         )
 
     async def __aenter__(self) -> Self:
@@ -45,8 +130,7 @@ class Caller:
         exc_tb: TracebackType,
     ) -> None:
         """Exiting the `async with`-block closes the client session."""
-        assert isinstance(self.twilio_client.http_client, AsyncTwilioHttpClient)
-        await self.twilio_client.http_client.__aexit__(exc_type, exc_val, exc_tb)
+        await self.close()
 
     async def __call__(self, contact: Contact) -> str:
         settings = Settings()
@@ -67,34 +151,63 @@ class Caller:
         connect.nest(nested)
         twiml.append(connect)
         log.info(f"Calling {contact.phone}: {contact.model_dump_json(exclude_defaults=True)}")
-        call_instance = await self.twilio_client.calls.create_async(
-            to=contact.phone,
-            from_=settings.twilio.phone_number,
-            timeout=settings.twilio.timeout,
-            machine_detection="Enable",
-            async_amd=True,
-            async_amd_status_callback=str(self.amd_status_url),
-            twiml=twiml,
-        )
+        retries = settings.twilio.max_rate_limit_retries
+        for attempt in range(retries + 1):
+            _rate_limit_wait.observe(await self.rate_limit.acquire())
+            try:
+                call_instance = await self.twilio_client.calls.create_async(
+                    to=contact.phone,
+                    from_=settings.twilio.phone_number,
+                    timeout=settings.twilio.timeout,
+                    machine_detection="Enable",
+                    async_amd=True,
+                    async_amd_status_callback=str(self.amd_status_url),
+                    twiml=twiml,
+                )
+            except TwilioRestException as e:
+                # The HTTP client already paused the rate limit.
+                if e.status != 429 or attempt == retries:
+                    raise
+            else:
+                break
         if not isinstance(call_instance.sid, str):
             raise RuntimeError("Failed to get a call SID!")
         return call_instance.sid
 
+    async def get_status(self, call_sid: str) -> str:
+        """Returns the current status of a call, e.g. `busy` or `completed`."""
+        call_instance = await self.twilio_client.calls(call_sid).fetch_async()
+        return str(call_instance.status)
+
     async def get_contact_and_call(
         self,
         phone_number: str,
         db_session: Session | None = None,
     ) -> str:
-        select_statement = Contact.select_by_phone(phone_number)
-        close_session = False
-        if db_session is None:
-            close_session = True
-            db_session = DBEngine().get_session()
-        try:
-            results = await db_session.exec(select_statement)
-            if not (contact := results.first()):
-                raise ValueError("Contact not found")
-        finally:
-            if close_session:
-                await db_session.close()
+        contact = await ContactCache().get(phone_number, db_session)
+        if contact is None:
+            raise ValueError("Contact not found")
         return await self(contact)
+
+
+def _trace_config() -> TraceConfig:
+    trace_config = TraceConfig()
+    new, reused = _connections.labels("new"), _connections.labels("reused")
+
+    async def _created(*_args: Any) -> None:
+        new.inc()
+
+    async def _reused(*_args: Any) -> None:
+        reused.inc()
+
+    trace_config.on_connection_create_end.append(_created)
+    trace_config.on_connection_reuseconn.append(_reused)
+    return trace_config
+
+
+def _retry_after(headers: Any) -> float:
+    # Only the number of seconds is supported, not an HTTP date.
+    try:
+        return max(float(headers["Retry-After"]), 0.)
+    except (KeyError, TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER_SECONDS
@@ -0,0 +1,508 @@
+from asyncio import (
+    CancelledError,
+    Event,
+    Lock,
+    Queue,
+    Task,
+    create_task,
+    gather,
+    sleep,
+)
+from collections.abc import Iterable, Iterator
+from csv import DictReader
+from dataclasses import dataclass, field
+from os import getpid
+from pathlib import Path
+from socket import gethostname
+from time import monotonic, time
+from typing import Any, Self
+from uuid import uuid4
+
+from loguru import logger as log
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import delete, func, insert, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import col, select
+
+from callbot.caller import Caller
+from callbot.contact_cache import ContactCache
+from callbot.db import EngineWrapper as DBEngine, Session
+from callbot.deadlines import Deadline, DeadlineScheduler
+from callbot.exceptions import CampaignRunning
+from callbot.metrics import MetricsRegistry
+from callbot.misc.singleton import Singleton
+from callbot.misc.token_bucket import TokenBucket
+from callbot.schemas.campaign import (
+    CampaignCall,
+    CampaignCallDB,
+    CampaignCallStatus,
+    CampaignLockDB,
+)
+from callbot.schemas.contact import ContactDB, Phone
+from callbot.settings import Settings
+from callbot.settings.campaign import CampaignSettings
+
+
+# Final statuses of a Twilio call; calls with any other status are ongoing.
+FINAL_STATUSES = frozenset(
+    {"completed", "busy", "no-answer", "failed", "canceled"}
+)
+RETRY_STATUSES = frozenset({"busy", "no-answer"})
+# Assumed for the outcome timeout, if `misc.max_call_duration` is not set.
+DEFAULT_MAX_CALL_DURATION = 3600.
+# Added to the outcome timeout to allow for delays in reporting the status.
+OUTCOME_GRACE_SECONDS = 60.
+# Duration of the lease on a running campaign; it is renewed every third.
+LOCK_SECONDS = 60.
+
+_phone_adapter: TypeAdapter[str] = TypeAdapter(Phone)
+_attempts = MetricsRegistry().counter(
+    "callbot_campaign_calls_total",
+    "Dialing attempts of campaigns by outcome.",
+    label_names=("campaign", "outcome"),
+)
+
+
+@dataclass
+class CampaignStats:
+    """Progress of a campaign; `attempts` and rates refer to the current run."""
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+    in_progress: int = 0
+    attempts: int = 0
+    retries: int = 0
+    started: float = field(default_factory=monotonic)
+
+    @property
+    def finished(self) -> int:
+        return self.completed + self.failed
+
+    @property
+    def calls_per_minute(self) -> float:
+        return self.attempts * 60 / max(monotonic() - self.started, 1e-9)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "total": self.total,
+            "completed": self.completed,
+            "failed": self.failed,
+            "in_progress": self.in_progress,
+            "pending": self.total - self.finished - self.in_progress,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "calls_per_minute": round(self.calls_per_minute, 2),
+            "elapsed_seconds": round(monotonic() - self.started, 1),
+        }
+
+    def log(self, campaign: str) -> None:
+        log.info(
+            f"Campaign {campaign}: {self.finished}/{self.total} numbers "
+            f"finished ({self.completed} completed, {self.failed} failed), "
+            f"{self.in_progress} in progress, {self.attempts} attempts, "
+            f"{self.retries} retries ({self.calls_per_minute:.1f} calls/min)"
+        )
+
+
+class Campaign:
+    """
+    Calls a list of numbers via the `Caller`, respecting the configured limits.
+
+    At most `max_concurrent_calls` calls are in progress at the same time, and
+    no more than `calls_per_second` are placed. Numbers, which are busy or do
+    not answer, are dialed again with exponential backoff.
+
+    Every number has a checkpoint row in the database, which is updated before
+    and after each attempt. Running a campaign of the same name again resumes
+    it: finished numbers are skipped, retries keep their schedule and calls
+    that were in progress are only checked for their outcome, not redialed.
+    If it is unknown whether a call was placed, because the campaign was
+    interrupted while dialing, the number is retried with backoff. Calls
+    without a final status after the outcome timeout count as failed.
+
+    A campaign is only run by one process at a time, e.g. one of several
+    server workers or the CLI. The running instance holds a lease on it in
+    the database, which expires, if the process dies without releasing it.
+    """
+    stats: CampaignStats
+    _caller: Caller
+    _done: Event
+    _queue: Queue[CampaignCall]
+    _retries: dict[int, Deadline]
+    _session: Session
+
+    def __init__(self, name: str, settings: CampaignSettings) -> None:
+        self.name = name
+        self.settings = settings
+        self.stats = CampaignStats()
+        self._rate_limit = TokenBucket(settings.calls_per_second)
+        self._remaining = 0
+        self._done = Event()
+        self._retries = {}
+        self._save_lock = Lock()
+        self._owner = f"{gethostname()}/{getpid()}/{uuid4().hex[:8]}"
+
+    @classmethod
+    def from_settings(cls, name: str) -> Self:
+        return cls(name, Settings().campaign)
+
+    async def add_numbers(self, phone_numbers: Iterable[str]) -> int:
+        """
+        Adds the given numbers to the campaign, unless they are already part
+        of it. Invalid numbers are skipped. Returns the number of added ones.
+        """
+        phones: dict[str, None] = {}
+        for phone_number in phone_numbers:
+            try:
+                phones[_phone_adapter.validate_python(phone_number)] = None
+            except ValidationError:
+                log.warning(f"Skipping invalid number {phone_number}")
+        await DBEngine().create_tables()
+        async with DBEngine().get_session() as session:
+            results = await session.exec(
+                select(col(CampaignCallDB.phone))
+                .where(col(CampaignCallDB.campaign) == self.name)
+            )
+            for phone in results:
+                phones.pop(phone, None)
+            if phones:
+                rows = [{"campaign": self.name, "phone": p} for p in phones]
+                await session.exec(insert(CampaignCallDB), params=rows)
+                await session.commit()
+        log.info(f"Added {len(phones)} numbers to campaign {self.name}")
+        return len(phones)
+
+    async def add_all_contacts(self) -> int:
+        async with DBEngine().get_session() as session:
+            results = await session.exec(select(col(ContactDB.phone)))
+            phones = list(results)
+        return await self.add_numbers(phones)
+
+    async def run(self) -> CampaignStats:
+        """
+        Dials all unfinished numbers of the campaign until none are left.
+
+        Raises `CampaignRunning`, if another instance is running it already.
+        """
+        await DBEngine().create_tables()
+        await self.lock()
+        self._done.clear()
+        keep_locked = create_task(self._keep_locked())
+        try:
+            return await self._run()
+        finally:
+            keep_locked.cancel()
+            await gather(keep_locked, return_exceptions=True)
+            await self.unlock()
+
+    async def lock(self) -> None:
+        """
+        Takes (or renews) the lease on the campaign for this instance.
+
+        Raises `CampaignRunning`, if another instance holds it.
+        """
+        now = time()
+        values = {"owner": self._owner, "expires_at": now + LOCK_SECONDS}
+        async with DBEngine().get_session() as session:
+            # Takes over the lease, if it is ours already or has expired.
+            result = await session.exec(
+                update(CampaignLockDB)
+                .where(col(CampaignLockDB.campaign) == self.name)
+                .where(or_(
+                    col(CampaignLockDB.owner) == self._owner,
+                    col(CampaignLockDB.expires_at) <= now,
+                ))
+                .values(**values)
+            )
+            if result.rowcount == 0:
+                try:
+                    await session.exec(
+                        insert(CampaignLockDB),
+                        params=[{"campaign": self.name, **values}],
+                    )
+                except IntegrityError:
+                    raise CampaignRunning(self.name) from None
+            await session.commit()
+
+    async def unlock(self) -> None:
+        async with DBEngine().get_session() as session:
+            await session.exec(
+                delete(CampaignLockDB)
+                .where(col(CampaignLockDB.campaign) == self.name)
+                .where(col(CampaignLockDB.owner) == self._owner)
+            )
+            await session.commit()
+
+    async def _keep_locked(self) -> None:
+        while True:
+            await sleep(LOCK_SECONDS / 3)
+            try:
+                await self.lock()
+            except CampaignRunning:
+                log.error(f"Campaign {self.name} was taken over, stopping")
+                self._done.set()
+                return
+            except Exception as e:
+                log.warning(f"Failed to renew lease on campaign {self.name}: {e}")
+
+    @classmethod
+    async def load_progress(cls, name: str) -> dict[str, Any] | None:
+        """
+        Returns the progress of a campaign as saved in the database, e.g. for
+        one run by another process, or `None`, if there is no such campaign.
+        """
+        await DBEngine().create_tables()
+        async with DBEngine().get_session() as session:
+            results = await session.exec(
+                select(col(CampaignCallDB.status), func.count())
+                .where(col(CampaignCallDB.campaign) == name)
+                .group_by(col(CampaignCallDB.status))
+            )
+            counts: dict[str, int] = dict(results.all())
+            lock = await session.get(CampaignLockDB, name)
+        if not counts:
+            return None
+        return {
+            "running": lock is not None and lock.expires_at > time(),
+            "stats": {
+                "total": sum(counts.values()),
+                "completed": counts.get("completed", 0),
+                "failed": counts.get("failed", 0),
+                "in_progress": counts.get("dialing", 0),
+                "pending": counts.get("pending", 0),
+            },
+        }
+
+    async def _run(self) -> CampaignStats:
+        calls = await self._load()
+        self.stats = CampaignStats(
+            total=len(calls),
+            completed=sum(call.status == "completed" for call in calls),
+            failed=sum(call.status == "failed" for call in calls),
+        )
+        todo = [call for call in calls if not call.finished]
+        if not todo:
+            log.info(f"Campaign {self.name} has no numbers left to call")
+            return self.stats
+        await ContactCache().warm_up(
+            call.phone for call in todo if call.status == "pending"
+        )
+        self._remaining = len(todo)
+        self._queue = Queue()
+        now = time()
+        for call in todo:
+            self._schedule(call, call.next_attempt_at - now)
+        log.info(f"Starting campaign {self.name} with {len(todo)} numbers")
+        self._caller = Caller.shared()
+        async with DBEngine().get_session() as session:
+            self._session = session
+            workers = [
+                create_task(self._work(), name=f"campaign_{self.name}_{idx}")
+                for idx in range(self.settings.max_concurrent_calls)
+            ]
+            try:
+                await self._done.wait()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await gather(*workers, return_exceptions=True)
+                for deadline in self._retries.values():
+                    deadline.cancel()
+                self._retries.clear()
+                self.stats.log(self.name)
+        return self.stats
+
+    async def _load(self) -> list[CampaignCall]:
+        async with DBEngine().get_session() as session:
+            results = await session.exec(
+                select(CampaignCallDB)
+                .where(col(CampaignCallDB.campaign) == self.name)
+                .order_by(col(CampaignCallDB.id))
+            )
+            return [CampaignCall.model_validate(call) for call in results]
+
+    def _schedule(self, call: CampaignCall, delay: float) -> None:
+        if delay <= 0:
+            self._queue.put_nowait(call)
+            return
+        if (call_id := call.id) is None:
+            raise ValueError(f"Campaign call to {call.phone} has no ID")
+
+        def _due() -> None:
+            del self._retries[call_id]
+            self._queue.put_nowait(call)
+
+        self._retries[call_id] = DeadlineScheduler().call_later(delay, _due)
+
+    async def _work(self) -> None:
+        while True:
+            call = await self._queue.get()
+            try:
+                await self._attempt(call)
+            except CancelledError:
+                raise
+            except Exception as e:
+                log.exception(f"Error calling {call.phone}: {e}")
+                await self._finish(call, "failed", f"{type(e).__name__}: {e}")
+
+    async def _attempt(self, call: CampaignCall) -> None:
+        self.stats.in_progress += 1
+        try:
+            if call.status == "pending" and not await self._dial(call):
+                return
+            if (call_sid := call.call_sid) is None:
+                # Interrupted after saving the attempt, but before saving the
+                # SID. The call may or may not have been placed.
+                outcome = "interrupted while dialing"
+            else:
+                outcome = await self._wait_for_outcome(call, call_sid)
+        finally:
+            self.stats.in_progress -= 1
+        _attempts.labels(self.name, outcome).inc()
+        if outcome == "completed":
+            await self._finish(call, "completed", outcome)
+        elif outcome in RETRY_STATUSES or call_sid is None:
+            await self._retry_or_fail(call, outcome)
+        else:
+            await self._finish(call, "failed", outcome)
+
+    async def _dial(self, call: CampaignCall) -> bool:
+        contact = await ContactCache().get(call.phone)
+        if contact is None:
+            await self._finish(call, "failed", "contact not found")
+            return False
+        await self._rate_limit.acquire()
+        call.attempts += 1
+        self.stats.attempts += 1
+        # Saved before placing the call, so that a resumed campaign does not
+        # dial the number again right away.
+        call.status = "dialing"
+        call.call_sid = None
+        call.dialed_at = time()
+        await self._save(call)
+        try:
+            call.call_sid = await self._caller(contact)
+        except Exception as e:
+            log.warning(f"Failed to call {call.phone}: {e}")
+            _attempts.labels(self.name, "error").inc()
+            await self._retry_or_fail(call, f"{type(e).__name__}: {e}")
+            return False
+        await self._save(call)
+        return True
+
+    async def _wait_for_outcome(self, call: CampaignCall, call_sid: str) -> str:
+        dialed_at = call.dialed_at if call.dialed_at is not None else time()
+        deadline = dialed_at + self._outcome_timeout()
+        while True:
+            try:
+                status = await self._caller.get_status(call_sid)
+            except Exception as e:
+                log.warning(
+                    f"Failed to get the status of call {call_sid}: {e}"
+                )
+            else:
+                if status in FINAL_STATUSES:
+                    return status
+            if time() >= deadline:
+                log.warning(
+                    f"No final status for call {call_sid} "
+                    f"to {call.phone} in time"
+                )
+                return "timeout"
+            await sleep(self.settings.status_poll_interval_seconds)
+
+    def _outcome_timeout(self) -> float:
+        """Returns the number of seconds to wait for the outcome of a call."""
+        if self.settings.outcome_timeout_seconds is not None:
+            return self.settings.outcome_timeout_seconds
+        settings = Settings()
+        max_duration = settings.misc.max_call_duration
+        if max_duration is None:
+            max_duration = DEFAULT_MAX_CALL_DURATION
+        return settings.twilio.timeout + max_duration + OUTCOME_GRACE_SECONDS
+
+    async def _retry_or_fail(self, call: CampaignCall, outcome: str) -> None:
+        if call.attempts >= self.settings.max_attempts:
+            await self._finish(call, "failed", outcome)
+            return
+        delay = min(
+            self.settings.retry_backoff_seconds * 2 ** (call.attempts - 1),
+            self.settings.retry_backoff_max_seconds,
+        )
+        call.status = "pending"
+        call.outcome = outcome
+        call.next_attempt_at = time() + delay
+        await self._save(call)
+        self.stats.retries += 1
+        log.info(f"Calling {call.phone} again in {delay:.0f} s ({outcome})")
+        self._schedule(call, delay)
+
+    async def _finish(
+        self,
+        call: CampaignCall,
+        status: CampaignCallStatus,
+        outcome: str,
+    ) -> None:
+        call.status = status
+        call.outcome = outcome
+        await self._save(call)
+        if status == "completed":
+            self.stats.completed += 1
+        else:
+            self.stats.failed += 1
+        self.stats.log(self.name)
+        self._remaining -= 1
+        if self._remaining <= 0:
+            self._done.set()
+
+    async def _save(self, call: CampaignCall) -> None:
+        # The session is shared by all workers, but must not be used by more
+        # than one at a time.
+        async with self._save_lock:
+            await self._session.exec(
+                update(CampaignCallDB)
+                .where(col(CampaignCallDB.id) == call.id)
+                .values(**call.model_dump(exclude={"id"}))
+            )
+            await self._session.commit()
+
+
+class Campaigns(metaclass=Singleton):
+    """Campaigns running in the background of the server process."""
+    _campaigns: dict[str, tuple[Campaign, Task[CampaignStats]]]
+
+    def __init__(self) -> None:
+        self._campaigns = {}
+
+    def get(self, name: str) -> tuple[Campaign, bool] | None:
+        """Returns the campaign of that name and whether it is still running."""
+        if (entry := self._campaigns.get(name)) is None:
+            return None
+        campaign, task = entry
+        return campaign, not task.done()
+
+    def start(self, campaign: Campaign) -> None:
+        if (entry := self.get(campaign.name)) is not None and entry[1]:
+            raise CampaignRunning(campaign.name)
+        task = create_task(campaign.run(), name=f"campaign_{campaign.name}")
+        task.add_done_callback(self._log_result)
+        self._campaigns[campaign.name] = campaign, task
+
+    async def stop(self) -> None:
+        tasks = [task for _, task in self._campaigns.values()]
+        for task in tasks:
+            task.cancel()
+        await gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    def _log_result(task: Task[CampaignStats]) -> None:
+        if not task.cancelled() and (exception := task.exception()) is not None:
+            log.opt(exception=exception).error(f"Campaign failed: {exception}")
+
+
+def phone_numbers_from_csv(path: Path) -> Iterator[str]:
+    """Yields the `phone` column of a CSV file, e.g. one used for imports."""
+    with path.open("r") as csvfile:
+        for row in DictReader(csvfile):
+            if phone := row.get("phone"):
+                yield phone
@@ -3,10 +3,12 @@ from pathlib import Path
 from typing import Annotated
 
 from pydantic import ValidationError
-from typer import Argument, BadParameter, Exit, Typer
+from typer import Argument, BadParameter, Exit, Option, Typer
 
+from callbot.campaign import Campaign, phone_numbers_from_csv
 from callbot.caller import Caller
 from callbot.contacts import import_contacts
+from callbot.exceptions import CampaignRunning
 from callbot.schemas.contact import Phone
 
 
@@ -18,9 +20,34 @@ def import_(
     path: Annotated[
         Path,
         Argument(help="Path to source CSV file"),
-    ]
+    ],
+    bulk: Annotated[
+        bool,
+        Option(
+            help="Validate and insert rows in chunks instead of one by one. "
+                 "Which rows are skipped as duplicates is the same either way.",
+        ),
+    ] = True,
+    chunk_size: Annotated[
+        int,
+        Option(min=1, help="Number of rows per chunk in bulk mode"),
+    ] = 10_000,
+    workers: Annotated[
+        int,
+        Option(
+            "--workers", "-w",
+            min=1,
+            help="Number of processes validating chunks in parallel. "
+                 "More than one implies bulk mode.",
+        ),
+    ] = 1,
 ) -> None:
-    asyncio.run(import_contacts(path))
+    asyncio.run(import_contacts(
+        path,
+        bulk=bulk,
+        chunk_size=chunk_size,
+        workers=workers,
+    ))
 
 
 @app.command()
@@ -30,12 +57,65 @@ def call(
         Argument(help="Phone number to issue the call to"),
     ],
 ) -> None:
-    caller = Caller(pool=False)
     try:
-        sid = asyncio.run(caller.get_contact_and_call(phone))
+        sid = asyncio.run(_call(phone))
     except ValidationError as validation_error:
         raise BadParameter(validation_error.errors()[0]["msg"]) from None
     except Exception as exception:
         print(exception)
         raise Exit(1) from None
     print(f"Call SID for {phone}: {sid}")
+
+
+async def _call(phone: str) -> str:
+    try:
+        return await Caller.shared().get_contact_and_call(phone)
+    finally:
+        await Caller.close_shared()
+
+
+@app.command()
+def campaign(
+    name: Annotated[
+        str,
+        Argument(help="Name of the campaign, under which progress is saved"),
+    ],
+    path: Annotated[
+        Path | None,
+        Argument(
+            help="CSV file with a `phone` column, whose numbers are added to "
+                 "the campaign",
+        ),
+    ] = None,
+    all_contacts: Annotated[
+        bool,
+        Option(help="Add the numbers of all contacts to the campaign"),
+    ] = False,
+) -> None:
+    """
+    Calls all numbers of a campaign, which were not called successfully yet.
+
+    Running the same campaign again resumes it, without calling numbers that
+    were already dealt with.
+    """
+    asyncio.run(_run_campaign(name, path, all_contacts))
+
+
+async def _run_campaign(
+    name: str,
+    path: Path | None,
+    all_contacts: bool,
+) -> None:
+    campaign = Campaign.from_settings(name)
+    if path is not None:
+        await campaign.add_numbers(phone_numbers_from_csv(path))
+    if all_contacts:
+        await campaign.add_all_contacts()
+    try:
+        stats = await campaign.run()
+    except CampaignRunning as error:
+        print(error)
+        raise Exit(1) from None
+    finally:
+        await Caller.close_shared()
+    print(f"Campaign {name}: {stats.to_dict()}")
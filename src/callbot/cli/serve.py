@@ -1,16 +1,30 @@
+import asyncio
+import multiprocessing
+import signal
 from importlib import import_module
 from importlib.metadata import entry_points
+from multiprocessing.connection import wait
+from multiprocessing.process import BaseProcess
+from socket import socket
+from time import monotonic
+from types import FrameType
 from typing import Annotated
 
 import uvicorn
 from loguru import logger as log
-from typer import Option, Typer
+from typer import BadParameter, Exit, Option, Typer
 
+from callbot.db import EngineWrapper as DBEngine
+from callbot.metrics import MetricsRegistry
 from callbot.settings import Settings
 
 
 app = Typer()
 
+# Workers dying sooner after they were started are not restarted, since they
+# would most likely fail again, e.g. due to a configuration error.
+MIN_WORKER_UPTIME_SECONDS = 10.
+
 
 @app.command()
 def serve(
@@ -28,6 +42,16 @@ def serve(
             help="Port to listen on",
         ),
     ] = None,
+    workers: Annotated[
+        int,
+        Option(
+            "-w", "--workers",
+            min=1,
+            help="Number of worker processes. More than one requires a call "
+                 "registry backend shared between processes, e.g. `sqlite`, "
+                 "and a `server.auth.jti_store_path`.",
+        ),
+    ] = 1,
 ) -> None:
     from callbot import server
 
@@ -36,19 +60,145 @@ def serve(
         settings.server.host = host  # type: ignore[assignment]
     if port is not None:
         settings.server.port = port
+    if workers > 1 and settings.call_registry.backend == "memory":
+        raise BadParameter(
+            "The `memory` call registry cannot forward AMD status callbacks "
+            "between workers",
+            param_hint="--workers",
+        )
+    if workers > 1 and settings.server.auth.jti_store_path is None:
+        raise BadParameter(
+            "Without a `server.auth.jti_store_path`, each worker would accept "
+            "the same token once",
+            param_hint="--workers",
+        )
     log.info("Starting callbot server...")
     import_module("callbot.functions")
     for plugin in entry_points(group="callbot.functions"):
         plugin.load()
     functions = settings.openai.session.tool_names
     log.debug(f"Available callbot functions: {functions}")
-    uvicorn.run(
+    # Slow callbacks can only be detected on asyncio's own event loop.
+    loop = "asyncio" if settings.loop_monitor.detects_slow_callbacks else "auto"
+    config = uvicorn.Config(
         server.app,
         host=str(settings.server.host),
         port=settings.server.port,
         log_config=None,
         log_level=None,
+        loop=loop,
     )
+    if workers == 1:
+        uvicorn.Server(config).run()
+    else:
+        _run_workers(config, workers)
+
+
+def _run_workers(config: uvicorn.Config, workers: int) -> None:
+    """
+    Serves the app from processes forked from this one, sharing one socket.
+
+    Unlike with uvicorn's own `workers` option, which starts fresh
+    interpreters, the workers inherit the settings including command line
+    overrides, the logging configuration and all loaded plugins. Since each
+    worker limits the rate of its own calls, the configured
+    `twilio.calls_per_second` is split between them.
+    """
+    # Workers creating missing tables at the same time would fail.
+    asyncio.run(_create_tables())
+    twilio = Settings().twilio
+    twilio.calls_per_second /= workers
+    log.info(f"Each worker places up to {twilio.calls_per_second:g} calls/s")
+    sock = config.bind_socket()
+    supervisor = _Supervisor(config, sock, workers)
+    signal.signal(signal.SIGINT, supervisor.terminate)
+    signal.signal(signal.SIGTERM, supervisor.terminate)
+    succeeded = supervisor.run()
+    sock.close()
+    if not succeeded:
+        raise Exit(1)
+
+
+class _Supervisor:
+    """
+    Starts the worker processes and restarts those, which die.
+
+    Workers dying within `MIN_WORKER_UPTIME_SECONDS` after their start are not
+    restarted; all workers are stopped instead and `run` returns `False`.
+    """
+    processes: list[BaseProcess]
+
+    def __init__(
+        self,
+        config: uvicorn.Config,
+        sock: socket,
+        workers: int,
+    ) -> None:
+        self.config = config
+        self.sock = sock
+        self.stopping = False
+        self._context = multiprocessing.get_context("fork")
+        self._started: dict[int, float] = {}
+        self.processes = [self._start(idx) for idx in range(workers)]
+        log.info(
+            f"Started {workers} workers: {[p.pid for p in self.processes]}"
+        )
+
+    def run(self) -> bool:
+        """Supervises the workers until they are stopped or one failed."""
+        succeeded = True
+        while not self.stopping:
+            wait([process.sentinel for process in self.processes])
+            for idx, process in enumerate(self.processes):
+                if self.stopping or process.is_alive():
+                    continue
+                log.error(
+                    f"Worker {process.name} (PID {process.pid}) died with "
+                    f"exit code {process.exitcode}"
+                )
+                if monotonic() - self._started[idx] < MIN_WORKER_UPTIME_SECONDS:
+                    log.error("Worker died right after its start, stopping")
+                    succeeded = False
+                    self.terminate(signal.SIGTERM, None)
+                    break
+                self.processes[idx] = self._start(idx)
+                log.info(f"Restarted {process.name}: {self.processes[idx].pid}")
+        for process in self.processes:
+            process.join()
+        return succeeded
+
+    def terminate(self, _signum: int, _frame: FrameType | None) -> None:
+        self.stopping = True
+        # Workers shut down gracefully on `SIGTERM`, even if they already got
+        # the `SIGINT` sent to the whole process group by the terminal.
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+
+    def _start(self, idx: int) -> BaseProcess:
+        process = self._context.Process(
+            target=_serve_worker,
+            args=(self.config, self.sock, idx),
+            name=f"callbot-worker-{idx}",
+        )
+        process.start()
+        self._started[idx] = monotonic()
+        return process
+
+
+def _serve_worker(config: uvicorn.Config, sock: socket, idx: int) -> None:
+    """Serves the app in a worker, whose metrics are labelled with its index."""
+    # Restarted workers are forked with the supervisor's signal handlers.
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    MetricsRegistry().constant_labels["worker"] = str(idx)
+    uvicorn.Server(config).run(sockets=[sock])
 
 
 serve_command = app.registered_commands[0]
+
+
+async def _create_tables() -> None:
+    await DBEngine().create_tables()
+    # No connections must be inherited by the workers.
+    await DBEngine().engine.dispose()
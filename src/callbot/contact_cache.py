@@ -0,0 +1,173 @@
+from collections import OrderedDict
+from collections.abc import Iterable
+from itertools import batched
+from time import monotonic
+
+from loguru import logger as log
+from pydantic import TypeAdapter
+from sqlmodel import col, select
+
+from callbot.db import EngineWrapper as DBEngine, Session
+from callbot.metrics import MetricsRegistry
+from callbot.misc.singleton import Singleton
+from callbot.schemas.contact import Contact, ContactDB, Phone
+from callbot.settings import Settings
+
+
+_phone_adapter: TypeAdapter[str] = TypeAdapter(Phone)
+
+
+class ContactCache(metaclass=Singleton):
+    """
+    Read-through cache of contacts by their normalized phone number.
+
+    Entries expire after the configured TTL and the least recently used ones
+    are evicted, once the maximum size is reached. Missing contacts are not
+    cached, so contacts added by other processes are found right away.
+    Contacts added or imported by this process invalidate their entries.
+    """
+    _entries: OrderedDict[str, tuple[float, Contact]]
+
+    # Maximum number of phone numbers per query when warming up the cache.
+    WARM_UP_BATCH_SIZE = 500
+
+    def __init__(self) -> None:
+        settings = Settings()
+        self.max_size = settings.contact_cache.max_size
+        self.ttl = settings.contact_cache.ttl
+        self._entries = OrderedDict()
+        registry = MetricsRegistry()
+        lookups = registry.counter(
+            "callbot_contact_cache_lookups_total",
+            "Contact lookups by result; every hit avoids a database query.",
+            label_names=("result", ),
+        )
+        self._hits = lookups.labels("hit")
+        self._misses = lookups.labels("miss")
+        self._expired = lookups.labels("expired")
+        registry.gauge(
+            "callbot_contact_cache_entries",
+            "Number of contacts in the cache.",
+            function=lambda: len(self._entries),
+        )
+
+    @property
+    def hits(self) -> int:
+        return int(self._hits.value)
+
+    @property
+    def misses(self) -> int:
+        return int(self._misses.value + self._expired.value)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.
+
+    async def get(
+        self,
+        phone_number: str,
+        db_session: Session | None = None,
+    ) -> Contact | None:
+        """
+        Returns the contact with the given phone number, if there is one.
+
+        The number is normalized first. Only if no (fresh) entry is cached, the
+        contact is queried, using a new session, if `db_session` is omitted.
+        """
+        phone = _phone_adapter.validate_python(phone_number)
+        if (contact := self._get_cached(phone)) is not None:
+            return contact
+        close_session = False
+        if db_session is None:
+            close_session = True
+            db_session = DBEngine().get_session()
+        try:
+            results = await db_session.exec(Contact.select_by_phone(phone))
+            contact_db = results.first()
+        finally:
+            if close_session:
+                await db_session.close()
+        if contact_db is None:
+            return None
+        contact = _detach(contact_db)
+        self.put(contact)
+        return contact
+
+    def put(self, contact: Contact) -> None:
+        if not self.max_size:
+            return
+        expires = float("inf") if self.ttl is None else monotonic() + self.ttl
+        self._entries[contact.phone] = (expires, contact)
+        self._entries.move_to_end(contact.phone)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, phone: str) -> None:
+        self._entries.pop(phone, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def warm_up(
+        self,
+        phone_numbers: Iterable[str],
+        db_session: Session | None = None,
+    ) -> int:
+        """
+        Loads the contacts with the given phone numbers in a few queries.
+
+        Numbers, which are invalid or not found, are skipped. Returns the
+        number of contacts that were loaded into the cache.
+        """
+        phones = []
+        for phone_number in phone_numbers:
+            try:
+                phones.append(_phone_adapter.validate_python(phone_number))
+            except ValueError:
+                log.warning(f"Not warming up invalid number {phone_number}")
+        close_session = False
+        if db_session is None:
+            close_session = True
+            db_session = DBEngine().get_session()
+        loaded = 0
+        try:
+            for batch in batched(phones, self.WARM_UP_BATCH_SIZE):
+                condition = col(ContactDB.phone).in_(batch)
+                results = await db_session.exec(
+                    select(ContactDB).where(condition)
+                )
+                for contact_db in results:
+                    self.put(_detach(contact_db))
+                    loaded += 1
+        finally:
+            if close_session:
+                await db_session.close()
+        log.info(f"Warmed up contact cache with {loaded}/{len(phones)} numbers")
+        return loaded
+
+    def log_stats(self) -> None:
+        log.debug(
+            f"Contact cache: {len(self._entries)} entries, {self.hits} hits "
+            f"(DB queries avoided), {self.misses} misses "
+            f"({self.hit_rate:.1%} hit rate)"
+        )
+
+    def _get_cached(self, phone: str) -> Contact | None:
+        if (entry := self._entries.get(phone)) is None:
+            self._misses.inc()
+            return None
+        expires, contact = entry
+        if expires <= monotonic():
+            del self._entries[phone]
+            self._expired.inc()
+            return None
+        self._hits.inc()
+        self._entries.move_to_end(phone)
+        return contact
+
+
+def _detach(contact_db: ContactDB) -> Contact:
+    # The data comes from the database, so there is no need to validate it
+    # again; unlike the table model, the copy is independent of the session.
+    return Contact.model_construct(**contact_db.model_dump())
@@ -1,16 +1,54 @@
+from asyncio import Future, get_running_loop
+from collections import deque
+from collections.abc import AsyncIterator, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
 from csv import DictReader
+from dataclasses import dataclass, field
+from itertools import batched
 from pathlib import Path
+from time import perf_counter
+from typing import Any
 
 from loguru import logger as log
 from pydantic import ValidationError
+from sqlalchemy import insert
 from sqlmodel import and_, col, or_, select
 
+from callbot.contact_cache import ContactCache
 from callbot.db import EngineWrapper as DBEngine, Session
+from callbot.misc.phone_number import PhoneNumberCache
 from callbot.schemas.contact import Contact, ContactDB
+from callbot.settings import Settings
 
 
-async def import_contacts(path: Path) -> None:
+ValidatedRow = tuple[int, dict[str, Any] | None, str | None]
+
+
+async def import_contacts(
+    path: Path,
+    bulk: bool = True,
+    chunk_size: int = 10_000,
+    workers: int = 1,
+) -> None:
+    """
+    Imports all valid contacts from a CSV file, skipping existing ones.
+
+    A contact is skipped, if its phone number or (non-empty) email address is
+    already taken, either by a contact in the database or by one from an
+    earlier row of the file. In `bulk` mode, rows are validated and inserted
+    in chunks of `chunk_size` rows, each chunk in a single transaction.
+    Otherwise, every row is looked up and committed separately.
+
+    With more than one of `workers`, chunks are validated in that many worker
+    processes, which implies `bulk` mode. Results are still deduplicated and
+    inserted in the order of the rows in the file.
+    """
     await DBEngine().create_tables()
+    # Cached contacts may have been replaced in the meantime.
+    ContactCache().clear()
+    if bulk or workers > 1:
+        await _bulk_import_contacts(path, chunk_size, workers)
+        return
     count_total, count_imported, count_invalid = 0, 0, 0
     async with DBEngine().get_session() as session:
         with path.open("r") as csvfile:
@@ -25,6 +63,7 @@ async def import_contacts(path: Path) -> None:
                 else:
                     count_imported += await _import_contact(session, contact)
     log.info(f"Imported {count_imported}/{count_total} rows ({count_invalid} invalid)")
+    PhoneNumberCache().log_stats()
 
 
 async def _import_contact(db_session: Session, contact: Contact) -> bool:
@@ -45,3 +84,178 @@ async def _import_contact(db_session: Session, contact: Contact) -> bool:
     else:
         log.debug(f"Skipping existing phone/email: {contact_json}")
         return False
+
+
+def validate_rows(
+    start: int,
+    rows: Iterable[dict[str, Any]],
+) -> list[ValidatedRow]:
+    """
+    Validates consecutive CSV rows, the first of which has the index `start`.
+
+    Returns the index of each row along with either the normalized contact
+    data or the JSON of the validation error.
+    """
+    results: list[ValidatedRow] = []
+    for idx, row in enumerate(rows, start):
+        try:
+            contact = Contact.model_validate(row)
+        except ValidationError as validation_error:
+            results.append((idx, None, validation_error.json()))
+        else:
+            data = contact.model_dump()
+            if data["id"] is None:
+                del data["id"]
+            results.append((idx, data, None))
+    return results
+
+
+@dataclass
+class BulkImport:
+    """
+    State of a bulk import; deduplicates validated rows against known keys.
+
+    All phone numbers and email addresses present in the database are loaded
+    into memory once. Every new contact adds its own keys, so duplicates within
+    the file are detected as well.
+    """
+    phones: set[str] = field(default_factory=set)
+    emails: set[str] = field(default_factory=set)
+    count_total: int = 0
+    count_imported: int = 0
+    count_invalid: int = 0
+    count_skipped: int = 0
+    started: float = field(default_factory=perf_counter)
+
+    async def load_keys(self, session: Session) -> None:
+        results = await session.exec(
+            select(col(ContactDB.phone), col(ContactDB.email))
+        )
+        for phone, email in results:
+            self.phones.add(phone)
+            if email is not None:
+                self.emails.add(email)
+        log.debug(
+            f"Loaded {len(self.phones)} phone numbers and {len(self.emails)} "
+            f"email addresses of existing contacts"
+        )
+
+    def new_contacts(
+        self,
+        validated: Iterable[ValidatedRow],
+    ) -> Iterator[dict[str, Any]]:
+        for idx, data, error in validated:
+            self.count_total += 1
+            if data is None:
+                log.error(f"Validation error in line {idx}: {error}")
+                self.count_invalid += 1
+                continue
+            phone, email = data["phone"], data["email"]
+            email_taken = email is not None and email in self.emails
+            if phone in self.phones or email_taken:
+                log.debug(f"Skipping existing phone/email: {phone}/{email}")
+                self.count_skipped += 1
+                continue
+            self.phones.add(phone)
+            if email is not None:
+                self.emails.add(email)
+            self.count_imported += 1
+            yield data
+
+    async def insert(
+        self,
+        session: Session,
+        contacts: list[dict[str, Any]],
+    ) -> None:
+        # Rows with an explicit ID are rare, but need their own statement.
+        with_id = [data for data in contacts if "id" in data]
+        without_id = [data for data in contacts if "id" not in data]
+        for rows in (without_id, with_id):
+            if rows:
+                await session.exec(insert(ContactDB), params=rows)
+        await session.commit()
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.count_total / max(perf_counter() - self.started, 1e-9)
+
+    def log_progress(self) -> None:
+        log.info(
+            f"Processed {self.count_total} rows: "
+            f"{self.count_imported} imported, {self.count_skipped} skipped, "
+            f"{self.count_invalid} invalid "
+            f"({self.rows_per_second:.0f} rows/s)"
+        )
+
+
+async def _bulk_import_contacts(
+    path: Path,
+    chunk_size: int,
+    workers: int,
+) -> None:
+    state = BulkImport()
+    async with DBEngine().get_session() as session:
+        await state.load_keys(session)
+        with path.open("r") as csvfile:
+            reader = DictReader(csvfile)
+            chunks = _validated_chunks(reader, chunk_size, workers)
+            async for validated in chunks:
+                await state.insert(session, list(state.new_contacts(validated)))
+                state.log_progress()
+    log.info(
+        f"Imported {state.count_imported}/{state.count_total} rows "
+        f"({state.count_invalid} invalid) at {state.rows_per_second:.0f} rows/s"
+    )
+    if workers <= 1:
+        # Workers have caches of their own.
+        PhoneNumberCache().log_stats()
+
+
+async def _validated_chunks(
+    rows: Iterable[dict[str, Any]],
+    chunk_size: int,
+    workers: int,
+) -> AsyncIterator[list[ValidatedRow]]:
+    """
+    Yields the validated rows chunk by chunk, in the order of the input.
+
+    With multiple `workers`, up to two chunks per worker are validated ahead,
+    while the caller is busy with the previous results.
+    """
+    chunks = _numbered_chunks(rows, chunk_size)
+    if workers <= 1:
+        for start, chunk in chunks:
+            yield validate_rows(start, chunk)
+        return
+    loop = get_running_loop()
+    region = Settings().misc.default_phone_region
+    with ProcessPoolExecutor(
+        workers,
+        initializer=_init_worker,
+        initargs=(region, ),
+    ) as executor:
+        pending: deque[Future[list[ValidatedRow]]] = deque()
+        for start, chunk in chunks:
+            pending.append(
+                loop.run_in_executor(executor, validate_rows, start, chunk)
+            )
+            if len(pending) >= 2 * workers:
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+
+
+def _numbered_chunks(
+    rows: Iterable[dict[str, Any]],
+    chunk_size: int,
+) -> Iterator[tuple[int, list[dict[str, Any]]]]:
+    """Yields chunks of rows along with the index of their first row."""
+    start = 0
+    for chunk in batched(rows, chunk_size):
+        yield start, list(chunk)
+        start += len(chunk)
+
+
+def _init_worker(default_phone_region: str | None) -> None:
+    # Settings changed at runtime are not necessarily seen by the workers.
+    Settings().misc.default_phone_region = default_phone_region
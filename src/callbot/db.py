@@ -1,14 +1,26 @@
 from collections.abc import AsyncIterator
+from time import perf_counter
+from typing import Any
 
 from loguru import logger as log
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExecutionContext
 from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from callbot.metrics import MetricsRegistry
 from callbot.misc.singleton import Singleton
 from callbot.settings import Settings
 
 
+_query_seconds = MetricsRegistry().histogram(
+    "callbot_db_query_duration_seconds",
+    "Duration of database queries by statement type.",
+    label_names=("statement", ),
+)
+
+
 class Session(AsyncSession):
     async def close(self) -> None:
         await super().close()
@@ -22,6 +34,35 @@ class EngineWrapper(metaclass=Singleton):
     def __init__(self) -> None:
         settings = Settings()
         self.engine = create_async_engine(settings.db.url)
+        sync_engine = self.engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", self._query_started)
+        event.listen(sync_engine, "after_cursor_execute", self._query_done)
+
+    @staticmethod
+    def _query_started(
+        _conn: Connection,
+        _cursor: Any,
+        _statement: str,
+        _parameters: Any,
+        context: ExecutionContext,
+        _executemany: bool,
+    ) -> None:
+        context._callbot_query_start = perf_counter()  # type: ignore[attr-defined]
+
+    @staticmethod
+    def _query_done(
+        _conn: Connection,
+        _cursor: Any,
+        statement: str,
+        _parameters: Any,
+        context: ExecutionContext,
+        _executemany: bool,
+    ) -> None:
+        start = getattr(context, "_callbot_query_start", None)
+        if start is None:
+            return
+        statement_type = statement.lstrip().split(maxsplit=1)[0].upper()
+        _query_seconds.labels(statement_type).observe(perf_counter() - start)
 
     async def create_tables(self, drop_first: bool = False) -> None:
         async with self.engine.begin() as conn:
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from asyncio import TimerHandle, get_running_loop
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from heapq import heapify, heappop, heappush
+from itertools import count
+
+from loguru import logger as log
+
+from callbot.misc.singleton import Singleton
+
+
+@dataclass(order=True)
+class Deadline:
+    """A callback scheduled via the `DeadlineScheduler`."""
+    when: float
+    _seq: int
+    callback: Callable[[], None] = field(compare=False)
+    _scheduler: DeadlineScheduler = field(compare=False, repr=False)
+    active: bool = field(default=True, compare=False)
+
+    def cancel(self) -> None:
+        if self.active:
+            self.active = False
+            self._scheduler._cancelled(self)
+
+
+class DeadlineScheduler(metaclass=Singleton):
+    """
+    Runs the deadlines of all calls from a single timer on the event loop.
+
+    Deadlines are kept in a heap; only the earliest one has a timer handle on
+    the loop, so no call is woken up periodically. Cancelled deadlines stay in
+    the heap, until they reach the top or more than half of the heap consists
+    of them, in which case it is rebuilt. Arming and disarming a deadline
+    therefore is O(log n) in the number of pending deadlines.
+    """
+    _heap: list[Deadline]
+    _timer: TimerHandle | None
+
+    def __init__(self) -> None:
+        self.fired = 0
+        self.cancelled = 0
+        self._heap = []
+        self._seq = count()
+        self._stale = 0
+        self._timer = None
+        self._timer_when = float("inf")
+
+    @property
+    def pending(self) -> int:
+        return len(self._heap) - self._stale
+
+    def call_later(
+        self,
+        delay: float,
+        callback: Callable[[], None],
+    ) -> Deadline:
+        return self.call_at(get_running_loop().time() + delay, callback)
+
+    def call_at(self, when: float, callback: Callable[[], None]) -> Deadline:
+        """Schedules `callback` at `when` in terms of the loop's clock."""
+        deadline = Deadline(when, next(self._seq), callback, self)
+        heappush(self._heap, deadline)
+        if when < self._timer_when:
+            self._arm()
+        return deadline
+
+    def _cancelled(self, _deadline: Deadline) -> None:
+        self.cancelled += 1
+        self._stale += 1
+        if self._stale > 64 and self._stale > len(self._heap) // 2:
+            self._heap = [item for item in self._heap if item.active]
+            heapify(self._heap)
+            self._stale = 0
+
+    def _arm(self) -> None:
+        while self._heap and not self._heap[0].active:
+            heappop(self._heap)
+            self._stale -= 1
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+            self._timer_when = float("inf")
+        if not self._heap:
+            return
+        self._timer_when = self._heap[0].when
+        self._timer = get_running_loop().call_at(self._timer_when, self._fire)
+
+    def _fire(self) -> None:
+        self._timer = None
+        self._timer_when = float("inf")
+        now = get_running_loop().time()
+        while self._heap and self._heap[0].when <= now:
+            deadline = heappop(self._heap)
+            if not deadline.active:
+                self._stale -= 1
+                continue
+            deadline.active = False
+            self.fired += 1
+            try:
+                deadline.callback()
+            except Exception as e:
+                log.exception(f"Error in deadline callback: {e}")
+        self._arm()
+
+    def log_stats(self) -> None:
+        log.debug(
+            f"Deadline scheduler: {self.fired} fired, {self.cancelled} "
+            f"cancelled, {self.pending} pending"
+        )
@@ -46,6 +46,23 @@ class SpeechStartTimeout(EndCallWarning):
         super().__init__(f"Speech has not started after {seconds} seconds.")
 
 
+class MaxCallDurationReached(EndCallWarning):
+    def __init__(self, seconds: float) -> None:
+        super().__init__(f"Maximum call duration of {seconds} seconds reached.")
+
+
+class TwilioIdleTimeout(EndCallWarning):
+    def __init__(self, seconds: float) -> None:
+        super().__init__(f"No message from Twilio for {seconds} seconds.")
+
+
+class ElevenlabsUnavailable(EndCallError):
+    def __init__(self, seconds: float) -> None:
+        super().__init__(
+            f"Elevenlabs connection not established within {seconds} seconds."
+        )
+
+
 class TwilioStop(EndCallInfo):
     def __init__(self) -> None:
         super().__init__("Twilio stop message received.")
@@ -103,3 +120,8 @@ class JTIReused(AuthException):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="JTI already used",
         )
+
+
+class CampaignRunning(CallbotException):
+    def __init__(self, name: str) -> None:
+        super().__init__(f"Campaign {name} is already running.")
@@ -4,13 +4,14 @@ from .after_function_call import AfterFunctionCallHook
 from .before_conversation_start import BeforeConversationStartHook
 from .before_function_call import BeforeFunctionCallHook
 from .before_startup import BeforeStartupHook
-from .hook import Callback, Hook
+from .hook import BackgroundHooks, Callback, Hook
 
 
 __all__ = [
     "AfterCallEndHook",
     "AfterCallStartHook",
     "AfterFunctionCallHook",
+    "BackgroundHooks",
     "BeforeConversationStartHook",
     "BeforeFunctionCallHook",
     "BeforeStartupHook",
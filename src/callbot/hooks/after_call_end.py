@@ -7,9 +7,14 @@ from .hook import Hook
 
 if TYPE_CHECKING:
     from callbot.call_manager import CallManager
+    from callbot.latency import LatencyTimeline
 
 
 @dataclass
 class AfterCallEndHook(Hook):
     call_manager: CallManager
     exceptions: ExceptionGroup | None
+
+    @property
+    def latency(self) -> LatencyTimeline:
+        return self.call_manager.latency
@@ -3,21 +3,48 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from asyncio import gather
+from asyncio import Queue, QueueFull, Task, create_task, gather, timeout
+from collections.abc import Awaitable
+from contextlib import suppress
 from importlib.metadata import EntryPoint, EntryPoints, entry_points
+from time import perf_counter
 from typing import Any, ClassVar, Self
 
 from loguru import logger as log
 
+from callbot.metrics import MetricsRegistry
 from callbot.misc.generic_insight import GenericInsightMixin1
+from callbot.misc.singleton import Singleton
 from callbot.misc.util import is_subclass
+from callbot.settings import Settings
+
+
+_registry = MetricsRegistry()
+_callback_seconds = _registry.histogram(
+    "callbot_hook_callback_duration_seconds",
+    "Duration of hook callbacks.",
+    label_names=("hook", "callback"),
+)
+_callback_timeouts = _registry.counter(
+    "callbot_hook_callback_timeouts_total",
+    "Hook callbacks cancelled after exceeding the configured timeout.",
+    label_names=("hook", "callback"),
+)
+_dropped = _registry.counter(
+    "callbot_hook_dispatches_dropped_total",
+    "Hooks not run, because the background hooks were full or stopped.",
+    label_names=("hook", ),
+)
 
 
 class Hook:
-    __loaded_callbacks: ClassVar[dict[type[Hook], dict[str, Callback]]] = {}
+    __loaded_callbacks: ClassVar[dict[type[Hook], dict[str, Callback[Any]]]] = {}
 
     @classmethod
-    def get_callbacks_for(cls, hook: Self | type[Self]) -> dict[str, Callback]:
+    def get_callbacks_for(
+        cls,
+        hook: Self | type[Self],
+    ) -> dict[str, Callback[Any]]:
         hook_cls = hook.__class__ if isinstance(hook, Hook) else hook
         if hook_cls not in cls.__loaded_callbacks:
             cls.__loaded_callbacks[hook_cls] = {}
@@ -51,19 +78,156 @@ class Hook:
         return self.__class__.__name__
 
     async def dispatch(self) -> None:
+        """
+        Runs the callbacks of this hook as configured for its type.
+
+        With `inline`, all callbacks are awaited; `timeout` does the same, but
+        cancels callbacks running longer than the configured timeout. With
+        `background`, the hook is only queued for the `BackgroundHooks`, where
+        the timeout applies as well.
+        """
         callbacks = Hook.get_callbacks_for(self)
         if not callbacks:
             log.debug(f"No callbacks to dispatch {self} to")
             return
-        names, coroutines = zip(
-            *((name, callback(self)) for name, callback in callbacks.items())
-        )
+        settings = Settings().hooks
+        mode = settings.dispatch_mode(str(self))
+        if mode == "background":
+            BackgroundHooks().submit(self)
+            return
+        timeout_seconds = None
+        if mode == "timeout":
+            timeout_seconds = settings.timeout_seconds
+        await self._run(callbacks, timeout_seconds, settings.slow_callback_ms)
+
+    async def _run(
+        self,
+        callbacks: dict[str, Callback[Any]],
+        timeout_seconds: float | None = None,
+        slow_ms: float | None = None,
+    ) -> None:
+        names, coroutines = zip(*(
+            (name, self._timed(name, callback(self), timeout_seconds, slow_ms))
+            for name, callback in callbacks.items()
+        ), strict=True)
         log.debug(f"Dispatching {self} to callbacks: {list(names)}")
         outputs = await gather(*coroutines, return_exceptions=True)
         for idx, output in enumerate(outputs):
             if isinstance(output, Exception):
                 log.error(f"Exception in hook callback {names[idx]}: {output}")
 
+    async def _timed(
+        self,
+        name: str,
+        callback: Awaitable[None],
+        timeout_seconds: float | None = None,
+        slow_ms: float | None = None,
+    ) -> None:
+        start = perf_counter()
+        deadline = timeout(timeout_seconds)
+        try:
+            async with deadline:
+                await callback
+        except TimeoutError:
+            if deadline.expired():
+                _callback_timeouts.labels(str(self), name).inc()
+                raise TimeoutError(
+                    f"Cancelled after {timeout_seconds} s"
+                ) from None
+            raise
+        finally:
+            duration = perf_counter() - start
+            _callback_seconds.labels(str(self), name).observe(duration)
+            if slow_ms is not None and duration * 1000 >= slow_ms:
+                log.warning(
+                    f"Slow hook callback {name} for {self}{self._call_info()}: "
+                    f"{duration * 1000:.1f} ms"
+                )
+
+    def _call_info(self) -> str:
+        call_manager = getattr(self, "call_manager", None)
+        if (call_sid := getattr(call_manager, "call_sid", None)) is None:
+            return ""
+        return f" (call {call_sid})"
+
+
+class BackgroundHooks(metaclass=Singleton):
+    """
+    Bounded pool of workers running the callbacks of hooks in the background.
+
+    Hooks are queued by `Hook.dispatch` and run in order by a fixed number of
+    worker tasks, which are started on first use. A hook is dropped, if the
+    queue is full, so that dispatching it never blocks, or if the workers
+    have already been stopped.
+    """
+    _queue: Queue[Hook]
+    _workers: list[Task[None]]
+
+    def __init__(self) -> None:
+        settings = Settings().hooks
+        self.workers = settings.background_workers
+        self.timeout_seconds = settings.timeout_seconds
+        self.slow_callback_ms = settings.slow_callback_ms
+        self.queued = 0
+        self.dropped = 0
+        self._queue = Queue(settings.background_queue_size)
+        self._workers = []
+        self._stopped = False
+
+    def submit(self, hook: Hook) -> None:
+        if self._stopped:
+            self.dropped += 1
+            _dropped.labels(str(hook)).inc()
+            log.error(f"Background hooks have been stopped, dropping {hook}")
+            return
+        try:
+            self._queue.put_nowait(hook)
+        except QueueFull:
+            self.dropped += 1
+            _dropped.labels(str(hook)).inc()
+            log.error(f"Background hook queue is full, dropping {hook}")
+            return
+        self.queued += 1
+        if not self._workers:
+            self._workers = [
+                create_task(self._work(), name=f"background_hooks_{idx}")
+                for idx in range(self.workers)
+            ]
+
+    async def stop(self) -> None:
+        """Gives queued hooks up to the timeout to finish, then stops."""
+        self._stopped = True
+        if not self._workers:
+            return
+        with suppress(TimeoutError):
+            async with timeout(self.timeout_seconds):
+                await self._queue.join()
+        for worker in self._workers:
+            worker.cancel()
+        await gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def log_stats(self) -> None:
+        log.debug(
+            f"Background hooks: {self.queued} queued, {self.dropped} dropped, "
+            f"{self._queue.qsize()} left"
+        )
+
+    async def _work(self) -> None:
+        while True:
+            hook = await self._queue.get()
+            try:
+                callbacks = Hook.get_callbacks_for(hook)
+                await hook._run(
+                    callbacks,
+                    self.timeout_seconds,
+                    self.slow_callback_ms,
+                )
+            except Exception as e:
+                log.exception(f"Failed to run {hook} in the background: {e}")
+            finally:
+                self._queue.task_done()
+
 
 class Callback[_H: Hook](GenericInsightMixin1[_H], ABC):
     @classmethod
@@ -0,0 +1,135 @@
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any, Literal, TypeAlias
+
+from loguru import logger as log
+
+from callbot.metrics import DEFAULT_BUCKETS_MS, Histogram, MetricsRegistry
+from callbot.misc.singleton import Singleton
+
+
+Milestone: TypeAlias = Literal[
+    "speech_stopped",
+    "response_created",
+    "first_audio",
+    "first_mark_ack",
+    "done_mark_ack",
+]
+
+# Intervals between milestones of the same turn, which are tracked process-wide.
+INTERVALS: tuple[tuple[Milestone, Milestone], ...] = (
+    ("speech_stopped", "response_created"),
+    ("speech_stopped", "first_audio"),
+    ("speech_stopped", "first_mark_ack"),
+    ("response_created", "first_audio"),
+    ("first_audio", "first_mark_ack"),
+    ("first_audio", "done_mark_ack"),
+)
+
+
+class LatencyHistograms(metaclass=Singleton):
+    """Process-wide histograms of the `INTERVALS` in milliseconds."""
+    histograms: dict[tuple[Milestone, Milestone], Histogram]
+
+    def __init__(self) -> None:
+        registry = MetricsRegistry()
+        self._turns = registry.counter(
+            "callbot_turns_total",
+            "Number of conversational turns.",
+        ).labels()
+        metric = registry.histogram(
+            "callbot_turn_latency_milliseconds",
+            "Time between two milestones of the same turn.",
+            label_names=("start", "end"),
+            buckets=DEFAULT_BUCKETS_MS,
+        )
+        self.histograms = {
+            interval: metric.labels(*interval) for interval in INTERVALS
+        }
+
+    @property
+    def turns(self) -> int:
+        return int(self._turns.value)
+
+    def turn_started(self) -> None:
+        self._turns.inc()
+
+    def observe(self, start: Milestone, end: Milestone, ms: float) -> None:
+        self.histograms[start, end].observe(ms)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "turns": self.turns,
+            "intervals_ms": {
+                f"{start}-{end}": histogram.to_dict()
+                for (start, end), histogram in self.histograms.items()
+            },
+        }
+
+
+@dataclass
+class Turn:
+    """Milestones of a single turn in milliseconds since the turn started."""
+    started_ms: float
+    milestones: dict[Milestone, float] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, float]:
+        milestones = {name: round(ms, 1) for name, ms in self.milestones.items()}
+        return {"at_ms": round(self.started_ms, 1)} | milestones
+
+    def __str__(self) -> str:
+        return " ".join(
+            f"{milestone}+{ms:.0f}" for milestone, ms in self.milestones.items()
+        )
+
+
+@dataclass
+class LatencyTimeline:
+    """
+    Records when each turn of a call reaches each `Milestone`.
+
+    A turn starts, when the contact stops speaking, or when a response is
+    created without the contact having spoken (e.g. the greeting). Every
+    milestone is only recorded once per turn; mark acknowledgements only count
+    after audio of the turn has been sent, since those of an interrupted
+    response may still arrive. Intervals are added to the `LatencyHistograms`
+    as soon as both of their milestones are recorded.
+    """
+    turns: list[Turn] = field(default_factory=list)
+    _started: float = field(default_factory=perf_counter)
+    _turn_started: float = 0.
+
+    def record(self, milestone: Milestone) -> None:
+        now = perf_counter()
+        turn = self.turns[-1] if self.turns else None
+        match milestone:
+            case "speech_stopped":
+                turn = self._start_turn(now)
+            case "response_created":
+                if turn is None or milestone in turn.milestones:
+                    turn = self._start_turn(now)
+            case "first_mark_ack" | "done_mark_ack":
+                if turn is None or "first_audio" not in turn.milestones:
+                    return
+        if turn is None or milestone in turn.milestones:
+            return
+        ms = (now - self._turn_started) * 1000
+        turn.milestones[milestone] = ms
+        histograms = LatencyHistograms()
+        for start, end in INTERVALS:
+            if end == milestone and start in turn.milestones:
+                histograms.observe(start, end, ms - turn.milestones[start])
+
+    def to_list(self) -> list[dict[str, float]]:
+        return [turn.to_dict() for turn in self.turns]
+
+    def log(self) -> None:
+        for idx, turn in enumerate(self.turns):
+            log.debug(f"Turn {idx} at {turn.started_ms:.0f} ms: {turn}")
+
+    def _start_turn(self, now: float) -> Turn:
+        self._turn_started = now
+        turn = Turn(started_ms=(now - self._started) * 1000)
+        self.turns.append(turn)
+        LatencyHistograms().turn_started()
+        return turn
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import logging
+from asyncio import (
+    AbstractEventLoop,
+    BaseEventLoop,
+    Handle,
+    Task,
+    create_task,
+    get_running_loop,
+    sleep,
+)
+from contextlib import suppress
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, TYPE_CHECKING
+
+from loguru import logger as log
+
+from callbot.metrics import MetricsRegistry
+from callbot.misc.singleton import Singleton
+from callbot.settings import Settings
+
+if TYPE_CHECKING:
+    from callbot.call_manager import CallManager
+
+
+# Set by `CallManager.run` and thereby inherited by every task of the call.
+current_call: ContextVar[CallManager] = ContextVar("current_call")
+
+# Logged by asyncio's event loop in debug mode, see `slow_callback_duration`.
+SLOW_CALLBACK_MESSAGE = "Executing %s took %.3f seconds"
+
+
+class LoopMonitor(metaclass=Singleton):
+    """
+    Watches the event loop shared by all calls for signs of overload.
+
+    A background task measures how late the loop wakes it up (the loop lag),
+    which works on any event loop, including uvloop.
+
+    Optionally, for debugging, callbacks blocking the loop for too long are
+    attributed to the call they belong to (via `current_call`) and the name
+    and coroutine of their task. This puts asyncio's own event loop into
+    debug mode and turns the warnings it logs about slow callbacks (see
+    `slow_callback_duration`) into reports of the monitor. Debug mode slows
+    down the loop, so this is meant for tracking down a problem only.
+    """
+    _debug_loop: AbstractEventLoop | None
+    _task: Task[None] | None
+
+    def __init__(self) -> None:
+        settings = Settings()
+        self.enabled = settings.loop_monitor.enabled
+        self.sample_interval = settings.loop_monitor.sample_interval_ms / 1000
+        self.lag_warning = settings.loop_monitor.lag_warning_ms / 1000
+        slow_callback_ms = settings.loop_monitor.slow_callback_ms
+        self.slow_callback = (
+            None if slow_callback_ms is None else slow_callback_ms / 1000
+        )
+        registry = MetricsRegistry()
+        self._lag_seconds = registry.histogram(
+            "callbot_event_loop_lag_seconds",
+            "Delay of the event loop in waking up a sleeping task.",
+        ).labels()
+        self._slow_callback_seconds = registry.histogram(
+            "callbot_slow_callback_duration_seconds",
+            "Duration of callbacks, which blocked the event loop for too long.",
+            label_names=("source", ),
+        )
+        self.max_lag = 0.
+        self.slow_callbacks = 0
+        self._debug_loop = None
+        self._was_debug = False
+        self._filter = _SlowCallbackFilter(self)
+        self._task = None
+
+    def start(self) -> None:
+        if not self.enabled or self._task is not None:
+            return
+        log.info("Starting event loop monitor")
+        if self.slow_callback is not None:
+            self._enable_debug(get_running_loop(), self.slow_callback)
+        self._task = create_task(self._sample_lag(), name="loop_monitor")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(BaseException):
+                await self._task
+            self._task = None
+        self._disable_debug()
+
+    def log_stats(self) -> None:
+        log.debug(
+            f"Event loop monitor: {self.max_lag * 1000:.1f} ms maximum lag, "
+            f"{self.slow_callbacks} slow callbacks"
+        )
+
+    async def _sample_lag(self) -> None:
+        while True:
+            start = perf_counter()
+            await sleep(self.sample_interval)
+            lag = max(perf_counter() - start - self.sample_interval, 0.)
+            self._lag_seconds.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.lag_warning:
+                log.warning(f"Event loop lagging by {lag * 1000:.1f} ms")
+
+    def _enable_debug(self, loop: AbstractEventLoop, threshold: float) -> None:
+        # Other loops, e.g. uvloop, do not report slow callbacks the same way.
+        if not isinstance(loop, BaseEventLoop):
+            log.warning(
+                "Slow callbacks cannot be detected on this event loop: "
+                f"{type(loop).__module__}"
+            )
+            return
+        log.warning("Event loop debug mode enabled to detect slow callbacks")
+        self._debug_loop = loop
+        self._was_debug = loop.get_debug()
+        loop.set_debug(True)
+        loop.slow_callback_duration = threshold
+        logging.getLogger("asyncio").addFilter(self._filter)
+
+    def _disable_debug(self) -> None:
+        if (loop := self._debug_loop) is None:
+            return
+        logging.getLogger("asyncio").removeFilter(self._filter)
+        loop.set_debug(self._was_debug)
+        self._debug_loop = None
+
+    def _report_slow(self, handle: Handle, duration: float) -> None:
+        self.slow_callbacks += 1
+        callback: Any = handle._callback  # type: ignore[attr-defined]
+        owner = getattr(callback, "__self__", None)
+        if isinstance(owner, Task):
+            coro = owner.get_coro()
+            task = owner.get_name()
+            source = getattr(coro, "__qualname__", type(coro).__qualname__)
+        else:
+            task = "-"
+            source = getattr(
+                callback,
+                "__qualname__",
+                type(callback).__qualname__,
+            )
+        self._slow_callback_seconds.labels(source).observe(duration)
+        context = handle._context  # type: ignore[attr-defined]
+        call = context.get(current_call) if context is not None else None
+        call_sid = (call.call_sid or "unknown") if call is not None else "-"
+        log.warning(
+            f"Event loop blocked for {duration * 1000:.1f} ms by {source} "
+            f"(task: {task}, call: {call_sid})"
+        )
+
+
+class _SlowCallbackFilter(logging.Filter):
+    """
+    Replaces asyncio's warnings about slow callbacks with monitor reports.
+
+    The warning is logged right after the callback has run, while the loop
+    still refers to its handle, which carries the callback and its context.
+    """
+
+    def __init__(self, monitor: LoopMonitor) -> None:
+        super().__init__()
+        self.monitor = monitor
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        loop = self.monitor._debug_loop
+        if record.msg != SLOW_CALLBACK_MESSAGE or loop is None:
+            return True
+        handle = getattr(loop, "_current_handle", None)
+        if not isinstance(handle, Handle) or not isinstance(record.args, tuple):
+            return True
+        _, duration = record.args
+        if not isinstance(duration, float):
+            return True
+        self.monitor._report_slow(handle, duration)
+        return False
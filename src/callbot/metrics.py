@@ -0,0 +1,364 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from typing import Any, ClassVar
+
+from callbot.misc.singleton import Singleton
+
+
+DEFAULT_BUCKETS_MS = (
+    50., 100., 200., 300., 500., 750., 1000., 1500., 2000., 3000., 5000., 10000.
+)
+DEFAULT_BUCKETS_SECONDS = (
+    .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1., 2.5, 5., 10.
+)
+
+Labels = tuple[str, ...]
+Sample = tuple[str, Labels, float]
+
+
+class Histogram:
+    """
+    Fixed bucket histogram of observed values.
+
+    A value falls into the first bucket whose upper bound it does not exceed;
+    values larger than the last bound are counted in an implicit overflow
+    bucket. Quantiles are estimated by linear interpolation within a bucket.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS_MS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.
+
+    def observe(self, value: float) -> None:
+        self.bucket_counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float | None:
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for idx, bucket_count in enumerate(self.bucket_counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[idx - 1] if idx else 0.
+                if idx == len(self.buckets):
+                    # Nothing better to report for the overflow bucket.
+                    return lower
+                upper = self.buckets[idx]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def to_dict(self) -> dict[str, Any]:
+        cumulative = 0
+        buckets = {}
+        # The overflow bucket is covered by `+Inf`.
+        bucket_counts = self.bucket_counts[:-1]
+        for bound, bucket_count in zip(
+            self.buckets, bucket_counts, strict=True,
+        ):
+            cumulative += bucket_count
+            buckets[f"{bound:g}"] = cumulative
+        buckets["+Inf"] = self.count
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(.5),
+            "p90": self.quantile(.9),
+            "p99": self.quantile(.99),
+            "buckets": buckets,
+        }
+
+
+class Value:
+    """A single, mutable number; the child of a counter or gauge."""
+    __slots__ = ("value", )
+
+    def __init__(self) -> None:
+        self.value = 0.
+
+    def inc(self, amount: float = 1.) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Metric[ChildT](ABC):
+    """
+    Base class of a metric family with zero or more label names.
+
+    Each combination of label values has its own child, which is created on
+    first use via `labels`. Children are meant to be looked up once and kept,
+    where a metric is updated in a hot path; updating a child is then nothing
+    more than an attribute increment.
+    """
+    type: ClassVar[str]
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._children: dict[Labels, ChildT] = {}
+
+    def labels(self, *values: str) -> ChildT:
+        if (child := self._children.get(values)) is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(
+                    f"Metric {self.name} expects labels {self.label_names}"
+                )
+            child = self._children[values] = self._new_child()
+        return child
+
+    @abstractmethod
+    def _new_child(self) -> ChildT:
+        ...
+
+    @abstractmethod
+    def samples(self) -> Iterator[Sample]:
+        ...
+
+    def expose(self, constant_labels: Mapping[str, str] | None = None) -> str:
+        """
+        Returns the metric in the Prometheus text exposition format.
+
+        The `constant_labels` are added to every sample, before its own labels.
+        """
+        constant = [
+            f'{name}="{_escape(value)}"'
+            for name, value in (constant_labels or {}).items()
+        ]
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for name, labels, value in self.samples():
+            formatted = self._format_labels(labels, constant)
+            lines.append(f"{name}{formatted} {value:g}")
+        return "\n".join(lines)
+
+    def _format_labels(self, values: Labels, constant: list[str]) -> str:
+        names = self.label_names
+        if len(values) > len(names):
+            # Histogram buckets carry an additional `le` label.
+            names += ("le", )
+        pairs = constant + [
+            f'{name}="{_escape(value)}"'
+            for name, value in zip(names, values, strict=True)
+        ]
+        if not pairs:
+            return ""
+        return "{" + ",".join(pairs) + "}"
+
+
+class Counter(Metric[Value]):
+    type = "counter"
+
+    def inc(self, amount: float = 1.) -> None:
+        self.labels().inc(amount)
+
+    def _new_child(self) -> Value:
+        return Value()
+
+    def samples(self) -> Iterator[Sample]:
+        for labels, child in self._children.items():
+            yield self.name, labels, child.value
+
+
+class Gauge(Metric[Value]):
+    """
+    A value that can go up and down.
+
+    Instead of being set explicitly, a gauge may be computed on collection by
+    a `function`, which returns either a single value or a mapping of label
+    values to values. This costs nothing until the metrics are scraped.
+    """
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        function: Callable[[], float | Mapping[Labels, float]] | None = None,
+    ) -> None:
+        super().__init__(name, documentation, label_names)
+        self.function = function
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def inc(self, amount: float = 1.) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.) -> None:
+        self.labels().dec(amount)
+
+    def _new_child(self) -> Value:
+        return Value()
+
+    def samples(self) -> Iterator[Sample]:
+        if self.function is not None:
+            result = self.function()
+            if not isinstance(result, Mapping):
+                result = {(): result}
+            for labels, value in result.items():
+                yield self.name, labels, value
+            return
+        for labels, child in self._children.items():
+            yield self.name, labels, child.value
+
+
+class HistogramMetric(Metric[Histogram]):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS_SECONDS,
+    ) -> None:
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _new_child(self) -> Histogram:
+        return Histogram(self.buckets)
+
+    def samples(self) -> Iterator[Sample]:
+        for labels, child in self._children.items():
+            cumulative = 0
+            # The overflow bucket is covered by `+Inf`.
+            bucket_counts = child.bucket_counts[:-1]
+            for bound, bucket_count in zip(
+                child.buckets, bucket_counts, strict=True,
+            ):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", labels + (f"{bound:g}", ), cumulative
+            yield f"{self.name}_bucket", labels + ("+Inf", ), child.count
+            yield f"{self.name}_sum", labels, child.sum
+            yield f"{self.name}_count", labels, child.count
+
+
+class MetricsRegistry(metaclass=Singleton):
+    """
+    Process-wide registry of all metrics, exposed via the `/metrics` endpoint.
+
+    Plugins register their own metrics via `counter`, `gauge` and `histogram`,
+    e.g. in a `BeforeStartupHook` callback or at import time. These return the
+    already registered metric, if one of the same name and type exists.
+
+    The `constant_labels` are added to all exposed samples; each worker of
+    `serve --workers N` adds its index as the `worker` label, for instance,
+    since every worker only exposes its own metrics.
+    """
+    constant_labels: dict[str, str]
+    _metrics: dict[str, Metric[Any]]
+
+    def __init__(self) -> None:
+        self.constant_labels = {}
+        self._metrics = {}
+
+    def register[M: Metric[Any]](self, metric: M) -> M:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Metric[Any] | None:
+        return self._metrics.get(name)
+
+    def counter(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+    ) -> Counter:
+        return self._get_or_register(Counter, name, documentation, label_names)
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        function: Callable[[], float | Mapping[Labels, float]] | None = None,
+    ) -> Gauge:
+        return self._get_or_register(
+            Gauge,
+            name,
+            documentation,
+            label_names,
+            function=function,
+        )
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS_SECONDS,
+    ) -> HistogramMetric:
+        return self._get_or_register(
+            HistogramMetric,
+            name,
+            documentation,
+            label_names,
+            buckets=buckets,
+        )
+
+    def expose(self) -> str:
+        """Returns all metrics in the Prometheus text exposition format."""
+        exposed = (
+            metric.expose(self.constant_labels)
+            for metric in self._metrics.values()
+        )
+        return "\n".join(exposed) + "\n"
+
+    def _get_or_register[M: Metric[Any]](
+        self,
+        metric_cls: type[M],
+        name: str,
+        documentation: str,
+        label_names: Sequence[str],
+        **kwargs: Any,
+    ) -> M:
+        if (metric := self._metrics.get(name)) is None:
+            return self.register(
+                metric_cls(name, documentation, label_names, **kwargs)
+            )
+        if type(metric) is not metric_cls or metric.label_names != tuple(label_names):
+            raise ValueError(
+                f"Metric {name} is already registered as a different "
+                f"{metric.type} with labels {metric.label_names}"
+            )
+        return metric
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def websocket_messages() -> Counter:
+    """Counter shared by all websocket connections of the callbot."""
+    return MetricsRegistry().counter(
+        "callbot_websocket_messages_total",
+        "Websocket messages by peer, direction and message type.",
+        label_names=("peer", "direction", "type"),
+    )
@@ -0,0 +1,34 @@
+from asyncio import Event
+from collections.abc import Callable
+
+
+class ObservedEvent(Event):
+    """
+    An `asyncio.Event`, which notifies an observer whenever its state changes.
+
+    The observer is called with the new state after `set` or `clear` actually
+    changed it; redundant calls are not reported.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._observers: list[Callable[[bool], None]] = []
+
+    def observe(self, observer: Callable[[bool], None]) -> None:
+        self._observers.append(observer)
+
+    def set(self) -> None:
+        if self.is_set():
+            return
+        super().set()
+        self._notify(True)
+
+    def clear(self) -> None:
+        if not self.is_set():
+            return
+        super().clear()
+        self._notify(False)
+
+    def _notify(self, state: bool) -> None:
+        for observer in self._observers:
+            observer(state)
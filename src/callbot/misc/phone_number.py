@@ -1,11 +1,119 @@
+from collections import OrderedDict
 from collections.abc import Sequence
 from typing import Any
 
+from loguru import logger as log
+from pydantic_core import PydanticCustomError
 from pydantic_extra_types import phone_numbers
 
+from callbot.metrics import MetricsRegistry
+from callbot.misc.singleton import Singleton
 from callbot.settings import Settings
 
 
+# Normalized number or type and message template of the validation error
+CachedResult = str | tuple[str, str]
+CacheKey = tuple[str | None, str, tuple[str, ...] | None, str]
+
+
+class PhoneNumberCache(metaclass=Singleton):
+    """
+    Bounded LRU cache of phone number normalization results.
+
+    Failures are cached as well, since invalid numbers tend to be repeated just
+    like valid ones. Keys include the region the number is parsed with; all
+    entries are dropped, when the `default_phone_region` setting changes.
+    """
+    _entries: OrderedDict[CacheKey, CachedResult]
+
+    def __init__(self) -> None:
+        self.max_size = Settings().misc.phone_number_cache_size
+        self._entries = OrderedDict()
+        self._region = Settings().misc.default_phone_region
+        lookups = MetricsRegistry().counter(
+            "callbot_phone_number_cache_lookups_total",
+            "Lookups in the phone number normalization cache by result.",
+            label_names=("result", ),
+        )
+        self._hits = lookups.labels("hit")
+        self._misses = lookups.labels("miss")
+
+    @property
+    def hits(self) -> int:
+        return int(self._hits.value)
+
+    @property
+    def misses(self) -> int:
+        return int(self._misses.value)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.
+
+    def parse(
+        self,
+        region: str | None,
+        number_format: str,
+        supported_regions: Sequence[str] | None,
+        phone_number: Any,
+    ) -> str:
+        default_region = Settings().misc.default_phone_region
+        if default_region != self._region:
+            log.debug(
+                f"Default phone region changed to {default_region}, "
+                f"clearing {len(self._entries)} cached phone numbers"
+            )
+            self._entries.clear()
+            self._region = default_region
+        region = region or default_region
+        if not self.max_size or type(phone_number) is not str:
+            return _parse(
+                region,
+                number_format,
+                supported_regions,
+                phone_number,
+            )
+        key = (
+            region,
+            number_format,
+            None if supported_regions is None else tuple(supported_regions),
+            phone_number,
+        )
+        result = self._entries.get(key)
+        if result is not None:
+            self._hits.inc()
+            self._entries.move_to_end(key)
+        else:
+            self._misses.inc()
+            try:
+                result = _parse(
+                    region,
+                    number_format,
+                    supported_regions,
+                    phone_number,
+                )
+            except PydanticCustomError as error:
+                result = (error.type, error.message_template)
+            self._entries[key] = result
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        if isinstance(result, tuple):
+            # A new error each time, to not chain up tracebacks on a shared one.
+            raise PydanticCustomError(*result)
+        return result
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def log_stats(self) -> None:
+        log.debug(
+            f"Phone number cache: {len(self._entries)} entries, "
+            f"{self.hits} hits, {self.misses} misses "
+            f"({self.hit_rate:.1%} hit rate)"
+        )
+
+
 class PhoneNumberValidator(phone_numbers.PhoneNumberValidator):
     @staticmethod
     def _parse(
@@ -14,9 +122,12 @@ class PhoneNumberValidator(phone_numbers.PhoneNumberValidator):
         supported_regions: Sequence[str] | None,
         phone_number: Any,
     ) -> str:
-        return phone_numbers.PhoneNumberValidator._parse(
-            region or Settings().misc.default_phone_region,
+        return PhoneNumberCache().parse(
+            region,
             number_format,
             supported_regions,
             phone_number,
         )
+
+
+_parse = phone_numbers.PhoneNumberValidator._parse
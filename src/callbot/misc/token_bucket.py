@@ -0,0 +1,51 @@
+from asyncio import Lock, sleep
+from time import monotonic
+
+
+class TokenBucket:
+    """
+    Limits the rate of some operation to `rate` per second on average.
+
+    Tokens are refilled continuously, up to `capacity`; the capacity is thus
+    the maximum burst size. Concurrent callers of `acquire` are served in the
+    order they arrived. The bucket can be paused, e.g. when the other side
+    asks to retry after some time, in which case no tokens are handed out and
+    the bucket starts out empty afterwards.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.waited = 0.
+        self._tokens = capacity
+        self._updated = monotonic()
+        self._paused_until = 0.
+        self._lock = Lock()
+
+    async def acquire(self) -> float:
+        """Waits for a token and returns the number of seconds waited."""
+        started = monotonic()
+        async with self._lock:
+            while True:
+                now = monotonic()
+                if now < self._paused_until:
+                    await sleep(self._paused_until - now)
+                    continue
+                elapsed = now - max(self._updated, self._paused_until)
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + max(elapsed, 0.) * self.rate,
+                )
+                self._updated = now
+                if self._tokens >= 1.:
+                    self._tokens -= 1.
+                    break
+                await sleep((1. - self._tokens) / self.rate)
+        waited = monotonic() - started
+        self.waited += waited
+        return waited
+
+    def pause(self, seconds: float) -> None:
+        """Hands out no tokens for the given number of seconds from now."""
+        self._paused_until = max(self._paused_until, monotonic() + seconds)
+        self._tokens = 0.
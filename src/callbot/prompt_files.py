@@ -0,0 +1,122 @@
+from asyncio import Task, create_task, sleep, to_thread
+from collections.abc import Callable
+from contextlib import suppress
+from dataclasses import dataclass
+from os import stat_result
+from pathlib import Path
+from string import Template
+
+from loguru import logger as log
+
+from callbot.metrics import MetricsRegistry
+from callbot.misc.singleton import Singleton
+from callbot.settings import Settings
+
+
+_reloads = MetricsRegistry().counter(
+    "callbot_prompt_file_reloads_total",
+    "Prompt and instructions files loaded again after they were changed.",
+).labels()
+
+
+@dataclass(frozen=True)
+class PromptFile:
+    """Contents of a prompt file as of its last modification."""
+    text: str
+    template: Template
+    modified: tuple[int, int]
+
+    @classmethod
+    def load(cls, path: Path) -> "PromptFile":
+        modified = _modified(path.stat())
+        text = path.read_text().strip()
+        return cls(text, Template(text), modified)
+
+
+class PromptFiles(metaclass=Singleton):
+    """
+    Cache of the prompt and instructions files used by the backends.
+
+    Each file is read once, when it is first requested. Afterwards, a
+    background task checks the modification time of all requested files
+    every `prompt_reload_interval_seconds`. A changed file is read again and
+    replaces the cached contents as a whole, after which `on_change` is
+    called. A file, that cannot be read, keeps its previous contents.
+    """
+    _files: dict[Path, PromptFile]
+    _failed: set[Path]
+    _task: Task[None] | None
+
+    def __init__(self) -> None:
+        settings = Settings()
+        self.interval = settings.openai.prompt_reload_interval_seconds
+        self.reloads = 0
+        self._files = {}
+        self._failed = set()
+        self._task = None
+
+    def get(self, path: Path) -> PromptFile:
+        if (prompt_file := self._files.get(path)) is None:
+            prompt_file = self._files[path] = PromptFile.load(path)
+        return prompt_file
+
+    def start(self, on_change: Callable[[], object]) -> None:
+        if self.interval is None or self._task is not None:
+            return
+        self._task = create_task(
+            self._watch(self.interval, on_change),
+            name="prompt_files",
+        )
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(BaseException):
+                await self._task
+            self._task = None
+
+    def log_stats(self) -> None:
+        log.debug(
+            f"Prompt files: {len(self._files)} cached, "
+            f"{self.reloads} reloaded"
+        )
+
+    def refresh(self) -> bool:
+        """Loads all changed files again and returns whether there were any."""
+        changed = False
+        for path, prompt_file in list(self._files.items()):
+            try:
+                if _modified(path.stat()) == prompt_file.modified:
+                    continue
+                self._files[path] = PromptFile.load(path)
+            except OSError as e:
+                if path not in self._failed:
+                    self._failed.add(path)
+                    log.warning(f"Failed to reload prompt file {path}: {e}")
+                continue
+            self._failed.discard(path)
+            log.info(f"Reloaded prompt file {path}")
+            self.reloads += 1
+            _reloads.inc()
+            changed = True
+        return changed
+
+    async def _watch(
+        self,
+        interval: float,
+        on_change: Callable[[], object],
+    ) -> None:
+        while True:
+            await sleep(interval)
+            # Keeps the file system access off the event loop.
+            if not await to_thread(self.refresh):
+                continue
+            try:
+                on_change()
+            except Exception as e:
+                # Keeps watching, the next change may well succeed.
+                log.exception(f"Failed to apply changed prompt files: {e}")
+
+
+def _modified(stat: stat_result) -> tuple[int, int]:
+    return stat.st_mtime_ns, stat.st_size
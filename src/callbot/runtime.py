@@ -0,0 +1,164 @@
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+from string import Template
+from types import MappingProxyType
+from typing import ClassVar, Self
+
+from loguru import logger as log
+
+from callbot.prompt_files import PromptFiles
+from callbot.schemas.elevenlabs.send import InitializeContext
+from callbot.schemas.openai_rt.client_events.session_update import (
+    SessionUpdateEvent,
+)
+from callbot.settings import Settings
+
+
+@dataclass(frozen=True, slots=True)
+class RuntimeSnapshot:
+    """
+    Immutable values derived from the settings, which are needed per event.
+
+    Validating and serializing parts of the settings tree on every event (or
+    even every call) is comparatively expensive, so these values are computed
+    once. The `current` snapshot is built on first use and replaced as a whole
+    by `reload`, e.g. after the settings have been changed at startup or a
+    prompt file has changed (see `PromptFiles`). Holders of an older snapshot
+    keep using it, until they ask for the current one.
+
+    URLs and headers, which cannot be derived due to missing settings, raise
+    the same `RuntimeError` as the corresponding settings methods on access.
+    """
+    session_update_json: str
+    init_conversation_template: Template | None
+    modalities: tuple[str, ...]
+    log_event_types: frozenset[str]
+    transcript: bool
+    # Everything after the `text` and `context_id` fields of an
+    # `InitializeContext` message; it is the same for every context.
+    elevenlabs_init_context_suffix: str
+    _openai_stream_url: str | RuntimeError
+    _openai_auth_headers: Mapping[str, str] | RuntimeError
+    _elevenlabs_stream_url: str | RuntimeError
+    _elevenlabs_auth_headers: Mapping[str, str] | RuntimeError
+    _skipped_event_types: dict[frozenset[str], frozenset[str]] = field(
+        default_factory=dict,
+        compare=False,
+    )
+
+    _current: ClassVar["RuntimeSnapshot | None"] = None
+
+    @classmethod
+    def from_settings(cls) -> Self:
+        settings = Settings()
+        session = settings.openai.session
+        if session.instructions_file is not None:
+            # Uses the (possibly changed) file, leaving the settings as loaded.
+            session = session.model_copy(update={
+                "instructions": PromptFiles().get(
+                    session.instructions_file
+                ).text,
+            })
+        init_context = InitializeContext(
+            text="",
+            voice_settings=settings.elevenlabs.voice_settings,
+            generation_config=settings.elevenlabs.generation_config,
+        ).model_dump_json(exclude_none=True)
+        return cls(
+            session_update_json=SessionUpdateEvent(
+                session=session,
+            ).model_dump_json(exclude_none=True),
+            init_conversation_template=_init_conversation_template(
+                settings.openai.init_conversation_prompt
+            ),
+            modalities=tuple(session.modalities or ()),
+            log_event_types=frozenset(settings.openai.log_event_types),
+            transcript=settings.logging.transcript,
+            elevenlabs_init_context_suffix=init_context.removeprefix(
+                '{"text":""'
+            ),
+            _openai_stream_url=_value_or_error(
+                lambda: settings.openai.realtime_stream_url
+            ),
+            _openai_auth_headers=_value_or_error(
+                lambda: MappingProxyType(
+                    settings.openai.get_realtime_auth_headers()
+                )
+            ),
+            _elevenlabs_stream_url=_value_or_error(
+                lambda: settings.elevenlabs.stream_url
+            ),
+            _elevenlabs_auth_headers=_value_or_error(
+                lambda: MappingProxyType(settings.elevenlabs.get_auth_headers())
+            ),
+        )
+
+    @classmethod
+    def current(cls) -> "RuntimeSnapshot":
+        """Returns the snapshot of this process, building it on first use."""
+        if (snapshot := RuntimeSnapshot._current) is None:
+            snapshot = cls.reload()
+        return snapshot
+
+    @classmethod
+    def reload(cls) -> "RuntimeSnapshot":
+        """Builds a new snapshot from the settings and makes it the current."""
+        snapshot = cls.from_settings()
+        RuntimeSnapshot._current = snapshot
+        log.debug("Built runtime settings snapshot")
+        return snapshot
+
+    @property
+    def openai_stream_url(self) -> str:
+        return _raise_or_return(self._openai_stream_url)
+
+    @property
+    def openai_auth_headers(self) -> Mapping[str, str]:
+        return _raise_or_return(self._openai_auth_headers)
+
+    @property
+    def elevenlabs_stream_url(self) -> str:
+        return _raise_or_return(self._elevenlabs_stream_url)
+
+    @property
+    def elevenlabs_auth_headers(self) -> Mapping[str, str]:
+        return _raise_or_return(self._elevenlabs_auth_headers)
+
+    def skipped_event_types(
+        self,
+        handled_event_types: frozenset[str],
+        known_event_types: frozenset[str],
+    ) -> frozenset[str]:
+        """
+        Returns the known event types, which are neither handled nor logged.
+
+        The result is cached per set of handled types, i.e. per backend class.
+        """
+        skipped = self._skipped_event_types.get(handled_event_types)
+        if skipped is None:
+            skipped = (
+                known_event_types - handled_event_types - self.log_event_types
+            )
+            self._skipped_event_types[handled_event_types] = skipped
+        return skipped
+
+
+def _init_conversation_template(prompt: Path | str | None) -> Template | None:
+    if isinstance(prompt, Path):
+        prompt_file = PromptFiles().get(prompt)
+        return prompt_file.template if prompt_file.text else None
+    return Template(prompt) if prompt else None
+
+
+def _value_or_error[T](get: Callable[[], T]) -> T | RuntimeError:
+    try:
+        return get()
+    except RuntimeError as e:
+        return e
+
+
+def _raise_or_return[T](value: T | RuntimeError) -> T:
+    if isinstance(value, RuntimeError):
+        raise RuntimeError(*value.args)
+    return value
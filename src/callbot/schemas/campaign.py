@@ -0,0 +1,40 @@
+from typing import Literal
+
+from sqlmodel import AutoString, Field, SQLModel, UniqueConstraint
+
+
+# `pending` covers both numbers not dialed yet and those waiting for a retry.
+CampaignCallStatus = Literal["pending", "dialing", "completed", "failed"]
+
+
+class CampaignCall(SQLModel):
+    """Checkpoint of a single number of a campaign."""
+    id: int | None = Field(default=None, primary_key=True)
+    campaign: str = Field(index=True)
+    phone: str
+    status: CampaignCallStatus = Field(default="pending", sa_type=AutoString)
+    attempts: int = 0
+    call_sid: str | None = None
+    # Unix timestamp of the last attempt
+    dialed_at: float | None = None
+    # Final Twilio status of the last attempt, or the error that prevented it
+    outcome: str | None = None
+    # Unix timestamp before which the number must not be dialed (again)
+    next_attempt_at: float = 0.
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+
+class CampaignCallDB(CampaignCall, table=True):
+    __tablename__ = "campaign_call"
+    __table_args__ = (UniqueConstraint("campaign", "phone"), )
+
+
+class CampaignLockDB(SQLModel, table=True):
+    """Lease on a campaign, held by the process running it until `expires_at`."""
+    __tablename__ = "campaign_lock"
+    campaign: str = Field(primary_key=True)
+    owner: str
+    expires_at: float
@@ -1,4 +1,4 @@
-from typing import Literal, Union
+from typing import Literal, TypedDict, Union
 
 from pydantic import BaseModel, ConfigDict, TypeAdapter
 from pydantic.alias_generators import to_camel
@@ -57,3 +57,18 @@ AnyReceiveMessage = Union[
     FinalOutputMulti,
 ]
 ReceiveMessage = TypeAdapter(AnyReceiveMessage)
+
+
+class ReceiveEnvelopeMulti(TypedDict, total=False):
+    """
+    Subset of the fields of inbound messages relevant for routing the audio.
+
+    Validating this skips everything else, most notably the alignment data.
+    """
+    audio: str | None
+    contextId: str | None
+    context_id: str | None
+    isFinal: bool | None
+
+
+ReceiveEnvelope = TypeAdapter(ReceiveEnvelopeMulti)
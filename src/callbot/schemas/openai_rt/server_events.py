@@ -1,4 +1,4 @@
-from typing import Annotated, TypeAlias, Union, Literal
+from typing import Annotated, TypeAlias, Union, Literal, get_args
 
 from openai.types.beta.realtime.conversation_item import ConversationItem as _ConversationItem
 from openai.types.beta.realtime.conversation_item_content import ConversationItemContent as _ConversationItemContent
@@ -30,7 +30,7 @@ from openai.types.beta.realtime.response_text_delta_event import ResponseTextDel
 from openai.types.beta.realtime.session import Session as _Session
 from openai.types.beta.realtime.session_created_event import SessionCreatedEvent
 from openai.types.beta.realtime.session_updated_event import SessionUpdatedEvent as _SessionUpdatedEvent
-from pydantic import Field, TypeAdapter
+from pydantic import BaseModel, Field, TypeAdapter
 
 from callbot.settings._validators_types import Str128
 
@@ -121,3 +121,14 @@ ServerEvent = TypeAdapter[AnyServerEvent](
         Field(discriminator="type"),
     ]
 )
+
+
+def get_event_type(event_cls: type[BaseModel]) -> str:
+    """Returns the value of the `type` field of the given event class."""
+    event_type: str = get_args(event_cls.model_fields["type"].annotation)[0]
+    return event_type
+
+
+SERVER_EVENT_TYPES: frozenset[str] = frozenset(
+    get_event_type(event_cls) for event_cls in get_args(AnyServerEvent)
+)
@@ -6,7 +6,7 @@ from .connected import Connected
 from .error import Error
 from .interrupt import Interrupt
 from .mark import Mark
-from .media import Media
+from .media import Media, parse_media_frame
 from .prompt import Prompt
 from .setup import Setup
 from .start import Start
@@ -41,3 +41,22 @@ Message = TypeAdapter(
         ],
     ]
 )
+
+
+__all__ = [
+    "AnyInboundConversationRelayMessage",
+    "AnyInboundMediaStreamMessage",
+    "Connected",
+    "ConversationRelayMessage",
+    "Error",
+    "Interrupt",
+    "Mark",
+    "Media",
+    "MediaStreamMessage",
+    "Message",
+    "Prompt",
+    "Setup",
+    "Start",
+    "Stop",
+    "parse_media_frame",
+]
@@ -1,6 +1,7 @@
 from typing import Literal
 
 from pydantic import BaseModel
+from pydantic_core import from_json
 
 
 class MediaInner(BaseModel):
@@ -15,3 +16,26 @@ class Media(BaseModel):
     sequenceNumber: str
     media: MediaInner
     streamSid: str
+
+
+def parse_media_frame(text: str) -> tuple[int, str] | None:
+    """
+    Extracts timestamp and payload from a `media` message.
+
+    This is the hot path for inbound audio and deliberately avoids building the
+    `Media` model. If `text` is not a well-formed `media` message, `None` is
+    returned and the caller should fall back to validating the full `Message`.
+    """
+    if '"event":"media"' not in text[:32]:
+        return None
+    try:
+        data = from_json(text)
+        if data["event"] != "media":
+            return None
+        media = data["media"]
+        timestamp, payload = int(media["timestamp"]), media["payload"]
+    except (ValueError, TypeError, KeyError):
+        return None
+    if not isinstance(payload, str):
+        return None
+    return timestamp, payload
@@ -3,6 +3,7 @@ from typing import Annotated, Union
 from pydantic import TypeAdapter, Field
 
 from .clear import Clear
+from .encoder import FrameEncoder
 from .mark import Mark
 from .media import Media
 from .text_tokens import TextTokens
@@ -14,3 +15,13 @@ Message = TypeAdapter[Union[Clear, Mark, Media]](
         Field(discriminator="event"),
     ]
 )
+
+
+__all__ = [
+    "Clear",
+    "FrameEncoder",
+    "Mark",
+    "Media",
+    "Message",
+    "TextTokens",
+]
@@ -0,0 +1,39 @@
+from pydantic_core import to_json
+
+from .clear import Clear
+from .mark import Mark
+from .media import Media
+
+
+class FrameEncoder:
+    """
+    Serializes outbound messages for a single media stream.
+
+    The output is identical to that of the corresponding models'
+    `model_dump_json` method. Since the stream SID never changes during a call,
+    the JSON envelopes are built once and only the variable part is spliced in.
+    """
+    _media_prefix: str
+    _media_suffix: str
+    _marks: dict[str, str]
+    _clear: str
+
+    def __init__(self, stream_sid: str = "") -> None:
+        self.stream_sid = stream_sid
+        template = Media.with_payload("", stream_sid).model_dump_json()
+        self._media_prefix, self._media_suffix = template.rsplit('""', 1)
+        self._marks = {}
+        self._clear = Clear(streamSid=stream_sid).model_dump_json()
+
+    def media(self, payload: str) -> str:
+        serialized_payload = to_json(payload).decode()
+        return f"{self._media_prefix}{serialized_payload}{self._media_suffix}"
+
+    def mark(self, name: str) -> str:
+        if (serialized := self._marks.get(name)) is None:
+            message = Mark.with_name(name, self.stream_sid)
+            serialized = self._marks[name] = message.model_dump_json()
+        return serialized
+
+    def clear(self) -> str:
+        return self._clear
@@ -1,19 +1,30 @@
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
-from typing import Annotated
+from typing import Annotated, Any
 
-from fastapi import Depends, FastAPI, Form, Request, WebSocket, status
+from fastapi import Body, Depends, FastAPI, Form, Request, WebSocket, status
 from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from loguru import logger as log
 
+from callbot.auth.jti_store import JTIStore
 from callbot.auth.jwt import JWT
-from callbot.backends import Backend
+from callbot.backends import BackendPool
 from callbot.call_manager import CallManager
+from callbot.call_registry import CallRegistry
 from callbot.caller import Caller
+from callbot.campaign import Campaign, Campaigns
+from callbot.contact_cache import ContactCache
 from callbot.db import EngineWrapper as DBEngine, Session
-from callbot.hooks import BeforeStartupHook
+from callbot.exceptions import CampaignRunning
+from callbot.hooks import BackgroundHooks, BeforeStartupHook
+from callbot.latency import LatencyHistograms
+from callbot.loop_monitor import LoopMonitor
+from callbot.metrics import MetricsRegistry
+from callbot.misc.phone_number import PhoneNumberCache
+from callbot.prompt_files import PromptFiles
+from callbot.runtime import RuntimeSnapshot
 from callbot.schemas.amd_status import AMDStatus
 from callbot.schemas.contact import Contact, Phone
 from callbot.settings import Settings
@@ -27,9 +38,34 @@ JWTDep = Depends(JWT.decode_and_invalidate)
 @asynccontextmanager
 async def lifespan(_fastapi: FastAPI) -> AsyncIterator[None]:
     await DBEngine().create_tables()
+    await CallRegistry.shared().start()
     await BeforeStartupHook(_fastapi).dispatch()
+    # Startup hooks may have changed the settings, e.g. registered functions.
+    RuntimeSnapshot.reload()
+    PromptFiles().start(on_change=_prompt_files_changed)
+    BackendPool().start()
+    LoopMonitor().start()
     yield
-    # Potential clean up code here...
+    await PromptFiles().stop()
+    await Campaigns().stop()
+    await Caller.close_shared()
+    await LoopMonitor().stop()
+    LoopMonitor().log_stats()
+    PhoneNumberCache().log_stats()
+    ContactCache().log_stats()
+    PromptFiles().log_stats()
+    await BackendPool().stop()
+    BackendPool().log_stats()
+    await BackgroundHooks().stop()
+    BackgroundHooks().log_stats()
+    await CallRegistry.shared().stop()
+    JTIStore.close_shared()
+
+
+def _prompt_files_changed() -> None:
+    RuntimeSnapshot.reload()
+    # Ready sessions were initialized with the previous instructions.
+    BackendPool().recycle()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -41,19 +77,29 @@ async def root() -> StrDict:
     return {"status": "ok", "message": "Callbot server is running!"}
 
 
+@app.get("/latency", response_class=JSONResponse)
+async def latency() -> dict[str, Any]:
+    """Returns the latency histograms of all turns handled so far."""
+    return LatencyHistograms().to_dict()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Exposes all registered metrics in the Prometheus text format."""
+    return PlainTextResponse(
+        MetricsRegistry().expose(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 @app.websocket("/stream")
 async def conversation_stream(twilio_ws: WebSocket) -> None:
     """Connects the Twilio websocket to the configured conversation backend."""
-    settings = Settings()
     # TODO: The connection to the backend should only be opened after the Twilio
     #       start message passes authentication. The entire call manager
     #       initialization logic needs to be reworked.
     await twilio_ws.accept()
-    backend_cls = Backend.get(settings.backend)
-    if backend_cls is None:
-        log.error(f"Backend '{settings.backend}' not available!")
-    log.debug(f"Using '{settings.backend}' backend")
-    async with backend_cls() as backend:
+    async with BackendPool().checkout() as backend:
         call_manager = CallManager(backend, twilio_ws)
         await call_manager.run()
 
@@ -68,19 +114,11 @@ async def amd_callback(amd_status: Annotated[AMDStatus, Form()]) -> StrDict:
         )
         return {"status": "error", "message": "Invalid account SID"}
     call_sid = amd_status.call_sid
-    call_manager = CallManager.get(call_sid)
-    if call_manager is None:
+    if not await CallRegistry.shared().forward_amd_status(amd_status):
         log.warning(
             f"No active call matches incoming Twilio AMD status SID: {call_sid}"
         )
         return {"status": "error", "message": "No active call with this SID"}
-    match amd_status.answered_by:
-        case "human":
-            log.info(f"Twilio AMD detected human in call {call_sid}")
-        case "unknown":
-            log.warning(f"Twilio AMD status unknown for call {call_sid}")
-        case _:
-            call_manager.answering_machine_detected(amd_status)
     return {"status": "ok"}
 
 
@@ -94,9 +132,8 @@ async def make_call(
     session: SessionDep,
     response: Response,
 ) -> StrDict:
-    caller = Caller(pool=False)
     try:
-        sid = await caller.get_contact_and_call(phone_number, session)
+        sid = await Caller.shared().get_contact_and_call(phone_number, session)
     except ValueError as error:
         log.info(f"No contact with number {phone_number}")
         response.status_code = status.HTTP_404_NOT_FOUND
@@ -111,9 +148,83 @@ async def add_contact(contact: Contact, session: SessionDep) -> Contact:
     session.add(contact_db)
     await session.commit()
     await session.refresh(contact_db)
+    ContactCache().invalidate(contact_db.phone)
     return Contact.model_validate(contact_db)
 
 
+@app.post(
+    "/contacts/warm-up",
+    dependencies=[JWTDep],
+    response_class=JSONResponse,
+)
+async def warm_up_contacts(
+    phone_numbers: list[str],
+    session: SessionDep,
+) -> dict[str, Any]:
+    """Preloads the contacts with the given numbers, e.g. for a campaign."""
+    loaded = await ContactCache().warm_up(phone_numbers, session)
+    return {"status": "ok", "loaded": loaded}
+
+
+@app.post(
+    "/campaigns/{name}",
+    dependencies=[JWTDep],
+    response_class=JSONResponse,
+)
+async def start_campaign(
+    name: str,
+    response: Response,
+    phone_numbers: Annotated[list[str] | None, Body()] = None,
+    all_contacts: bool = False,
+) -> dict[str, Any]:
+    """
+    Adds the given numbers (or all contacts) to a campaign and runs it in the
+    background. Without any numbers, an interrupted campaign is resumed.
+    """
+    campaign = Campaign.from_settings(name)
+    try:
+        # Also covers campaigns run by other workers or the CLI.
+        await campaign.lock()
+    except CampaignRunning as error:
+        response.status_code = status.HTTP_409_CONFLICT
+        return {"status": "error", "message": str(error)}
+    try:
+        added = 0
+        if phone_numbers:
+            added += await campaign.add_numbers(phone_numbers)
+        if all_contacts:
+            added += await campaign.add_all_contacts()
+        Campaigns().start(campaign)
+    except BaseException:
+        await campaign.unlock()
+        raise
+    return {"status": "ok", "added": added}
+
+
+@app.get(
+    "/campaigns/{name}",
+    dependencies=[JWTDep],
+    response_class=JSONResponse,
+)
+async def campaign_stats(name: str, response: Response) -> dict[str, Any]:
+    """
+    Returns the progress of a campaign. Detailed stats of the current run are
+    only available from the process running it; others return the progress
+    saved in the database.
+    """
+    if (entry := Campaigns().get(name)) is not None:
+        campaign, running = entry
+        return {
+            "status": "ok",
+            "running": running,
+            "stats": campaign.stats.to_dict(),
+        }
+    if (progress := await Campaign.load_progress(name)) is None:
+        response.status_code = status.HTTP_404_NOT_FOUND
+        return {"status": "error", "message": "No such campaign"}
+    return {"status": "ok", **progress}
+
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(
     request: Request,
@@ -11,13 +11,20 @@ from pydantic_settings import (
 
 from callbot.misc.singleton import Singleton
 from callbot.settings._section import SettingsSection
+from callbot.settings.backend_pool import BackendPoolSettings
+from callbot.settings.call_registry import CallRegistrySettings
+from callbot.settings.campaign import CampaignSettings
+from callbot.settings.contact_cache import ContactCacheSettings
 from callbot.settings.db import DBSettings
 from callbot.settings.elevenlabs import ElevenlabsSettings
+from callbot.settings.hooks import HooksSettings
 from callbot.settings.logging import LoggingSettings
+from callbot.settings.loop_monitor import LoopMonitorSettings
 from callbot.settings.misc import MiscSettings
 from callbot.settings.openai import OpenAISettings
 from callbot.settings.plugins import PluginsSettings
 from callbot.settings.server import ServerSettings
+from callbot.settings.stream import StreamSettings
 from callbot.settings.twilio import TwilioSettings
 
 
@@ -36,12 +43,19 @@ class Settings(
     )
 
     backend: str = "openai"
+    backend_pool: BackendPoolSettings = BackendPoolSettings()
     server: ServerSettings = ServerSettings()
+    call_registry: CallRegistrySettings = CallRegistrySettings()
     db: DBSettings = DBSettings()
+    contact_cache: ContactCacheSettings = ContactCacheSettings()
     twilio: TwilioSettings = TwilioSettings()
+    stream: StreamSettings = StreamSettings()
     openai: OpenAISettings = OpenAISettings()
     elevenlabs: ElevenlabsSettings = ElevenlabsSettings()
     logging: LoggingSettings = LoggingSettings()
+    hooks: HooksSettings = HooksSettings()
+    loop_monitor: LoopMonitorSettings = LoopMonitorSettings()
+    campaign: CampaignSettings = CampaignSettings()
     misc: MiscSettings = MiscSettings()
     # TODO: This is dumped without applying serialization rules.
     plugins: PluginsSettings = PluginsSettings()
@@ -0,0 +1,9 @@
+from pydantic import NonNegativeInt, PositiveFloat
+
+from callbot.settings._section import SettingsSection
+
+
+class BackendPoolSettings(SettingsSection):
+    size: NonNegativeInt = 0
+    max_idle_seconds: PositiveFloat = 300.
+    retry_delay_seconds: PositiveFloat = 5.
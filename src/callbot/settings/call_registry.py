@@ -0,0 +1,11 @@
+from pathlib import Path
+
+from pydantic import PositiveInt
+
+from callbot.settings._section import SettingsSection
+
+
+class CallRegistrySettings(SettingsSection):
+    backend: str = "memory"
+    sqlite_path: Path = Path("callbot-calls.sqlite")
+    poll_interval_ms: PositiveInt = 100
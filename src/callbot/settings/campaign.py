@@ -0,0 +1,13 @@
+from pydantic import PositiveFloat, PositiveInt
+
+from callbot.settings._section import SettingsSection
+
+
+class CampaignSettings(SettingsSection):
+    max_concurrent_calls: PositiveInt = 5
+    calls_per_second: PositiveFloat = 1.
+    max_attempts: PositiveInt = 3
+    retry_backoff_seconds: PositiveFloat = 300.
+    retry_backoff_max_seconds: PositiveFloat = 3600.
+    status_poll_interval_seconds: PositiveFloat = 5.
+    outcome_timeout_seconds: PositiveFloat | None = None
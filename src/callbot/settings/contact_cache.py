@@ -0,0 +1,8 @@
+from pydantic import NonNegativeInt, PositiveFloat
+
+from callbot.settings._section import SettingsSection
+
+
+class ContactCacheSettings(SettingsSection):
+    max_size: NonNegativeInt = 10_000
+    ttl: PositiveFloat | None = 300.
@@ -4,7 +4,7 @@ from urllib.parse import urlencode
 from annotated_types import Le, Len, Ge
 from elevenlabs import VoiceSettings as _VoiceSettings
 from elevenlabs import GenerationConfig as _GenerationConfig
-from pydantic import SecretStr
+from pydantic import PositiveFloat, PositiveInt, SecretStr
 
 from callbot.settings._section import SettingsSection
 from callbot.settings._validators_types import SecretStrNoneAsEmpty
@@ -40,8 +40,25 @@ class GenerationConfig(SettingsSection, _GenerationConfig):
     pass
 
 
+class TextChunkingSettings(SettingsSection):
+    boundary: Literal["none", "word", "clause", "sentence"] = "sentence"
+    first_boundary: Literal["none", "word", "clause", "sentence"] | None = "clause"
+    max_delay_ms: PositiveInt | None = 250
+
+
 class ElevenlabsSettings(SettingsSection):
     TTS_BASE_URL: ClassVar[str] = "wss://api.elevenlabs.io/v1/text-to-speech"
+    NON_QUERY_PARAMS: ClassVar[set[str]] = {
+        "api_key",
+        "voice_id",
+        "voice_settings",
+        "generation_config",
+        "calls_per_connection",
+        "keep_alive_seconds",
+        "reconnect_delay_seconds",
+        "connect_timeout_seconds",
+        "chunking",
+    }
 
     api_key: SecretStrNoneAsEmpty = SecretStr("")
     # Path parameter:
@@ -61,6 +78,13 @@ class ElevenlabsSettings(SettingsSection):
     # Message properties:
     voice_settings: VoiceSettings | None = None
     generation_config: GenerationConfig | None = None
+    # Connection management:
+    calls_per_connection: PositiveInt = 3
+    keep_alive_seconds: PositiveFloat = 15.
+    reconnect_delay_seconds: PositiveFloat = 1.
+    connect_timeout_seconds: PositiveFloat = 10.
+    # Text sent per message:
+    chunking: TextChunkingSettings = TextChunkingSettings()
 
     @property
     def stream_url(self) -> str:
@@ -68,7 +92,7 @@ class ElevenlabsSettings(SettingsSection):
             raise RuntimeError("Elevenlabs voice ID not configured")
         url = f"{self.TTS_BASE_URL}/{self.voice_id}/multi-stream-input"
         params = self.model_dump(
-            exclude={"api_key", "voice_id", "voice_settings", "generation_config"},
+            exclude=self.NON_QUERY_PARAMS,
             exclude_none=True,
         )
         if params:
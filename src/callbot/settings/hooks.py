@@ -0,0 +1,29 @@
+from typing import Literal
+
+from pydantic import Field, PositiveFloat, PositiveInt
+
+from callbot.settings._section import SettingsSection
+
+
+HookDispatchMode = Literal["inline", "background", "timeout"]
+
+
+def _default_dispatch() -> dict[str, HookDispatchMode]:
+    return {
+        "AfterCallStartHook": "background",
+        "AfterCallEndHook": "background",
+    }
+
+
+class HooksSettings(SettingsSection):
+    dispatch: dict[str, HookDispatchMode] = Field(
+        default_factory=_default_dispatch,
+    )
+    default_dispatch: HookDispatchMode = "inline"
+    timeout_seconds: PositiveFloat = 10.
+    background_workers: PositiveInt = 4
+    background_queue_size: PositiveInt = 1000
+    slow_callback_ms: PositiveFloat | None = 1000.
+
+    def dispatch_mode(self, hook_name: str) -> HookDispatchMode:
+        return self.dispatch.get(hook_name, self.default_dispatch)
@@ -0,0 +1,14 @@
+from pydantic import PositiveFloat, PositiveInt
+
+from callbot.settings._section import SettingsSection
+
+
+class LoopMonitorSettings(SettingsSection):
+    enabled: bool = False
+    sample_interval_ms: PositiveInt = 250
+    lag_warning_ms: PositiveFloat = 100.
+    slow_callback_ms: PositiveFloat | None = None
+
+    @property
+    def detects_slow_callbacks(self) -> bool:
+        return self.enabled and self.slow_callback_ms is not None
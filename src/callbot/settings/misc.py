@@ -1,10 +1,15 @@
 from typing import Literal
 
+from pydantic import NonNegativeInt, PositiveFloat
+
 from callbot.settings._section import SettingsSection
 from callbot.settings._validators_types import Float1orGreater
 
 
 class MiscSettings(SettingsSection):
     default_phone_region: str | None = None
+    phone_number_cache_size: NonNegativeInt = 10_000
     mode: Literal["testing", "production"] = "testing"
     speech_start_timeout: Float1orGreater | None = 10.
+    max_call_duration: PositiveFloat | None = None
+    twilio_idle_timeout: PositiveFloat | None = None
@@ -1,7 +1,12 @@
-from pathlib import Path
 from typing import Annotated, Any, ClassVar, Literal
 
-from pydantic import Field, SecretStr, WrapSerializer, computed_field
+from pydantic import (
+    Field,
+    PositiveFloat,
+    SecretStr,
+    WrapSerializer,
+    computed_field,
+)
 from pydantic_core.core_schema import SerializerFunctionWrapHandler
 
 from callbot.schemas.openai_rt.client_events.session import (
@@ -70,11 +75,13 @@ class OpenAISettings(SettingsSection):
     REALTIME_BASE_URL: ClassVar[str] = "wss://api.openai.com/v1/realtime"
 
     api_key: SecretStrNoneAsEmpty = SecretStr("")
+    realtime_base_url: str = REALTIME_BASE_URL
     init_conversation_prompt: Annotated[
         PathFileExists | Str128 | None,
         Field(union_mode="left_to_right"),
         WrapSerializer(workaround_shorten_128),
     ] = None
+    prompt_reload_interval_seconds: PositiveFloat | None = 5.
     log_event_types: list[str] = [
         "input_audio_buffer.committed",
         "input_audio_buffer.speech_started",
@@ -88,7 +95,7 @@ class OpenAISettings(SettingsSection):
 
     @property
     def realtime_stream_url(self) -> str:
-        return f"{self.REALTIME_BASE_URL}?model={self.session.model}"
+        return f"{self.realtime_base_url}?model={self.session.model}"
 
     def get_realtime_auth_headers(self) -> StrDict:
         if not self.api_key:
@@ -98,17 +105,6 @@ class OpenAISettings(SettingsSection):
             "OpenAI-Beta": "realtime=v1",
         }
 
-    def get_init_conversation_prompt(self) -> str | None:
-        return _get_text_from_file_or_str(self.init_conversation_prompt)
-
     @classmethod
     def section_name(cls) -> str:  # type: ignore[override]
         return "openai"
-
-
-def _get_text_from_file_or_str(value: Path | str | None) -> str | None:
-    if value is None:
-        return None
-    if isinstance(value, Path):
-        return value.read_text().strip()
-    return value
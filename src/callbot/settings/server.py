@@ -1,4 +1,5 @@
 from ipaddress import IPv4Address
+from pathlib import Path
 
 from pydantic import HttpUrl, IPvAnyAddress, PositiveInt
 
@@ -12,6 +13,8 @@ class AuthSettings(SettingsSection):
     iss: str | None = None
     aud: str | None = None
     expiration_seconds: int = 15 * 60
+    jti_store_max_size: PositiveInt = 100_000
+    jti_store_path: Path | None = None
 
 
 class ServerSettings(SettingsSection):
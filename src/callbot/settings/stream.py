@@ -0,0 +1,14 @@
+from typing import Literal
+
+from pydantic import PositiveInt
+
+from callbot.settings._section import SettingsSection
+
+
+class StreamSettings(SettingsSection):
+    inbound_buffer_frames: PositiveInt = 250
+    inbound_merge_frames: PositiveInt = 1
+    mark_interval_deltas: PositiveInt | None = 1
+    mark_interval_ms: PositiveInt | None = None
+    outbound_queue_size: PositiveInt = 500
+    outbound_overflow: Literal["block", "drop_audio"] = "block"
@@ -1,4 +1,10 @@
-from pydantic import PositiveInt, SecretStr
+from pydantic import (
+    HttpUrl,
+    NonNegativeInt,
+    PositiveFloat,
+    PositiveInt,
+    SecretStr,
+)
 
 from callbot.settings._section import SettingsSection
 from callbot.settings._validators_types import (
@@ -13,3 +19,6 @@ class TwilioSettings(SettingsSection):
     auth_token: SecretStrNoneAsEmpty = SecretStr("")
     phone_number: StrPhone | None = None
     timeout: PositiveInt = 60
+    calls_per_second: PositiveFloat = 1.
+    max_rate_limit_retries: NonNegativeInt = 3
+    api_base_url: HttpUrl | None = None
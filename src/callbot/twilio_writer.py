@@ -0,0 +1,170 @@
+from asyncio import Event
+from base64 import b64decode, b64encode
+from collections import deque
+from collections.abc import Iterator
+from time import perf_counter
+from typing import Literal, Self, TypeAlias, get_args
+
+from fastapi import WebSocket, WebSocketDisconnect
+from loguru import logger as log
+
+from callbot.exceptions import CallManagerException, TwilioWebsocketDisconnect
+from callbot.metrics import websocket_messages
+from callbot.schemas.twilio_websocket_messages.outbound import (
+    FrameEncoder,
+)
+from callbot.settings import Settings
+
+
+MessageKind: TypeAlias = Literal["media", "mark", "clear", "text"]
+OverflowPolicy: TypeAlias = Literal["block", "drop_audio"]
+
+
+class TwilioWriter:
+    """
+    Writes all outbound messages to the Twilio websocket from a single task.
+
+    Producers (i.e. the backend listeners) only put messages into a bounded
+    buffer, so a slow Twilio socket does not stall them. If the buffer is full,
+    the `overflow` policy decides whether the producer has to wait (`block`)
+    or the oldest audio chunk still waiting to be sent is dropped
+    (`drop_audio`). Audio and marks that are still buffered, when a `clear`
+    message is put, are always dropped, since they are stale by definition.
+
+    If more than one message is waiting by the time the socket is ready again,
+    consecutive audio chunks are merged into a single `media` message.
+    """
+    _buffer: deque[tuple[MessageKind, str]]
+    _not_empty: Event
+    _not_full: Event
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        max_size: int = 500,
+        overflow: OverflowPolicy = "block",
+    ) -> None:
+        self.websocket = websocket
+        self.encoder = FrameEncoder()
+        self.max_size = max_size
+        self.overflow = overflow
+        self.messages_sent = 0
+        self.chunks_merged = 0
+        self.chunks_dropped = 0
+        self.write_seconds = 0.
+        self.wait_seconds = 0.
+        self._buffer = deque()
+        self._not_empty = Event()
+        self._not_full = Event()
+        self._not_full.set()
+        self._sent = {
+            kind: websocket_messages().labels("twilio", "out", kind)
+            for kind in get_args(MessageKind)
+        }
+
+    @classmethod
+    def from_settings(cls, websocket: WebSocket) -> Self:
+        settings = Settings()
+        return cls(
+            websocket,
+            max_size=settings.stream.outbound_queue_size,
+            overflow=settings.stream.outbound_overflow,
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._buffer)
+
+    def set_stream_sid(self, stream_sid: str) -> None:
+        self.encoder = FrameEncoder(stream_sid)
+
+    async def put(self, kind: MessageKind, payload: str = "") -> None:
+        """
+        Adds a message to the buffer.
+
+        For `media` messages, `payload` is the base64 encoded audio; for `mark`
+        messages, it is the name of the mark; for `text` messages it is the
+        serialized message. For `clear` messages, it is ignored.
+        """
+        if kind == "clear":
+            self._drop_stale()
+        while len(self._buffer) >= self.max_size:
+            if self.overflow == "drop_audio" and self._drop_oldest_audio():
+                break
+            self._not_full.clear()
+            start = perf_counter()
+            await self._not_full.wait()
+            self.wait_seconds += perf_counter() - start
+        self._buffer.append((kind, payload))
+        self._not_empty.set()
+
+    async def run(self) -> None:
+        """Sends buffered messages until cancelled."""
+        try:
+            while True:
+                await self._not_empty.wait()
+                batch = list(self._buffer)
+                self._buffer.clear()
+                self._not_empty.clear()
+                self._not_full.set()
+                for text in self._encode(batch):
+                    start = perf_counter()
+                    await self.websocket.send_text(text)
+                    self.write_seconds += perf_counter() - start
+                    self.messages_sent += 1
+        except WebSocketDisconnect as e:
+            raise TwilioWebsocketDisconnect() from e
+        except Exception as e:
+            raise CallManagerException("TwilioWriter.run", e) from e
+
+    def log_stats(self) -> None:
+        log.debug(
+            f"Twilio writer sent {self.messages_sent} messages "
+            f"({self.chunks_merged} audio chunks merged, "
+            f"{self.chunks_dropped} dropped); "
+            f"{self.write_seconds:.3f}s spent writing, "
+            f"{self.wait_seconds:.3f}s spent waiting for buffer space"
+        )
+
+    def _encode(self, batch: list[tuple[MessageKind, str]]) -> Iterator[str]:
+        audio: list[str] = []
+        for kind, payload in batch:
+            if kind == "media":
+                audio.append(payload)
+                continue
+            if audio:
+                yield self._encode_audio(audio)
+                audio = []
+            self._sent[kind].inc()
+            match kind:
+                case "mark":
+                    yield self.encoder.mark(payload)
+                case "clear":
+                    yield self.encoder.clear()
+                case "text":
+                    yield payload
+        if audio:
+            yield self._encode_audio(audio)
+
+    def _encode_audio(self, chunks: list[str]) -> str:
+        self._sent["media"].inc()
+        if len(chunks) == 1:
+            return self.encoder.media(chunks[0])
+        self.chunks_merged += len(chunks)
+        merged = b"".join(b64decode(chunk) for chunk in chunks)
+        return self.encoder.media(b64encode(merged).decode())
+
+    def _drop_stale(self) -> None:
+        kept = [item for item in self._buffer if item[0] not in ("media", "mark")]
+        self.chunks_dropped += sum(kind == "media" for kind, _ in self._buffer)
+        self._buffer = deque(kept)
+        if len(self._buffer) < self.max_size:
+            self._not_full.set()
+
+    def _drop_oldest_audio(self) -> bool:
+        for idx, (kind, _) in enumerate(self._buffer):
+            if kind == "media":
+                del self._buffer[idx]
+                self.chunks_dropped += 1
+                return True
+        return False
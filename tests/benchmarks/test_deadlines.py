@@ -0,0 +1,75 @@
+import asyncio
+from os import environ
+from time import perf_counter, process_time
+
+import pytest
+
+from callbot.call_manager import CallManager
+from callbot.deadlines import DeadlineScheduler
+from callbot.settings import Settings
+
+
+# Can be raised for more stable CPU figures, e.g. `CALLBOT_BENCHMARK_SECONDS=10`.
+SECONDS = float(environ.get("CALLBOT_BENCHMARK_SECONDS", "2"))
+# How often `conversation_ongoing` changes per second of a call.
+TOGGLES_PER_SECOND = 2
+TOGGLES = 10_000
+
+
+def new_call() -> CallManager:
+    # Nothing but the deadlines is used.
+    call = CallManager(backend=object(), twilio_websocket=object())
+    call._start_deadlines()
+    return call
+
+
+async def toggle(call: CallManager) -> None:
+    while True:
+        await asyncio.sleep(1 / TOGGLES_PER_SECOND)
+        if call.conversation_ongoing.is_set():
+            call.conversation_ongoing.clear()
+        else:
+            call.conversation_ongoing.set()
+
+
+async def measure(calls: int) -> tuple[float, float]:
+    """
+    Returns the CPU share of idle calls and the time taken per toggle.
+
+    The calls' `conversation_ongoing` events change twice a second, each
+    change arming or disarming the speech start deadline.
+    """
+    active = [new_call() for _ in range(calls)]
+    tasks = [asyncio.create_task(toggle(call)) for call in active]
+    start = process_time()
+    await asyncio.sleep(SECONDS)
+    cpu = (process_time() - start) / SECONDS
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    event = active[0].conversation_ongoing
+    start = perf_counter()
+    for _ in range(TOGGLES // 2):
+        event.set()
+        event.clear()
+    per_toggle = (perf_counter() - start) / TOGGLES
+    assert all(call._abort_exception.empty() for call in active)
+    for call in active:
+        call._cancel_deadlines()
+    assert DeadlineScheduler().pending == 0
+    return cpu, per_toggle
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("calls", [10, 100, 1000])
+def test_deadline_overhead(monkeypatch: pytest.MonkeyPatch, calls: int) -> None:
+    settings = Settings().misc
+    monkeypatch.setattr(settings, "speech_start_timeout", 60.)
+    monkeypatch.setattr(settings, "max_call_duration", 3600.)
+    monkeypatch.setattr(settings, "twilio_idle_timeout", 60.)
+    monkeypatch.setattr(DeadlineScheduler, "_instance", None)
+    cpu, per_toggle = asyncio.run(measure(calls))
+    print(
+        f"\nDeadlines of {calls} calls: {cpu:.2%} CPU while idle, "
+        f"{per_toggle * 1e6:.1f} us to arm or disarm one"
+    )
@@ -0,0 +1,153 @@
+import asyncio
+import json
+from base64 import b64encode
+from collections.abc import AsyncIterator, Awaitable, Callable
+from time import perf_counter
+
+import pytest
+from pydantic import SecretStr
+
+from callbot.backends.openai import OpenAIBackend
+from callbot.runtime import RuntimeSnapshot
+from callbot.schemas.openai_rt.server_events import ServerEvent
+from callbot.settings import Settings
+
+
+RESPONSES = 20
+DELTAS_PER_RESPONSE = 45
+ROUNDS = 20
+# 100 ms of 24 kHz PCM audio, as sent by OpenAI.
+AUDIO = b64encode(bytes(1800)).decode()
+
+
+def event(event_type: str, idx: int, **fields: object) -> str:
+    return json.dumps({"type": event_type, "event_id": f"ev_{idx}", **fields})
+
+
+def response_events(idx: int) -> list[str]:
+    """Returns the events of a single audio response, in order."""
+    response_id, item_id = f"resp_{idx}", f"item_{idx}"
+    part = {"response_id": response_id, "item_id": item_id, "output_index": 0}
+    content = {**part, "content_index": 0}
+    item = {"id": item_id, "type": "message", "role": "assistant"}
+    events = [
+        event("response.created", idx, response={"id": response_id}),
+        event("response.output_item.added", idx, **part, item=item),
+        event(
+            "response.content_part.added",
+            idx,
+            **content,
+            part={"type": "audio", "transcript": ""},
+        ),
+    ]
+    for _ in range(DELTAS_PER_RESPONSE):
+        events.append(event("response.audio.delta", idx, **content, delta=AUDIO))
+        events.append(event(
+            "response.audio_transcript.delta",
+            idx,
+            **content,
+            delta="Hello ",
+        ))
+    transcript = "Hello " * DELTAS_PER_RESPONSE
+    return [
+        *events,
+        event("response.audio.done", idx, **content),
+        event(
+            "response.audio_transcript.done",
+            idx,
+            **content,
+            transcript=transcript,
+        ),
+        event(
+            "response.content_part.done",
+            idx,
+            **content,
+            part={"type": "audio", "transcript": transcript},
+        ),
+        event("response.output_item.done", idx, **part, item=item),
+        event(
+            "response.done",
+            idx,
+            response={"id": response_id, "status": "completed", "output": []},
+        ),
+        event("rate_limits.updated", idx, rate_limits=[]),
+    ]
+
+
+class NoopLatency:
+    def record(self, name: str) -> None:
+        pass
+
+
+class NoopCallManager:
+    latest_media_timestamp = 0
+
+    def __init__(self) -> None:
+        self.mark_queue: list[str] = []
+        self.conversation_ongoing = asyncio.Event()
+        self.latency = NoopLatency()
+
+    async def send_media(self, payload: str) -> None:
+        pass
+
+    async def send_response_part_mark(self) -> None:
+        pass
+
+    async def send_response_done_mark(self) -> None:
+        pass
+
+    async def clear_marks(self) -> None:
+        pass
+
+
+async def feed(texts: list[str]) -> AsyncIterator[str]:
+    for text in texts:
+        yield text
+
+
+async def validate_all(backend: OpenAIBackend, texts: list[str]) -> None:
+    """Handles the events like `listen` did, before decoding lazily."""
+    call_manager = NoopCallManager()
+    for text in texts:
+        event = ServerEvent.validate_json(text)
+        await backend._handle_event(event, call_manager)
+
+
+async def listen(backend: OpenAIBackend, texts: list[str]) -> None:
+    backend._openai_connection = feed(texts)
+    await backend.listen(NoopCallManager())
+
+
+def events_per_second(
+    handle: Callable[[OpenAIBackend, list[str]], Awaitable[None]],
+    texts: list[str],
+) -> float:
+    async def main() -> float:
+        backend = OpenAIBackend()
+        start = perf_counter()
+        for _ in range(ROUNDS):
+            await handle(backend, texts)
+        return ROUNDS * len(texts) / (perf_counter() - start)
+
+    return asyncio.run(main())
+
+
+@pytest.mark.benchmark
+def test_event_mix_per_second(monkeypatch: pytest.MonkeyPatch) -> None:
+    settings = Settings()
+    monkeypatch.setattr(settings.openai, "api_key", SecretStr("key"))
+    monkeypatch.setattr(settings.openai, "init_conversation_prompt", None)
+    monkeypatch.setattr(RuntimeSnapshot, "_current", None)
+    texts = [
+        text for idx in range(RESPONSES) for text in response_events(idx)
+    ]
+    for text in texts:
+        ServerEvent.validate_json(text)
+    model = events_per_second(validate_all, texts)
+    lazy = events_per_second(listen, texts)
+    print(
+        f"\nOpenAI events per second for a mix of {len(texts):,} events: "
+        f"{model:,.0f} validating every event, {lazy:,.0f} decoding lazily "
+        f"({lazy / model:.1f}x)"
+    )
+    assert lazy > model
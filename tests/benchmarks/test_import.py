@@ -0,0 +1,78 @@
+import asyncio
+import sys
+from collections.abc import Iterator
+from csv import DictWriter
+from os import cpu_count, environ
+from pathlib import Path
+from time import perf_counter
+
+import pytest
+from loguru import logger as log
+from sqlalchemy import func
+from sqlmodel import select
+
+from callbot.contacts import import_contacts
+from callbot.db import EngineWrapper as DBEngine
+from callbot.schemas.contact import ContactDB
+
+
+# Can be lowered for a quick run, e.g. `CALLBOT_BENCHMARK_ROWS=100000`.
+ROWS = int(environ.get("CALLBOT_BENCHMARK_ROWS", "1000000"))
+# Every n-th row repeats the phone number of the row before it.
+DUPLICATE_EVERY = 100
+WORKERS = sorted({1, cpu_count() or 1})
+FIELDS = ("company", "firstname", "lastname", "phone", "email")
+
+
+@pytest.fixture
+def quiet_log() -> Iterator[None]:
+    # Logging every skipped row would be measured as well otherwise.
+    log.remove()
+    handler = log.add(sys.stderr, level="INFO")
+    yield
+    log.remove(handler)
+    log.add(sys.stderr)
+
+
+def write_csv(path: Path, rows: int) -> int:
+    """Writes a CSV file of contacts and returns the number of unique ones."""
+    unique = 0
+    with path.open("w", newline="") as csvfile:
+        writer = DictWriter(csvfile, FIELDS)
+        writer.writeheader()
+        for idx in range(rows):
+            duplicate = idx and idx % DUPLICATE_EVERY == 0
+            number = idx - 1 if duplicate else idx
+            unique += not duplicate
+            writer.writerow({
+                "company": f"Company {idx % 1000}",
+                "firstname": f"First{idx}",
+                "lastname": f"Last{idx}",
+                "phone": f"+4930{10_000_000 + number}",
+                "email": f"contact{idx}@example.com",
+            })
+    return unique
+
+
+async def import_and_count(path: Path, workers: int) -> int:
+    await import_contacts(path, bulk=True, workers=workers)
+    async with DBEngine().get_session() as session:
+        count = (await session.exec(select(func.count(ContactDB.id)))).one()
+    await DBEngine().engine.dispose()
+    return count
+
+
+@pytest.mark.benchmark
+@pytest.mark.usefixtures("database", "quiet_log")
+@pytest.mark.parametrize("workers", WORKERS)
+def test_bulk_import_rows_per_second(tmp_path: Path, workers: int) -> None:
+    csv_path = tmp_path / "contacts.csv"
+    unique = write_csv(csv_path, ROWS)
+    start = perf_counter()
+    imported = asyncio.run(import_and_count(csv_path, workers))
+    seconds = perf_counter() - start
+    print(
+        f"\nBulk import of {ROWS:,} rows with {workers} worker(s): "
+        f"{seconds:.1f} s ({ROWS / seconds:,.0f} rows/s)"
+    )
+    assert imported == unique
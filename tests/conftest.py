@@ -0,0 +1,19 @@
+from pathlib import Path
+
+import pytest
+
+from callbot.contact_cache import ContactCache
+from callbot.db import EngineWrapper as DBEngine
+from callbot.deadlines import DeadlineScheduler
+from callbot.settings import Settings
+
+
+@pytest.fixture
+def database(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Points the database at a fresh SQLite file for a single test."""
+    path = tmp_path / "callbot.db"
+    monkeypatch.setattr(Settings().db, "name", str(path))
+    # Process-wide objects, which are bound to the database or event loop.
+    for singleton in (DBEngine, ContactCache, DeadlineScheduler):
+        monkeypatch.setattr(singleton, "_instance", None)
+    return path
@@ -0,0 +1,119 @@
+"""
+Minimal stand-in for the Twilio REST API, as far as the `Caller` uses it.
+
+Calls are "in progress" for `call_seconds` after they were created and then
+end with the outcome scripted for the number and attempt. Numbers ending in
+1 are busy on the first attempt, those ending in 2 never answer and all
+others answer right away.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from itertools import count
+from time import monotonic
+from typing import TYPE_CHECKING
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+if TYPE_CHECKING:
+    from starlette.requests import Request
+
+
+@dataclass
+class FakeCall:
+    to: str
+    created: float
+    outcome: str
+
+
+@dataclass
+class FakeTwilio:
+    call_seconds: float = 0.2
+    calls: dict[str, FakeCall] = field(default_factory=dict)
+    attempts: dict[str, int] = field(default_factory=dict)
+    max_active: int = 0
+    _sids: count[int] = field(default_factory=count)
+
+    @property
+    def app(self) -> Starlette:
+        return Starlette(routes=[
+            Route(
+                "/2010-04-01/Accounts/{account}/Calls.json",
+                self._create,
+                methods=["POST"],
+            ),
+            Route(
+                "/2010-04-01/Accounts/{account}/Calls/{call_sid}.json",
+                self._fetch,
+                methods=["GET"],
+            ),
+        ])
+
+    @staticmethod
+    def outcome(to: str, attempt: int) -> str:
+        if to.endswith("1"):
+            return "busy" if attempt == 1 else "completed"
+        if to.endswith("2"):
+            return "no-answer"
+        return "completed"
+
+    def active(self) -> int:
+        now = monotonic()
+        return sum(
+            now - call.created < self.call_seconds
+            for call in self.calls.values()
+        )
+
+    async def _create(self, request: Request) -> JSONResponse:
+        to = str((await request.form())["To"])
+        attempt = self.attempts[to] = self.attempts.get(to, 0) + 1
+        sid = f"CA{next(self._sids):032x}"
+        self.calls[sid] = FakeCall(to, monotonic(), self.outcome(to, attempt))
+        self.max_active = max(self.max_active, self.active())
+        return JSONResponse(
+            {"sid": sid, "status": "queued", "to": to},
+            status_code=201,
+        )
+
+    async def _fetch(self, request: Request) -> JSONResponse:
+        sid = request.path_params["call_sid"]
+        call = self.calls[sid]
+        done = monotonic() - call.created >= self.call_seconds
+        status = call.outcome if done else "in-progress"
+        return JSONResponse({"sid": sid, "status": status})
+
+
+class FakeTwilioServer:
+    """Serves a `FakeTwilio` on a free local port while in use."""
+
+    def __init__(self, twilio: FakeTwilio) -> None:
+        self.twilio = twilio
+        self._server = uvicorn.Server(uvicorn.Config(
+            twilio.app,
+            host="127.0.0.1",
+            port=0,
+            log_level="error",
+        ))
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def base_url(self) -> str:
+        socket = self._server.servers[0].sockets[0]
+        host, port = socket.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def __aenter__(self) -> FakeTwilioServer:
+        self._task = asyncio.create_task(self._server.serve())
+        while not self._server.started:
+            await asyncio.sleep(.01)
+        return self
+
+    async def __aexit__(self, *_exc_info: object) -> None:
+        self._server.should_exit = True
+        if self._task is not None:
+            await self._task
@@ -0,0 +1,165 @@
+"""
+Tests the backend pool against a local fake of the OpenAI realtime API.
+
+The fake server accepts every connection and records the events it gets,
+but never answers them; that is all a pooled backend needs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
+
+import pytest
+from pydantic import SecretStr
+from websockets.asyncio.server import ServerConnection, serve
+
+from callbot.backends.pool import BackendPool
+from callbot.runtime import RuntimeSnapshot
+from callbot.settings import Settings
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Callable
+
+
+POOL_SIZE = 2
+
+
+class FakeRealtime:
+    def __init__(self) -> None:
+        self.connections: set[ServerConnection] = set()
+        self.accepted = 0
+        self.session_updates = 0
+
+    async def handler(self, websocket: ServerConnection) -> None:
+        self.connections.add(websocket)
+        self.accepted += 1
+        try:
+            async for text in websocket:
+                if json.loads(text)["type"] == "session.update":
+                    self.session_updates += 1
+        finally:
+            self.connections.discard(websocket)
+
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch: pytest.MonkeyPatch) -> None:
+    settings = Settings()
+    monkeypatch.setattr(settings, "backend", "openai")
+    monkeypatch.setattr(settings.openai, "api_key", SecretStr("key"))
+    monkeypatch.setattr(settings.backend_pool, "size", POOL_SIZE)
+    monkeypatch.setattr(settings.backend_pool, "max_idle_seconds", 60)
+    monkeypatch.setattr(settings.backend_pool, "retry_delay_seconds", .01)
+    monkeypatch.setattr(BackendPool, "_instance", None)
+    monkeypatch.setattr(RuntimeSnapshot, "_current", None)
+
+
+@asynccontextmanager
+async def running_pool(
+    monkeypatch: pytest.MonkeyPatch,
+) -> AsyncIterator[tuple[FakeRealtime, BackendPool]]:
+    fake = FakeRealtime()
+    async with serve(fake.handler, "127.0.0.1", 0) as server:
+        host, port = next(iter(server.sockets)).getsockname()[:2]
+        monkeypatch.setattr(
+            Settings().openai,
+            "realtime_base_url",
+            f"ws://{host}:{port}",
+        )
+        RuntimeSnapshot.reload()
+        pool = BackendPool()
+        pool.start()
+        try:
+            yield fake, pool
+        finally:
+            await pool.stop()
+
+
+async def until(condition: Callable[[], bool], seconds: float = 2) -> None:
+    async with asyncio.timeout(seconds):
+        while not condition():
+            await asyncio.sleep(.01)
+
+
+def is_full(fake: FakeRealtime, pool: BackendPool) -> bool:
+    return pool.ready == POOL_SIZE and len(fake.connections) == POOL_SIZE
+
+
+def test_fills_pool_with_initialized_sessions(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    async def main() -> None:
+        async with running_pool(monkeypatch) as (fake, pool):
+            await until(lambda: is_full(fake, pool))
+            await until(lambda: fake.session_updates == POOL_SIZE)
+            assert fake.accepted == POOL_SIZE
+        # Stopping the pool closes the ready backends.
+        assert not fake.connections
+
+    asyncio.run(main())
+
+
+def test_refills_after_checkout(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def main() -> None:
+        async with running_pool(monkeypatch) as (fake, pool):
+            await until(lambda: is_full(fake, pool))
+            async with pool.checkout() as backend:
+                assert backend.is_alive()
+                assert pool.hits == 1
+                # A replacement is opened, while the call is going on.
+                await until(lambda: pool.ready == POOL_SIZE)
+                assert fake.accepted == POOL_SIZE + 1
+                assert len(fake.connections) == POOL_SIZE + 1
+            assert not backend.is_alive()
+            await until(lambda: len(fake.connections) == POOL_SIZE)
+
+    asyncio.run(main())
+
+
+def test_checkout_from_empty_pool_opens_backend(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(Settings().backend_pool, "size", 0)
+
+    async def main() -> None:
+        async with running_pool(monkeypatch) as (fake, pool):
+            async with pool.checkout() as backend:
+                assert backend.is_alive()
+                assert pool.misses == 1
+                assert fake.accepted == 1
+            assert pool.ready == 0
+
+    asyncio.run(main())
+
+
+def test_recycle_replaces_ready_backends(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    async def main() -> None:
+        async with running_pool(monkeypatch) as (fake, pool):
+            await until(lambda: is_full(fake, pool))
+            replaced = set(fake.connections)
+            pool.recycle()
+            await until(lambda: fake.accepted == 2 * POOL_SIZE)
+            await until(lambda: is_full(fake, pool))
+            assert not replaced & fake.connections
+            assert fake.session_updates == 2 * POOL_SIZE
+
+    asyncio.run(main())
+
+
+def test_idle_backends_expire(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(Settings().backend_pool, "max_idle_seconds", .2)
+
+    async def main() -> None:
+        async with running_pool(monkeypatch) as (fake, pool):
+            await until(lambda: is_full(fake, pool))
+            expired = set(fake.connections)
+            await until(lambda: not expired & fake.connections)
+            await until(lambda: is_full(fake, pool))
+            assert fake.accepted >= 2 * POOL_SIZE
+            assert pool.hits == pool.misses == 0
+
+    asyncio.run(main())
@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+from sqlmodel import col, select
+
+from callbot.caller import Caller
+from callbot.campaign import Campaign
+from callbot.db import EngineWrapper as DBEngine
+from callbot.schemas.campaign import CampaignCallDB
+from callbot.schemas.contact import Contact
+from callbot.settings import Settings
+from callbot.settings.campaign import CampaignSettings
+
+from tests.fake_twilio import FakeTwilio, FakeTwilioServer
+
+
+PHONES = [f"+49301234{idx:03d}" for idx in range(12)]
+SETTINGS = CampaignSettings(
+    max_concurrent_calls=3,
+    calls_per_second=20,
+    max_attempts=3,
+    retry_backoff_seconds=.1,
+    status_poll_interval_seconds=.02,
+)
+
+
+def expected_attempts(phone: str) -> int:
+    if phone.endswith("1"):
+        return 2
+    if phone.endswith("2"):
+        return SETTINGS.max_attempts
+    return 1
+
+
+@pytest.fixture
+def twilio(monkeypatch: pytest.MonkeyPatch) -> FakeTwilio:
+    settings = Settings()
+    monkeypatch.setattr(settings.twilio, "account_sid", "AC" + "0" * 32)
+    monkeypatch.setattr(settings.twilio, "auth_token", "token")
+    monkeypatch.setattr(settings.twilio, "phone_number", "+4930999999")
+    monkeypatch.setattr(settings.twilio, "calls_per_second", 100)
+    monkeypatch.setattr(
+        settings.server,
+        "public_base_url",
+        "https://callbot.example.org",
+    )
+    return FakeTwilio()
+
+
+async def seed_contacts() -> None:
+    await DBEngine().create_tables()
+    async with DBEngine().get_session() as session:
+        for phone in PHONES:
+            contact = Contact(
+                company="Company",
+                firstname="First",
+                lastname="Last",
+                phone=phone,
+            )
+            session.add(contact.to_db())
+        await session.commit()
+
+
+async def load_calls() -> dict[str, CampaignCallDB]:
+    async with DBEngine().get_session() as session:
+        results = await session.exec(
+            select(CampaignCallDB).where(col(CampaignCallDB.campaign) == "test")
+        )
+        return {call.phone: call for call in results}
+
+
+async def run_campaign(
+    twilio: FakeTwilio,
+    interrupt_after: float | None = None,
+) -> Campaign:
+    settings = Settings()
+    async with FakeTwilioServer(twilio) as server:
+        settings.twilio.api_base_url = server.base_url
+        campaign = Campaign("test", SETTINGS)
+        run = asyncio.create_task(campaign.run())
+        try:
+            if interrupt_after is None:
+                await run
+            else:
+                await asyncio.sleep(interrupt_after)
+                run.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await run
+        finally:
+            await Caller.close_shared()
+            settings.twilio.api_base_url = None
+            await DBEngine().engine.dispose()
+    return campaign
+
+
+def is_answered(twilio: FakeTwilio, call: CampaignCallDB) -> bool:
+    """Returns whether the call is in progress and will be answered."""
+    if call.status != "dialing" or call.call_sid is None:
+        return False
+    return twilio.calls[call.call_sid].outcome == "completed"
+
+
+@pytest.mark.usefixtures("database")
+def test_campaign_calls_every_number(twilio: FakeTwilio) -> None:
+    async def main() -> Campaign:
+        await seed_contacts()
+        added = await Campaign("test", SETTINGS).add_numbers(
+            [*PHONES, PHONES[0], "not a number"]
+        )
+        assert added == len(PHONES)
+        return await run_campaign(twilio)
+
+    stats = asyncio.run(main()).stats
+    assert twilio.attempts == {
+        phone: expected_attempts(phone) for phone in PHONES
+    }
+    assert stats.total == len(PHONES)
+    assert stats.failed == sum(phone.endswith("2") for phone in PHONES)
+    assert stats.completed == len(PHONES) - stats.failed
+    assert stats.attempts == sum(twilio.attempts.values())
+    assert 1 < twilio.max_active <= SETTINGS.max_concurrent_calls
+
+
+@pytest.mark.usefixtures("database")
+def test_interrupted_campaign_resumes(twilio: FakeTwilio) -> None:
+    async def main() -> tuple[dict[str, int], list[str], Campaign]:
+        await seed_contacts()
+        await Campaign("test", SETTINGS).add_numbers(PHONES)
+        await run_campaign(twilio, interrupt_after=.5)
+        attempts = dict(twilio.attempts)
+        answered = [
+            phone for phone, call in (await load_calls()).items()
+            if call.status == "completed" or is_answered(twilio, call)
+        ]
+        return attempts, answered, await run_campaign(twilio)
+
+    interrupted_attempts, answered, resumed = asyncio.run(main())
+    assert answered, "Interrupted before any call was answered"
+    assert len(answered) < len(PHONES), "Not interrupted"
+    # Neither finished calls nor those in progress are dialed again.
+    for phone in answered:
+        assert twilio.attempts[phone] == interrupted_attempts[phone]
+    assert resumed.stats.total == len(PHONES)
+    assert resumed.stats.completed + resumed.stats.failed == len(PHONES)
+    assert set(twilio.attempts) == set(PHONES)
@@ -0,0 +1,113 @@
+import json
+
+import pytest
+from pydantic import SecretStr
+
+from callbot.backends._elevenlabs import Elevenlabs
+from callbot.runtime import RuntimeSnapshot
+from callbot.schemas.elevenlabs.receive import ReceiveMessage
+from callbot.schemas.elevenlabs.send import InitializeContext, SendTextMulti
+from callbot.settings import Settings
+from callbot.settings.elevenlabs import GenerationConfig, VoiceSettings
+
+
+TEXTS = [
+    "Hello! ",
+    "",
+    'with "quotes" and \\',
+    "line\nbreak\t",
+    "ü\u2028\x00",
+]
+CONTEXT_IDS = ["0:item_123", None, 'ctx"\\', "é\x00"]
+
+
+@pytest.fixture(params=[False, True], ids=["defaults", "voice"])
+def elevenlabs(
+    request: pytest.FixtureRequest,
+    monkeypatch: pytest.MonkeyPatch,
+) -> Elevenlabs:
+    settings = Settings().elevenlabs
+    monkeypatch.setattr(settings, "voice_id", "voice")
+    monkeypatch.setattr(settings, "api_key", SecretStr("key"))
+    if request.param:
+        monkeypatch.setattr(
+            settings,
+            "voice_settings",
+            VoiceSettings(stability=.5, similarity_boost=.75, speed=1.1),
+        )
+        monkeypatch.setattr(
+            settings,
+            "generation_config",
+            GenerationConfig(chunk_length_schedule=[50, 120]),
+        )
+    monkeypatch.setattr(RuntimeSnapshot, "_current", None)
+    return Elevenlabs()
+
+
+@pytest.mark.parametrize("context_id", CONTEXT_IDS)
+@pytest.mark.parametrize("text", TEXTS)
+def test_init_context_is_identical_to_model(
+    elevenlabs: Elevenlabs,
+    text: str,
+    context_id: str | None,
+) -> None:
+    settings = Settings().elevenlabs
+    expected = InitializeContext(
+        text=text,
+        context_id=context_id,
+        voice_settings=settings.voice_settings,
+        generation_config=settings.generation_config,
+    ).model_dump_json(exclude_none=True)
+    assert elevenlabs._encode_init_context(text, context_id) == expected
+
+
+@pytest.mark.parametrize("context_id", CONTEXT_IDS)
+@pytest.mark.parametrize("text", TEXTS)
+def test_send_text_is_identical_to_model(
+    elevenlabs: Elevenlabs,
+    text: str,
+    context_id: str | None,
+) -> None:
+    expected = SendTextMulti(
+        text=text,
+        context_id=context_id,
+    ).model_dump_json(exclude_none=True)
+    assert elevenlabs._encode_send_text(text, context_id) == expected
+    # Served from the cached suffix the second time.
+    assert elevenlabs._encode_send_text(text, context_id) == expected
+
+
+@pytest.mark.parametrize("message", [
+    {"audio": "f/9/fw==", "contextId": "0:item_123"},
+    {"audio": "", "contextId": "é\u2028\x00"},
+    {"audio": "f/9/fw==", "context_id": "snake"},
+    {"audio": "f/9/fw=="},
+    {
+        "audio": "f/9/fw==",
+        "contextId": "0:item_123",
+        "alignment": {"chars": ["a"], "charStartTimesMs": [0]},
+        "normalizedAlignment": None,
+    },
+    {"isFinal": True, "contextId": "0:item_123"},
+    {"isFinal": True},
+])
+def test_decode_is_equivalent_to_model(message: dict[str, object]) -> None:
+    text = json.dumps(message)
+    decoded = Elevenlabs._decode_fast(text)
+    expected = ReceiveMessage.validate_json(text)
+    assert type(decoded) is type(expected)
+    assert decoded is not None
+    assert decoded.context_id == expected.context_id
+    assert getattr(decoded, "audio", None) == getattr(expected, "audio", None)
+
+
+@pytest.mark.parametrize("text", [
+    # Left to the model, which rejects it.
+    '{"isFinal": false, "contextId": "0:item_123"}',
+    '{"contextId": "0:item_123"}',
+    '{"audio": null, "isFinal": null}',
+    "not json",
+    "[]",
+])
+def test_decode_falls_back_to_model(text: str) -> None:
+    assert Elevenlabs._decode_fast(text) is None
@@ -0,0 +1,209 @@
+"""
+Tests the shared Elevenlabs connections against a local websocket server.
+
+The fake server answers every message with text with an audio message for
+the same context, which carries the text instead of actual audio.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
+
+import pytest
+from pydantic import SecretStr
+from websockets.asyncio.server import Server, ServerConnection, serve
+
+from callbot.backends._elevenlabs_shared import (
+    ElevenlabsConnections,
+    ElevenlabsSession,
+    SharedConnection,
+)
+from callbot.runtime import RuntimeSnapshot
+from callbot.schemas.elevenlabs.receive import AudioOutputMulti
+from callbot.settings import Settings
+from callbot.settings.elevenlabs import ElevenlabsSettings
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Callable
+
+
+class FakeElevenlabs:
+    def __init__(self) -> None:
+        self.connections: set[ServerConnection] = set()
+        self.accepted = 0
+        self.received: list[dict[str, object]] = []
+
+    async def handler(self, websocket: ServerConnection) -> None:
+        self.connections.add(websocket)
+        self.accepted += 1
+        try:
+            async for text in websocket:
+                message = json.loads(text)
+                self.received.append(message)
+                if str(message.get("text", "")).strip():
+                    await websocket.send(json.dumps({
+                        "audio": message["text"],
+                        "contextId": message["context_id"],
+                    }))
+        finally:
+            self.connections.discard(websocket)
+
+    async def drop(self) -> None:
+        """Closes all connections, as if the server went away."""
+        for websocket in list(self.connections):
+            await websocket.close()
+
+
+@pytest.fixture
+def elevenlabs(monkeypatch: pytest.MonkeyPatch) -> ElevenlabsSettings:
+    settings = Settings().elevenlabs
+    monkeypatch.setattr(settings, "voice_id", "voice")
+    monkeypatch.setattr(settings, "api_key", SecretStr("key"))
+    monkeypatch.setattr(settings, "calls_per_connection", 2)
+    monkeypatch.setattr(settings, "reconnect_delay_seconds", .01)
+    monkeypatch.setattr(settings, "connect_timeout_seconds", 5)
+    monkeypatch.setattr(ElevenlabsConnections, "_instance", None)
+    monkeypatch.setattr(RuntimeSnapshot, "_current", None)
+    return settings
+
+
+@asynccontextmanager
+async def fake_server(
+    monkeypatch: pytest.MonkeyPatch,
+) -> AsyncIterator[tuple[FakeElevenlabs, Server]]:
+    fake = FakeElevenlabs()
+    async with serve(fake.handler, "127.0.0.1", 0) as server:
+        host, port = next(iter(server.sockets)).getsockname()[:2]
+        monkeypatch.setattr(
+            ElevenlabsSettings,
+            "TTS_BASE_URL",
+            f"ws://{host}:{port}",
+        )
+        RuntimeSnapshot.reload()
+        yield fake, server
+
+
+async def receive(session: ElevenlabsSession) -> AudioOutputMulti:
+    async with asyncio.timeout(2):
+        message = await anext(aiter(session.listen()))
+    assert isinstance(message, AudioOutputMulti)
+    return message
+
+
+async def until(condition: Callable[[], bool], seconds: float = 2) -> None:
+    async with asyncio.timeout(seconds):
+        while not condition():
+            await asyncio.sleep(.01)
+
+
+def connection_of(session: ElevenlabsSession) -> SharedConnection:
+    return session._connection
+
+
+@pytest.mark.usefixtures("elevenlabs")
+def test_messages_are_routed_by_context(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def main() -> None:
+        async with fake_server(monkeypatch) as (fake, _):
+            first = ElevenlabsConnections().session()
+            second = ElevenlabsConnections().session()
+            assert connection_of(first) is connection_of(second)
+            await first.send_text("Hello", "a")
+            await second.send_text("Bye", "a")
+            await first.send_text("again", "b")
+            for session, expected in (
+                (first, [("Hello", "a"), ("again", "b")]),
+                (second, [("Bye", "a")]),
+            ):
+                for audio, context_id in expected:
+                    message = await receive(session)
+                    assert (message.audio, message.context_id) == (
+                        audio,
+                        context_id,
+                    )
+            assert fake.accepted == 1
+            context_ids = {str(m["context_id"]) for m in fake.received}
+            assert context_ids == {
+                f"{first.session_id}:a",
+                f"{second.session_id}:a",
+                f"{first.session_id}:b",
+            }
+            await first.close()
+            await second.close()
+
+    asyncio.run(main())
+
+
+@pytest.mark.usefixtures("elevenlabs")
+def test_reconnects_after_connection_loss(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    async def main() -> None:
+        async with fake_server(monkeypatch) as (fake, _):
+            session = ElevenlabsConnections().session()
+            connection = connection_of(session)
+            await session.send_text("Hello", "a")
+            assert (await receive(session)).audio == "Hello"
+            await fake.drop()
+            await until(lambda: connection.reconnects == 1)
+            # The context is initialized again on the new connection.
+            await session.send_text("again", "a")
+            assert (await receive(session)).audio == "again"
+            assert fake.accepted == 1 + connection.reconnects
+            await session.close()
+
+    asyncio.run(main())
+
+
+@pytest.mark.usefixtures("elevenlabs")
+def test_close_while_disconnected(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def main() -> None:
+        async with fake_server(monkeypatch) as (fake, server):
+            session = ElevenlabsConnections().session()
+            connection = connection_of(session)
+            await session.send_text("Hello", "a")
+            await receive(session)
+            server.close()
+            await server.wait_closed()
+            await until(lambda: not connection._connected.is_set())
+            # Does not wait for the connect timeout.
+            async with asyncio.timeout(1):
+                await session.close()
+            assert not session.is_alive()
+            assert not connection.sessions
+            await until(lambda: connection._task is None)
+            assert not fake.connections
+
+    asyncio.run(main())
+
+
+@pytest.mark.usefixtures("elevenlabs")
+def test_last_session_closes_connection(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    async def main() -> None:
+        async with fake_server(monkeypatch) as (fake, _):
+            first = ElevenlabsConnections().session()
+            second = ElevenlabsConnections().session()
+            await first.send_text("Hello", "a")
+            await receive(first)
+            await first.close()
+            assert len(fake.connections) == 1
+            await second.close()
+            await until(lambda: not fake.connections)
+            assert {
+                "context_id": f"{first.session_id}:a",
+                "close_context": True,
+            } in fake.received
+            # A new session opens a new connection.
+            accepted = fake.accepted
+            third = ElevenlabsConnections().session()
+            assert connection_of(third) is not connection_of(first)
+            await third.send_text("Hello", "a")
+            await receive(third)
+            assert fake.accepted == accepted + 1
+            await third.close()
+
+    asyncio.run(main())
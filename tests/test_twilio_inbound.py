@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from callbot.schemas.twilio_websocket_messages.inbound import (
+    Media,
+    Message,
+    parse_media_frame,
+)
+
+
+def media_frame(payload: str = "f/9/fw==", timestamp: str = "120") -> str:
+    return json.dumps({
+        "event": "media",
+        "sequenceNumber": "7",
+        "media": {
+            "track": "inbound",
+            "chunk": "6",
+            "timestamp": timestamp,
+            "payload": payload,
+        },
+        "streamSid": "MZ0123456789abcdef",
+    }, separators=(",", ":"))
+
+
+@pytest.mark.parametrize("text", [
+    media_frame(),
+    media_frame(payload=""),
+    media_frame(payload="a\\/b+c=="),
+    media_frame(timestamp="0"),
+    media_frame(timestamp="86400000"),
+])
+def test_parse_media_frame_matches_model(text: str) -> None:
+    message = Message.validate_json(text)
+    assert isinstance(message, Media)
+    expected = message.media.timestamp, message.media.payload
+    assert parse_media_frame(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    '{"event":"connected","protocol":"Call","version":"1.0.0"}',
+    '{"event":"stop","sequenceNumber":"9","streamSid":"MZ0"}',
+    '{"type":"prompt","voicePrompt":"media","lang":"en-US","last":true}',
+    # The fast path only looks for the event at the start of the message.
+    '{"sequenceNumber":"7","streamSid":"MZ0","event":"media","media":{}}',
+    # Only a nested object is a media event.
+    '{"media":{"event":"media","timestamp":"1","payload":""},"type":"x"}',
+])
+def test_parse_media_frame_ignores_other_messages(text: str) -> None:
+    assert parse_media_frame(text) is None
+
+
+@pytest.mark.parametrize("text", [
+    '{"event":"media"',
+    '{"event":"media","media":{"timestamp":"1"}}',
+    '{"event":"media","media":{"timestamp":"x","payload":""}}',
+    '{"event":"media","media":{"timestamp":"1","payload":1}}',
+    '{"event":"media","media":null}',
+])
+def test_parse_media_frame_rejects_malformed_media(text: str) -> None:
+    assert parse_media_frame(text) is None
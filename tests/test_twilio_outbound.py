@@ -0,0 +1,41 @@
+import pytest
+
+from callbot.schemas.twilio_websocket_messages.outbound import (
+    Clear,
+    FrameEncoder,
+    Mark,
+    Media,
+)
+
+
+STREAM_SIDS = ["MZ0123456789abcdef", "", 'MZ"quoted"\\', "MZé\u2028"]
+TEXTS = [
+    "f/9/fw==",
+    "",
+    'with "quotes" and \\',
+    "line\nbreak\t",
+    "ü\u2028\x00",
+]
+
+
+@pytest.mark.parametrize("stream_sid", STREAM_SIDS)
+@pytest.mark.parametrize("payload", TEXTS)
+def test_media_is_identical_to_model(stream_sid: str, payload: str) -> None:
+    expected = Media.with_payload(payload, stream_sid).model_dump_json()
+    assert FrameEncoder(stream_sid).media(payload) == expected
+
+
+@pytest.mark.parametrize("stream_sid", STREAM_SIDS)
+@pytest.mark.parametrize("name", TEXTS)
+def test_mark_is_identical_to_model(stream_sid: str, name: str) -> None:
+    encoder = FrameEncoder(stream_sid)
+    expected = Mark.with_name(name, stream_sid).model_dump_json()
+    assert encoder.mark(name) == expected
+    # Served from the cache the second time.
+    assert encoder.mark(name) == expected
+
+
+@pytest.mark.parametrize("stream_sid", STREAM_SIDS)
+def test_clear_is_identical_to_model(stream_sid: str) -> None:
+    expected = Clear(streamSid=stream_sid).model_dump_json()
+    assert FrameEncoder(stream_sid).clear() == expected